@@ -0,0 +1,119 @@
+import asyncio
+import contextlib
+import hashlib
+import threading
+import weakref
+from collections import OrderedDict
+from functools import lru_cache
+
+import google.generativeai as genai
+from dotenv import load_dotenv
+from groq import AsyncGroq, Groq
+from openai import AsyncOpenAI, OpenAI
+
+OPENROUTER_BASE_URL = "https://openrouter.ai/api/v1"
+
+# google.generativeai has a single module-level configuration, so the last
+# applied (key fingerprint, endpoint) is tracked per process, not per registry
+_gemini_lock = threading.RLock()
+_gemini_config = None
+
+
+@lru_cache(maxsize=None)
+def load_env():
+    """Reads .env once per process."""
+    load_dotenv()
+
+
+def key_fingerprint(api_key):
+    """Short hash of an API key; keys themselves are never used as dict keys or logged."""
+    return hashlib.sha256((api_key or '').encode('utf-8')).hexdigest()[:16]
+
+
+class ClientRegistry:
+    """
+    Process-wide provider clients keyed on (provider, key fingerprint).
+    Each client owns an HTTP connection pool, so reusing it across reruns
+    and sessions skips client setup and TLS handshakes. Least recently used
+    clients are dropped beyond max_clients. Async clients are kept per
+    event loop (their connections belong to it) and go away with the loop.
+    base_urls: optional {provider: URL} overrides, e.g. a proxy or the
+    local mock server used by the benchmarks.
+    """
+
+    def __init__(self, max_clients=64, base_urls=None):
+        self.max_clients = max_clients
+        self.base_urls = dict(base_urls or {})
+        self._clients = OrderedDict()
+        self._async_clients = weakref.WeakKeyDictionary()
+        self._lock = threading.Lock()
+        self.created = 0
+
+    def _build(self, provider, api_key, is_async):
+        base_url = self.base_urls.get(provider)
+        if provider == "Groq":
+            return (AsyncGroq if is_async else Groq)(api_key=api_key, base_url=base_url)
+        if provider == "OpenAI":
+            return (AsyncOpenAI if is_async else OpenAI)(api_key=api_key, base_url=base_url)
+        if provider == "OpenRouter":
+            return (AsyncOpenAI if is_async else OpenAI)(base_url=base_url or OPENROUTER_BASE_URL, api_key=api_key)
+        raise ValueError(f"No client for provider: {provider}")
+
+    def get(self, provider, api_key, is_async=False):
+        """
+        Shared client for an OpenAI-compatible provider (Groq, OpenAI,
+        OpenRouter). Async clients must be requested from a running loop.
+        """
+        key = (provider, key_fingerprint(api_key))
+        if is_async:
+            loop = asyncio.get_running_loop()
+            with self._lock:
+                clients = self._async_clients.setdefault(loop, {})
+                if key not in clients:
+                    clients[key] = self._build(provider, api_key, True)
+                    self.created += 1
+                return clients[key]
+
+        with self._lock:
+            client = self._clients.get(key)
+            if client is None:
+                client = self._build(provider, api_key, False)
+                self.created += 1
+                self._clients[key] = client
+                while len(self._clients) > self.max_clients:
+                    self._clients.popitem(last=False)
+            self._clients.move_to_end(key)
+            return client
+
+    def configure_gemini(self, api_key):
+        """
+        google.generativeai keeps a single module-level configuration, so
+        it is only reconfigured when the key actually changes.
+        """
+        base_url = self.base_urls.get("Gemini")
+        options = {"transport": "rest", "client_options": {"api_endpoint": base_url}} if base_url else {}
+        global _gemini_config
+        with _gemini_lock:
+            if _gemini_config != (key_fingerprint(api_key), base_url):
+                genai.configure(api_key=api_key, **options)
+                _gemini_config = (key_fingerprint(api_key), base_url)
+
+    @contextlib.contextmanager
+    def gemini(self, api_key):
+        """
+        Holds the process-wide Gemini configuration with api_key applied, so
+        calls made inside (e.g. model discovery on a background thread) can
+        not run under another session's key.
+        """
+        with _gemini_lock:
+            self.configure_gemini(api_key)
+            yield
+
+    def __len__(self):
+        return len(self._clients)
+
+    @staticmethod
+    @lru_cache(maxsize=None)
+    def default():
+        """The process-wide registry."""
+        return ClientRegistry()
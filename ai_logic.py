@@ -1,18 +1,31 @@
-import google.generativeai as genai
+import asyncio
 import os
-from dotenv import load_dotenv
-from groq import Groq
-from openai import OpenAI
+
+import google.generativeai as genai
+
+from ai_clients import ClientRegistry, load_env
+from chat_context import ChatContext, GeminiPrefixCache, prefix_hash
+from model_catalog import ModelCatalog
+from response_cache import ResponseCache
 
 class AIAssistant:
-    def __init__(self, provider="Gemini", api_key=None, model_name=None):
+    def __init__(self, provider="Gemini", api_key=None, model_name=None, response_cache=None, clients=None, context=None):
         """
         Initializes the AI Assistant with specified provider.
         Priority: api_key arg > env variable.
+        response_cache: a ResponseCache, None for the process-wide one, or
+        False to always call the provider.
+        clients: a ClientRegistry, None for the process-wide one. Clients are
+        shared, so constructing an assistant on every rerun is cheap.
+        context: a ChatContext deciding which turns are sent, None for the
+        default token budget.
         """
-        load_dotenv()
+        load_env()
         self.provider = provider
         self.api_key = api_key
+        self.response_cache = ResponseCache.default() if response_cache is None else response_cache
+        self.clients = ClientRegistry.default() if clients is None else clients
+        self.context = ChatContext() if context is None else context
         
         # Default keys from env if not provided
         if not self.api_key:
@@ -42,86 +55,181 @@ class AIAssistant:
         
         if self.api_key:
             if self.provider == "Gemini":
-                genai.configure(api_key=self.api_key)
-                self.is_configured = True
-            elif self.provider == "Groq":
-                self.client = Groq(api_key=self.api_key)
+                self.clients.configure_gemini(self.api_key)
                 self.is_configured = True
-            elif self.provider == "OpenAI":
-                self.client = OpenAI(api_key=self.api_key)
-                self.is_configured = True
-            elif self.provider == "OpenRouter":
-                self.client = OpenAI(
-                    base_url="https://openrouter.ai/api/v1",
-                    api_key=self.api_key,
-                )
+            elif self.provider in ["Groq", "OpenAI", "OpenRouter"]:
+                self.client = self.clients.get(self.provider, self.api_key)
                 self.is_configured = True
 
+    @property
+    def async_client(self):
+        """Shared asyncio client of an OpenAI-compatible provider."""
+        return self.clients.get(self.provider, self.api_key, is_async=True)
+
     def generate_chat_stream(self, system_prompt, messages):
         """
         Generates a streaming chat response based on conversation history.
         messages: List of {"role": "user/assistant", "content": "..."}
+        Errors are reported as a final chunk (see stream).
         """
         if not self.is_configured:
-            yield f"❌ 錯誤：未偵測到 {self.provider} API Key。請在側邊欄設定。"
+            yield self._not_configured_message()
             return
+        try:
+            yield from self.stream(system_prompt, messages)
+        except Exception as e:
+            yield self._error_message(e)
+
+    def stream(self, system_prompt, messages):
+        """
+        Text chunks of the response; provider errors propagate.
+        A request seen before is replayed chunk by chunk from the response
+        cache; only responses streamed to the end without error are stored.
+        Long chats are fitted to the context budget first (see ChatContext).
+        """
+        fitted, key, cached = self._prepare(system_prompt, messages)
+        if cached is not None:
+            yield from cached
+            return
+
+        chunks = []
+        for chunk in self._provider_stream(system_prompt, fitted):
+            chunks.append(chunk)
+            yield chunk
+        self._store(key, chunks)
+
+    def _prepare(self, system_prompt, messages):
+        """(FittedChat, response cache key, cached chunks or None) of a request."""
+        fitted = self.context.fit(system_prompt, messages, self.provider)
+        cache = self.response_cache
+        key = ResponseCache.response_key(self.provider, self.model_name, system_prompt, fitted.messages) if cache else None
+        return fitted, key, cache.get(key) if cache else None
+
+    def _store(self, key, chunks):
+        if self.response_cache and chunks:
+            self.response_cache.put(key, chunks)
+
+    def _not_configured_message(self):
+        return f"❌ 錯誤：未偵測到 {self.provider} API Key。請在側邊欄設定。"
+
+    def _error_message(self, error):
+        return f"❌ {self.provider} 對話發生錯誤：{str(error)}"
+
+    def cache_stats(self):
+        """Hit/miss counters of the response cache (see ChartCache.stats)."""
+        return self.response_cache.stats() if self.response_cache else None
 
+    def _provider_stream(self, system_prompt, fitted):
+        """Raw text chunks from the provider for a FittedChat; errors propagate."""
+        if self.provider == "Gemini":
+            chat = self._gemini_chat(system_prompt, fitted)
+            response = chat.send_message(fitted.messages[-1]["content"], stream=True)
+            for chunk in response:
+                if chunk.text:
+                    yield chunk.text
+
+        elif self.provider in ["Groq", "OpenAI", "OpenRouter"]:
+            completion = self.client.chat.completions.create(
+                model=self.model_name,
+                messages=self._chat_messages(system_prompt, fitted.messages),
+                stream=True,
+                **self._cache_hint(system_prompt, fitted),
+            )
+            for chunk in completion:
+                if chunk.choices and getattr(chunk.choices[0].delta, 'content', None):
+                    yield chunk.choices[0].delta.content
+
+    async def agenerate_chat_stream(self, system_prompt, messages):
+        """
+        asyncio version of generate_chat_stream (same cache, same chunks):
+        many sessions can stream concurrently from one event loop instead of
+        holding a thread each.
+        """
+        if not self.is_configured:
+            yield self._not_configured_message()
+            return
         try:
-            if self.provider == "Gemini":
-                # Gemini expects 'model' for assistant role
-                formatted_history = []
-                for m in messages[:-1]: # All but the last one
-                    formatted_history.append({
-                        "role": "user" if m["role"] == "user" else "model",
-                        "parts": [m["content"]]
-                    })
-                
-                model = genai.GenerativeModel(
-                    model_name=self.model_name,
-                    system_instruction=system_prompt
-                )
-                
-                chat = model.start_chat(history=formatted_history)
-                last_msg = messages[-1]["content"]
-                response = chat.send_message(last_msg, stream=True)
-                
-                for chunk in response:
-                    if chunk.text:
-                        yield chunk.text
-            
-            elif self.provider == "Groq":
-                # Build messages including system prompt
-                groq_messages = [{"role": "system", "content": system_prompt}]
-                for m in messages:
-                    groq_messages.append({"role": m["role"], "content": m["content"]})
-                    
-                completion = self.client.chat.completions.create(
-                    model=self.model_name,
-                    messages=groq_messages,
-                    stream=True,
-                )
-                for chunk in completion:
-                    if chunk.choices[0].delta.content:
-                        yield chunk.choices[0].delta.content
-            
-            elif self.provider in ["OpenAI", "OpenRouter"]:
-                # Build messages including system prompt
-                oai_messages = [{"role": "system", "content": system_prompt}]
-                for m in messages:
-                    oai_messages.append({"role": m["role"], "content": m["content"]})
-                    
-                completion = self.client.chat.completions.create(
-                    model=self.model_name,
-                    messages=oai_messages,
-                    stream=True,
-                )
-                for chunk in completion:
-                    if getattr(chunk.choices[0].delta, 'content', None):
+            async for chunk in self.astream(system_prompt, messages):
+                yield chunk
+        except Exception as e:
+            yield self._error_message(e)
+
+    async def astream(self, system_prompt, messages):
+        """
+        asyncio version of stream. Cache reads and writes (disk) run in a
+        worker thread so they never block the event loop.
+        """
+        fitted, key, cached = await asyncio.to_thread(self._prepare, system_prompt, messages)
+        if cached is not None:
+            for chunk in cached:
+                yield chunk
+            return
+
+        chunks = []
+        async for chunk in self._provider_stream_async(system_prompt, fitted):
+            chunks.append(chunk)
+            yield chunk
+        await asyncio.to_thread(self._store, key, chunks)
+
+    async def _provider_stream_async(self, system_prompt, fitted):
+        if self.provider == "Gemini":
+            # May create a Gemini context cache: a blocking network call
+            chat = await asyncio.to_thread(self._gemini_chat, system_prompt, fitted)
+            response = await chat.send_message_async(fitted.messages[-1]["content"], stream=True)
+            async for chunk in response:
+                if chunk.text:
+                    yield chunk.text
+
+        elif self.provider in ["Groq", "OpenAI", "OpenRouter"]:
+            completion = await self.async_client.chat.completions.create(
+                model=self.model_name,
+                messages=self._chat_messages(system_prompt, fitted.messages),
+                stream=True,
+                **self._cache_hint(system_prompt, fitted),
+            )
+            # Closes the HTTP response if the consumer is cancelled mid-stream
+            async with completion:
+                async for chunk in completion:
+                    if chunk.choices and getattr(chunk.choices[0].delta, 'content', None):
                         yield chunk.choices[0].delta.content
 
+    @staticmethod
+    def _chat_messages(system_prompt, messages):
+        """OpenAI-style message list including the system prompt."""
+        return [{"role": "system", "content": system_prompt}] + [
+            {"role": m["role"], "content": m["content"]} for m in messages
+        ]
 
-        except Exception as e:
-            yield f"❌ {self.provider} 對話發生錯誤：{str(e)}"
+    def _cache_hint(self, system_prompt, fitted):
+        """
+        OpenAI caches prompt prefixes automatically; prompt_cache_key routes
+        every turn of a conversation (same system prompt and chart message)
+        to the same cache. Other OpenAI-compatible APIs may reject the field.
+        Sent in the request body, so SDKs that predate the parameter pass it on.
+        """
+        if self.provider != "OpenAI" or not fitted.pinned:
+            return {}
+        return {"extra_body": {"prompt_cache_key": prefix_hash(system_prompt, fitted.messages[:1])[:32]}}
+
+    def _gemini_chat(self, system_prompt, fitted):
+        """
+        Gemini chat session holding all but the last message (Gemini expects
+        'model' for assistant role). When the pinned prefix is held in a
+        Gemini context cache, only the turns after it are sent.
+        """
+        messages = fitted.messages
+        pinned = min(fitted.pinned, len(messages) - 1)
+        cached = GeminiPrefixCache.default().get(self.api_key, self.model_name, system_prompt, messages[:pinned]) if pinned else None
+        if cached is not None:
+            model = genai.GenerativeModel.from_cached_content(cached_content=cached)
+            messages = messages[pinned:]
+        else:
+            model = genai.GenerativeModel(model_name=self.model_name, system_instruction=system_prompt)
+        history = [
+            {"role": "user" if m["role"] == "user" else "model", "parts": [m["content"]]}
+            for m in messages[:-1]
+        ]
+        return model.start_chat(history=history)
 
     def fetch_available_models(self):
         """
@@ -132,77 +240,93 @@ class AIAssistant:
             return self.get_model_list(self.provider)
 
         try:
-            if self.provider == "Gemini":
-                # List models and filter for chat-compatible ones
-                remote_models = []
-                for m in genai.list_models():
-                    if 'generateContent' in m.supported_generation_methods:
-                        # Strip 'models/' prefix if present
-                        name = m.name.replace('models/', '')
-                        remote_models.append(name)
-                
-                # Priority list to keep top models at the front
-                priority = ["gemini-2.0-flash-thinking-exp", "gemini-2.0-flash", "gemini-1.5-pro", "gemini-1.5-flash"]
-                top_models = [m for m in priority if m in remote_models]
-                other_models = [m for m in remote_models if m not in priority]
-                
-                # Filter out experimental/internal clutter if too many
-                final_list = top_models + [m for m in other_models if not m.startswith('aqa') and not m.startswith('text-')]
-                return final_list if final_list else self.get_model_list("Gemini")
+            return self._discover_models()
+        except Exception as e:
+            print(f"Error fetching models: {e}")
+            return self.get_model_list(self.provider)
 
-            elif self.provider == "Groq":
-                models_data = self.client.models.list()
-                remote_ids = [m.id for m in models_data.data]
-                
-                # Filter for main chat models (Llama, Mixtral, Gemma, Qwen)
-                keywords = ["llama", "mixtral", "gemma", "qwen"]
-                filtered = [mid for mid in remote_ids if any(k in mid.lower() for k in keywords)]
-                
-                # Priority: 8b-instant at front for stability during testing, then larger ones
-                priority = ["llama-3.1-8b-instant", "llama-3.3-70b-versatile", "llama-3.1-70b-versatile"]
-                top_models = [m for m in priority if m in filtered]
-                other_models = sorted([m for m in filtered if m not in priority])
-                
-                final_list = top_models + other_models
-                return final_list if final_list else self.get_model_list("Groq")
-                
-            elif self.provider in ["OpenAI", "OpenRouter"]:
-                models_data = self.client.models.list()
-                remote_ids = [m.id for m in models_data.data]
+    def available_models(self, catalog=None):
+        """
+        Model list for the sidebar from the shared ModelCatalog: returns at
+        once, with the recommended list until the first discovery for this
+        provider and key completes, and refreshes in the background.
+        """
+        if not self.is_configured:
+            return self.get_model_list(self.provider)
+        catalog = ModelCatalog.default() if catalog is None else catalog
+        return catalog.get(self.provider, self.api_key, self._discover_models, self.get_model_list(self.provider))
+
+    def _discover_models(self):
+        """Provider model listing behind fetch_available_models; errors propagate."""
+        if self.provider == "Gemini":
+            # List models and filter for chat-compatible ones
+            remote_models = []
+            with self.clients.gemini(self.api_key):
+                listed = list(genai.list_models())
+            for m in listed:
+                if 'generateContent' in m.supported_generation_methods:
+                    # Strip 'models/' prefix if present
+                    name = m.name.replace('models/', '')
+                    remote_models.append(name)
+            
+            # Priority list to keep top models at the front
+            priority = ["gemini-2.0-flash-thinking-exp", "gemini-2.0-flash", "gemini-1.5-pro", "gemini-1.5-flash"]
+            top_models = [m for m in priority if m in remote_models]
+            other_models = [m for m in remote_models if m not in priority]
+            
+            # Filter out experimental/internal clutter if too many
+            final_list = top_models + [m for m in other_models if not m.startswith('aqa') and not m.startswith('text-')]
+            return final_list if final_list else self.get_model_list("Gemini")
+
+        elif self.provider == "Groq":
+            models_data = self.client.models.list()
+            remote_ids = [m.id for m in models_data.data]
+            
+            # Filter for main chat models (Llama, Mixtral, Gemma, Qwen)
+            keywords = ["llama", "mixtral", "gemma", "qwen"]
+            filtered = [mid for mid in remote_ids if any(k in mid.lower() for k in keywords)]
+            
+            # Priority: 8b-instant at front for stability during testing, then larger ones
+            priority = ["llama-3.1-8b-instant", "llama-3.3-70b-versatile", "llama-3.1-70b-versatile"]
+            top_models = [m for m in priority if m in filtered]
+            other_models = sorted([m for m in filtered if m not in priority])
+            
+            final_list = top_models + other_models
+            return final_list if final_list else self.get_model_list("Groq")
+            
+        elif self.provider in ["OpenAI", "OpenRouter"]:
+            models_data = self.client.models.list()
+            remote_ids = [m.id for m in models_data.data]
+            
+            if self.provider == "OpenAI":
+                # Filter for gpt models and o1/o3 models
+                filtered = [mid for mid in remote_ids if "gpt" in mid.lower() or "o1" in mid.lower() or "o3" in mid.lower()]
+                priority = ["gpt-4o", "gpt-4-turbo", "gpt-3.5-turbo", "o1-preview", "o1-mini", "o3-mini"]
+                final_list = [m for m in priority if m in filtered] + sorted(m for m in filtered if m not in priority)
+            else:
+                # OpenRouter: Prioritize free models first, then mainstream ones
+                # 1. Extract all free models
+                free_models = [mid for mid in remote_ids if "free" in mid.lower()]
                 
-                if self.provider == "OpenAI":
-                    # Filter for gpt models and o1/o3 models
-                    filtered = [mid for mid in remote_ids if "gpt" in mid.lower() or "o1" in mid.lower() or "o3" in mid.lower()]
-                    priority = ["gpt-4o", "gpt-4-turbo", "gpt-3.5-turbo", "o1-preview", "o1-mini", "o3-mini"]
-                else:
-                    # OpenRouter: Prioritize free models first, then mainstream ones
-                    # 1. Extract all free models
-                    free_models = [mid for mid in remote_ids if "free" in mid.lower()]
-                    
-                    # 2. Extract mainstream paid models
-                    keywords = ["openai", "anthropic", "google", "meta"]
-                    mainstream = [mid for mid in remote_ids if any(k in mid.lower() for k in keywords) and "free" not in mid.lower()]
-                    
-                    priority = [
-                        "openai/gpt-4o",
-                        "anthropic/claude-3.5-sonnet",
-                        "google/gemini-1.5-pro",
-                        "meta-llama/llama-3.1-70b-instruct"
-                    ]
-
-                    top_mainstream = [m for m in priority if m in mainstream]
-                    other_mainstream = sorted([m for m in mainstream if m not in priority])
-                    
-                    # Free models ALWAYS go first
-                    final_list = sorted(free_models) + top_mainstream + other_mainstream
+                # 2. Extract mainstream paid models
+                keywords = ["openai", "anthropic", "google", "meta"]
+                mainstream = [mid for mid in remote_ids if any(k in mid.lower() for k in keywords) and "free" not in mid.lower()]
                 
-                return final_list if final_list else self.get_model_list(self.provider)
+                priority = [
+                    "openai/gpt-4o",
+                    "anthropic/claude-3.5-sonnet",
+                    "google/gemini-1.5-pro",
+                    "meta-llama/llama-3.1-70b-instruct"
+                ]
 
+                top_mainstream = [m for m in priority if m in mainstream]
+                other_mainstream = sorted([m for m in mainstream if m not in priority])
+                
+                # Free models ALWAYS go first
+                final_list = sorted(free_models) + top_mainstream + other_mainstream
+            
+            return final_list if final_list else self.get_model_list(self.provider)
 
-        except Exception as e:
-            print(f"Error fetching models: {e}")
-            return self.get_model_list(self.provider)
-        
         return self.get_model_list(self.provider)
 
     def get_model_list(self, provider):
@@ -1,19 +1,35 @@
 import streamlit as st
 import pandas as pd
 import os
+import io
+import itertools
 from datetime import datetime, date, timedelta, timezone
-from flatlib import const
 
 # Modular Imports
 from logic import AstrologyLogic
 from horary_prompt import HORARY_SYSTEM_PROMPT
 from natal_prompt import NATAL_SYSTEM_PROMPT
 from ai_logic import AIAssistant
+from hedged_ai import HedgedAssistant
+from model_catalog import ModelCatalog
+from prompt_logic import PromptLogic, count_tokens
+from chart_cache import ChartCache
+from report_logic import add_years
 
 import streamlit.components.v1 as components
 
-# Initialize Logic
-logic = AstrologyLogic()
+# Initialize Logic (one engine per process, shared by all sessions and reruns)
+@st.cache_resource
+def get_logic():
+    return AstrologyLogic()
+
+logic = get_logic()
+
+@st.cache_resource
+def get_chart_cache():
+    return ChartCache()
+
+chart_cache = get_chart_cache()
 
 st.set_page_config(page_title="古典占星命盤簡易排盤程式", layout="wide")
 
@@ -90,20 +106,12 @@ st.markdown("""
 """, unsafe_allow_html=True)
 
 # --- Session State Initialization ---
-if 'report_data' not in st.session_state:
-    st.session_state.report_data = None
-if 'report_md' not in st.session_state:
-    st.session_state.report_md = ""
+if 'report' not in st.session_state:
+    st.session_state.report = None
 if 'ai_analysis_triggered' not in st.session_state:
     st.session_state.ai_analysis_triggered = False
 if 'chat_history' not in st.session_state:
     st.session_state.chat_history = []
-if 'dynamic_models' not in st.session_state:
-    st.session_state.dynamic_models = []
-if 'last_key' not in st.session_state:
-    st.session_state.last_key = ""
-if 'last_provider' not in st.session_state:
-    st.session_state.last_provider = ""
 if 'chart_type' not in st.session_state:
     st.session_state.chart_type = "natal" # Default
 
@@ -129,11 +137,29 @@ except ValueError:
 st.sidebar.markdown("---")
 
 location_city = st.sidebar.text_input("輸入城市名稱", "台北市")
+if location_city.strip() and not logic.gazetteer.lookup(location_city):
+    city_suggestions = logic.suggest_locations(location_city)
+    if city_suggestions:
+        st.sidebar.caption("建議城市：" + "、".join(city_suggestions))
+
+# Offset in effect at the birth moment (DST and historical rules included)
+birth_local = datetime.combine(birth_date, birth_time)
+known_place = logic.gazetteer.lookup(location_city)
 
 with st.sidebar.expander("自行手動輸入經緯度與時區", expanded=False):
     manual_lon = st.number_input("經度 (Longitude)", value=121.50, format="%.2f")
     manual_lat = st.number_input("緯度 (Latitude)", value=25.03, format="%.2f")
-    utc_offset = st.number_input("時區偏移 (UTC Offset)", value=8.0, step=0.5)
+    if known_place and manual_lon == 121.50 and manual_lat == 25.03:
+        auto_tz = known_place.timezone
+    else:
+        auto_tz, _ = logic.get_timezone_info(manual_lat, manual_lon)
+    auto_offset = logic.get_utc_offset(auto_tz, birth_local) if auto_tz else 8.0
+    # Keyed on zone and moment so the field re-fills when either changes
+    utc_offset = st.number_input(
+        "時區偏移 (UTC Offset)", value=auto_offset, step=0.5,
+        key=f"utc_offset_{auto_tz}_{birth_local:%Y%m%d%H%M}",
+        help=f"已依 {auto_tz} 於出生時刻的時區規則自動帶入" if auto_tz else None
+    )
 
 @st.dialog("取得免費 API Key", width="large")
 def show_api_keys_dialog():
@@ -150,7 +176,8 @@ def show_api_keys_dialog():
 st.sidebar.markdown("---")
 st.sidebar.header("AI 設定 (不輸入也可排盤)")
 
-ai_provider = st.sidebar.selectbox("AI 供應商", ["Gemini", "Groq", "OpenAI", "OpenRouter"])
+AI_PROVIDERS = ["Gemini", "Groq", "OpenAI", "OpenRouter"]
+ai_provider = st.sidebar.selectbox("AI 供應商", AI_PROVIDERS)
 
 # Key label changes based on provider
 key_label = f"{ai_provider} API Key"
@@ -159,27 +186,33 @@ ai_api_key = st.sidebar.text_input(key_label, type="password", help=f"請輸入
 if st.sidebar.button("👉 點此查閱如何取得免費 API Key", type="tertiary", help="查看各大平台的免費 API Key 註冊教學"):
     show_api_keys_dialog()
 
-# Trigger dynamic model discovery if key or provider changed
-if (ai_api_key != st.session_state.get('last_key') or ai_provider != st.session_state.get('last_provider')):
-    st.session_state.last_key = ai_api_key
-    st.session_state.last_provider = ai_provider
-    # Initialize a temp assistant to fetch models
-    with st.sidebar:
-        with st.spinner("🔍 正在探索可用模型..."):
-            temp_assistant = AIAssistant(provider=ai_provider, api_key=ai_api_key)
-            st.session_state.dynamic_models = temp_assistant.fetch_available_models()
-    st.rerun()
-
-# Default fallback if discovery failed or key empty
-if not st.session_state.dynamic_models:
-    temp_assistant = AIAssistant(provider=ai_provider)
-    st.session_state.dynamic_models = temp_assistant.get_model_list(ai_provider)
-
-ai_model = st.sidebar.selectbox("AI 模型", st.session_state.dynamic_models)
+# Model lists come from the shared catalog: shown at once, discovered and refreshed in the background
+catalog_assistant = AIAssistant(provider=ai_provider, api_key=ai_api_key)
+ai_model = st.sidebar.selectbox("AI 模型", catalog_assistant.available_models())
+if catalog_assistant.is_configured and ModelCatalog.default().is_refreshing(ai_provider, catalog_assistant.api_key):
+    st.sidebar.caption("🔍 正在背景更新可用模型清單...")
 
 # Initialize AI Assistant with correct parameters
 ai_assistant = AIAssistant(provider=ai_provider, api_key=ai_api_key, model_name=ai_model)
 
+# Optional backup provider: asked as well when the first token is slow to arrive
+backup_provider = st.sidebar.selectbox(
+    "備援供應商", ["無"] + [p for p in AI_PROVIDERS if p != ai_provider],
+    help="主要供應商遲遲沒有回應時，同時詢問備援供應商，並採用先回應的一方"
+)
+if backup_provider != "無":
+    backup_key = st.sidebar.text_input(f"{backup_provider} API Key (備援)", type="password")
+    backup_assistant = AIAssistant(provider=backup_provider, api_key=backup_key)
+    if backup_assistant.is_configured:
+        ai_assistant = HedgedAssistant(ai_assistant, backup_assistant)
+        st.sidebar.caption(f"首字超過 {ai_assistant.hedge_delay():.1f} 秒未回應時啟用備援")
+    else:
+        st.sidebar.caption(f"未偵測到 {backup_provider} API Key，備援未啟用")
+
+response_stats = ai_assistant.cache_stats()
+if response_stats and response_stats['hits'] + response_stats['misses']:
+    st.sidebar.caption(f"AI 回應快取：命中 {response_stats['hits']} 次 (命中率 {response_stats['hit_rate']:.0%})")
+
 st.sidebar.markdown("---")
 # Buttons for calculation
 col1, col2 = st.sidebar.columns(2)
@@ -203,9 +236,14 @@ if generate_btn or horary_btn:
         # Resolve location for the chart (essential for Houses)
         final_lat, final_lon = manual_lat, manual_lon
         if manual_lon == 121.50 and manual_lat == 25.03 and location_city != "台北市":
-            coords = logic.get_location_coordinates(location_city)
-            if coords:
-                final_lat, final_lon = coords
+            place = logic.resolve_location(location_city)
+            if place:
+                final_lat, final_lon = place['lat'], place['lon']
+                # Places found only by the remote geocoder were not auto-filled in the sidebar
+                if place['timezone'] is None and utc_offset == auto_offset:
+                    _, geo_offset = logic.get_timezone_info(final_lat, final_lon, birth_local)
+                    if geo_offset is not None:
+                        utc_offset = geo_offset
             else:
                 if not horary_btn: # For regular chart, show warning if city search fails
                     st.sidebar.warning("⚠️ 自動地點檢索暫時無法連線，請手動展開下方進階選項輸入經緯度。")
@@ -216,155 +254,36 @@ if generate_btn or horary_btn:
         
         sign = '+' if utc_offset >= 0 else '-'
         abs_offset = abs(utc_offset)
-        h, m = int(abs_offset), int((abs_offset - int(abs_offset)) * 60)
+        h, m = int(abs_offset), int(round((abs_offset - int(abs_offset)) * 60))
         offset_str = f"{sign}{h:02d}:{m:02d}"
         
-        from flatlib.datetime import Datetime
-        from flatlib.geopos import GeoPos
-        from flatlib.chart import Chart
-        
-        dt = Datetime(birth_date_str, birth_time_str, offset_str)
-        pos = GeoPos(final_lat, final_lon)
-        chart = Chart(dt, pos)
-        
-        # Calculations
-        asc = chart.get(const.ASC)
-        asc_sign = logic.TRANS_SIGNS.get(asc.sign, asc.sign)
-        asc_deg, asc_min, _ = logic.degree_to_dms(asc.lon % 30)
-        
-        sun_p = chart.get(const.SUN)
-        moon_p = chart.get(const.MOON)
-        sun_sign = logic.TRANS_SIGNS.get(sun_p.sign, sun_p.sign)
-        moon_sign = logic.TRANS_SIGNS.get(moon_p.sign, moon_p.sign)
-        sun_deg, sun_min, _ = logic.degree_to_dms(sun_p.lon % 30)
-        moon_deg, moon_min, _ = logic.degree_to_dms(moon_p.lon % 30)
-
-        houses = logic.calculate_equal_houses(asc.lon)
-        planets_data = logic.get_planets_data(chart, houses)
-
         # Determine target date for progressions and time lords based on system time
         target_date = datetime.now().date()
 
-        prof_info = logic.calculate_profections(chart, houses, birth_date_str, current_date=target_date)
-        aspects = logic.get_aspects(chart)
-        is_day = logic.is_day_birth(chart, houses)
-        f_data = logic.get_firdaria_data(birth_date_str, is_day, current_date=target_date)
-        lots = logic.calculate_lots(chart, houses, is_day)
-        fixed_stars = logic.get_fixed_stars(chart)
-
-        # Build Markdown Report
-        title_map = {'natal': '古典占星本命盤完整資料', 'horary': '古典占星卜卦盤解析資料'}
-        current_title = title_map.get(st.session_state.chart_type, '古典占星命盤資料')
-        
-        md = f"# {current_title} (升級版)\n\n"
-        md += f"產出時間：{datetime.now().strftime('%Y/%m/%d %H:%M:%S')}\n\n"
-        md += "---\n\n"
-        md += "## 出生資訊\n\n"
-        md += f"- 生日：{birth_date_str} {birth_time_str}\n"
-        md += f"- 地點：{location_city} ({final_lat:.2f}N, {final_lon:.2f}E)\n"
-        md += f"- 上升星座：{asc_sign} {asc_deg}°{asc_min}'\n"
-        md += f"- 太陽星座：{sun_sign} {sun_deg}°{sun_min}'\n"
-        md += f"- 月亮星座：{moon_sign} {moon_deg}°{moon_min}'\n\n"
-        
-        md += "## 行星狀態與本質力量\n\n"
-        for p in planets_data:
-            d = p['dignity']
-            d_str = ", ".join(d['list']) if d['list'] else "無 (Peregrine)"
-            acc_str = ", ".join(p['accidental'])
-            md += f"### {p['symbol']} {p['name']}\n"
-            md += f"- 位置：{p['sign']} {p['degree_str']} {p['retro']} | [{p['house']}]\n"
-            md += f"- 本質力量：{d_str} (總分: {d['score']})\n"
-            md += f"- 後天狀態：{acc_str}\n\n"
-        
-        md += "## 特殊點位與恆星\n\n"
-        for lot in lots:
-            md += f"- {lot['name']}：{lot['sign']} {lot['degree']} ({lot['house']})\n"
-        for star in fixed_stars:
-            md += f"- 恆星合相：{star['planet']} 合相 {star['star']} (誤差 {star['orb']})\n"
-        md += "\n"
-
-        md += "## 宮位資料\n\n"
-        for h in houses:
-            h_deg, h_min, _ = logic.degree_to_dms(h['degree'])
-            md += f"- {h['id_str']}：{h['sign']} {h_deg}°{h_min}' (主：{h['ruler']})\n"
-        md += "\n"
-        
-        md += "## 相位與接納\n\n"
-        if aspects:
-            for a in aspects:
-                rec = f" | 接納：{a['reception']}" if a['reception'] else ""
-                md += f"- {a['p1']} - {a['p2']}：{a['aspect']} (誤差 {a['orb']}){rec}\n"
-        else:
-            md += "無顯著相位。\n"
-        md += "\n"
-        
-        if st.session_state.chart_type == 'natal':
-            md += "## 推運資訊\n\n"
-            md += f"- 小限分限：{prof_info.get('prof_sign')} (第 {prof_info.get('prof_house_num')} 宮)\n"
-            md += f"- 當前年主星：{prof_info.get('lord_of_year')}\n\n"
-            
-            md += "### 未來 5 年小限主星預告\n"
-            md += "| 預測西元年 | 年齡 | 小限宮位 | 年度主星 |\n"
-            md += "|----------|------|----------|----------|\n"
-            for i in range(1, 6):
-                future_year = target_date.year + i
-                try:
-                    future_date = target_date.replace(year=future_year)
-                except ValueError:
-                    future_date = target_date.replace(year=future_year, day=28)
-                fw_prof = logic.calculate_profections(chart, houses, birth_date_str, current_date=future_date)
-                md += f"| {future_year} 年 | {fw_prof.get('age')} 歲 | {fw_prof.get('prof_sign')} (第 {fw_prof.get('prof_house_num')} 宮) | {fw_prof.get('lord_of_year')} |\n"
-            md += "\n"
-            
-            act = f_data['active']
-            m_n = logic.TRANS_PLANETS.get(act['major'], act['major'])
-            mi_n = logic.TRANS_PLANETS.get(act['minor'], act['minor'])
-            md += f"- 法達當前大運：{m_n}\n"
-            md += f"- 法達當前小運：{mi_n}\n"
-            md += f"- 下次換運日期：{act['end'].strftime('%Y/%m/%d')}\n\n"
-
-            md += "### 完整法達星限時間表\n"
-            md += "| 大運 | 小運 | 開始日期 | 結束日期 |\n"
-            md += "|------|------|----------|----------|\n"
-            for major in f_data['timeline']:
-                for minor in major['subs']:
-                    major_name = logic.TRANS_PLANETS.get(major['lord'], major['lord'])
-                    minor_name = logic.TRANS_PLANETS.get(minor['minor'], minor['minor'])
-                    start_str = minor['start'].strftime('%Y/%m/%d')
-                    end_str = minor['end'].strftime('%Y/%m/%d')
-                    md += f"| {major_name} | {minor_name} | {start_str} | {end_str} |\n"
-            md += "\n"
-
-        md += "---\n\n"
-        md += "## 🤖 AI 自動解析已就緒\n"
-        report_type = "本命盤" if st.session_state.chart_type == 'natal' else "卜卦占星盤"
-        md += f"目前的分析模式為：**{report_type}**。請點擊側邊欄的「🚀 啟動 AI 深度解析」開始互動。\n\n"
-
-
-
-        st.session_state.report_md = md
-        st.session_state.report_data = {
-            'asc': f"{asc_sign} {asc_deg}°{asc_min}'",
-            'sun': f"{sun_sign} {sun_deg}°{sun_min}'",
-            'moon': f"{moon_sign} {moon_deg}°{moon_min}'",
-            'planets': planets_data,
-            'houses': houses,
-            'aspects': aspects,
-            'prof_info': prof_info,
-            'f_data': f_data,
-            'is_day': is_day,
-            'lots': lots,
-            'fixed_stars': fixed_stars
-        }
+        # Reuse a previously computed report for the same moment, place and settings
+        cache_key = logic.reports.report_key(
+            st.session_state.chart_type, birth_date_str, birth_time_str, utc_offset,
+            final_lat, final_lon, location_city, target_date
+        )
+        st.session_state.report = chart_cache.get_or_compute(cache_key, lambda: logic.build_report(
+            st.session_state.chart_type, birth_date_str, birth_time_str, offset_str,
+            final_lat, final_lon, location_city, target_date, key=cache_key
+        ))
     except Exception as e:
         st.error(f"分析錯誤: {str(e)}")
 
 # --- AI Integration Processing (Specialized Modules) ---
-if st.session_state.report_data and ai_assistant.is_configured:
+if st.session_state.report and ai_assistant.is_configured:
     with st.sidebar:
         st.markdown("---")
         st.subheader("🤖 AI 自動解析")
-        
+        prompt_budget = st.select_slider(
+            "命盤資料長度上限 (tokens)", options=[600, 900, 1200, 2000, 4000], value=PromptLogic.DEFAULT_BUDGET,
+            help="超過上限時依序省略行運、未來法達、希臘點等較次要的段落"
+        )
+        chart_prompt = logic.reports.prompt(st.session_state.report, ai_provider, prompt_budget)
+        st.caption(f"命盤資料約 {count_tokens(chart_prompt, ai_provider)} tokens")
+
         if st.session_state.chart_type == 'horary':
             # --- Specialized Horary AI Module ---
             horary_question = st.text_input("📌 請輸入您想占卜的問題：", help="例如：我會不會順利錄取這份工作？")
@@ -375,9 +294,8 @@ if st.session_state.report_data and ai_assistant.is_configured:
                 question_block = f"\n\n--- 用戶想占卜的問題 (非常重要) ---\n問題內容：{horary_question}\n" if horary_question.strip() else ""
                 
                 initial_user_msg = (
-                    f"{HORARY_SYSTEM_PROMPT}\n\n"
                     "--- 以下是卜卦星盤數據 ---\n\n"
-                    f"{st.session_state.report_md}"
+                    f"{chart_prompt}"
                     f"{question_block}"
                 )
                 st.session_state.chat_history = [{"role": "user", "content": initial_user_msg}]
@@ -386,15 +304,16 @@ if st.session_state.report_data and ai_assistant.is_configured:
             if st.button("🚀 啟動本命盤 AI 大師深度解析", use_container_width=True, type="primary"):
                 st.session_state.ai_analysis_triggered = True
                 initial_user_msg = (
-                    f"{NATAL_SYSTEM_PROMPT}\n\n"
                     "--- 以下是本命星盤數據 ---\n\n"
-                    f"{st.session_state.report_md}"
+                    f"{chart_prompt}"
                 )
                 st.session_state.chat_history = [{"role": "user", "content": initial_user_msg}]
 
 # --- UI Layout ---
-if st.session_state.report_data:
-    d = st.session_state.report_data
+if st.session_state.report:
+    d = st.session_state.report
+    # Display tables are rendered once per chart and shared across reruns
+    tables = logic.reports.tables(d)
     ui_title_map = {'natal': '古典占星本命盤資訊', 'horary': '古典占星卜卦盤資訊'}
     ui_title = ui_title_map.get(st.session_state.chart_type, '古典占星論命資訊')
     
@@ -403,11 +322,11 @@ if st.session_state.report_data:
     
     sc1, sc2, sc3 = st.columns(3)
     with sc1:
-        st.markdown(f"<div class='summary-card'><div class='summary-title'>太陽星座</div><div class='summary-value'>{d['sun']}</div></div>", unsafe_allow_html=True)
+        st.markdown(f"<div class='summary-card'><div class='summary-title'>太陽星座</div><div class='summary-value'>{d.sun}</div></div>", unsafe_allow_html=True)
     with sc2:
-        st.markdown(f"<div class='summary-card'><div class='summary-title'>月亮星座</div><div class='summary-value'>{d['moon']}</div></div>", unsafe_allow_html=True)
+        st.markdown(f"<div class='summary-card'><div class='summary-title'>月亮星座</div><div class='summary-value'>{d.moon}</div></div>", unsafe_allow_html=True)
     with sc3:
-        st.markdown(f"<div class='summary-card'><div class='summary-title'>上升星座</div><div class='summary-value'>{d['asc']}</div></div>", unsafe_allow_html=True)
+        st.markdown(f"<div class='summary-card'><div class='summary-title'>上升星座</div><div class='summary-value'>{d.asc}</div></div>", unsafe_allow_html=True)
     
     # --- UI Layout ---
     # Define tabs dynamically
@@ -419,39 +338,28 @@ if st.session_state.report_data:
     
     # Tab 1: Planets
     with all_tabs[0]:
+        # Drawn from the report itself and memoized per chart
+        wc1, wc2, wc3 = st.columns([1, 2, 1])
+        with wc2:
+            st.image(logic.reports.svg(d))
+
         st.markdown("<div class='stContainer'>", unsafe_allow_html=True)
         st.subheader("行星本質與後天狀態")
         
-        rows = []
-        for p in d['planets']:
-            dig = p['dignity']
-            rows.append({
-                '行星': f"{p['symbol']} {p['name']}",
-                '位置': f"{p['sign']} {p['degree_str']} {p['retro']}",
-                '宮位': p['house'],
-                '本質力量': ", ".join(dig['list']) if dig['list'] else "無 (Peregrine)",
-                '計分': dig['score'],
-                '後天狀態': ", ".join(p['accidental'])
-            })
-        st.table(pd.DataFrame(rows))
+        st.table(pd.DataFrame(tables['planets'][1], columns=tables['planets'][0]))
         st.markdown("</div>", unsafe_allow_html=True)
         
         st.markdown("<div class='stContainer'>", unsafe_allow_html=True)
         st.subheader("十二宮位表")
-        df_h = pd.DataFrame(d['houses'])
-        df_h_disp = df_h[['id_str', 'sign', 'ruler']].copy()
-        df_h_disp.columns = ['宮位名稱', '對應星座', '宮位主星']
-        st.table(df_h_disp)
+        st.table(pd.DataFrame(tables['houses'][1], columns=tables['houses'][0]))
         st.markdown("</div>", unsafe_allow_html=True)
 
     # Tab 2: Aspects
     with all_tabs[1]:
         st.markdown("<div class='stContainer'>", unsafe_allow_html=True)
         st.subheader("行星相位與接納關係")
-        if d['aspects']:
-            df_a = pd.DataFrame(d['aspects'])
-            df_a.columns = ['行星 1', '行星 2', '相位類型', '誤差', '接納關係']
-            st.table(df_a)
+        if d.aspects:
+            st.table(pd.DataFrame(tables['aspects'][1], columns=tables['aspects'][0]))
         else:
             st.write("目前無顯著相位。")
         st.markdown("</div>", unsafe_allow_html=True)
@@ -460,17 +368,13 @@ if st.session_state.report_data:
     with all_tabs[2]:
         st.markdown("<div class='stContainer'>", unsafe_allow_html=True)
         st.subheader("希臘點 (Lots)")
-        df_l = pd.DataFrame(d['lots'])
-        df_l.columns = ['點位名稱', '星座', '度數', '宮位']
-        st.table(df_l)
+        st.table(pd.DataFrame(tables['lots'][1], columns=tables['lots'][0]))
         st.markdown("</div>", unsafe_allow_html=True)
         
         st.markdown("<div class='stContainer'>", unsafe_allow_html=True)
         st.subheader("重要恆星合相 (Fixed Stars)")
-        if d['fixed_stars']:
-            df_s = pd.DataFrame(d['fixed_stars'])
-            df_s.columns = ['行星', '恆星', '誤差']
-            st.table(df_s)
+        if d.fixed_stars:
+            st.table(pd.DataFrame(tables['fixed_stars'][1], columns=tables['fixed_stars'][0]))
         else:
             st.write("目前無行星與重要恆星合相。")
         st.markdown("</div>", unsafe_allow_html=True)
@@ -479,27 +383,53 @@ if st.session_state.report_data:
     with all_tabs[3]:
         st.markdown("<div class='stContainer'>", unsafe_allow_html=True)
         st.subheader("推運資訊摘要")
-        pi = d['prof_info']
+        pi = d.prof_info
         st.write(f"當前年齡：{pi.get('age')} 歲")
         st.write(f"小限走到：{pi.get('prof_sign')} (第 {pi.get('prof_house_num')} 宮)")
         st.write(f"年度主星：{pi.get('lord_of_year')}")
+        if d.lifetime_prof:
+            with st.expander("查看完整小限年表 (0–89 歲)"):
+                st.table(pd.DataFrame(tables['lifetime_prof'][1], columns=tables['lifetime_prof'][0]))
         st.markdown("---")
         
         st.subheader("法達大限 (Firdaria) 時間表")
-        act = d['f_data']['active']
-        st.info(f"**當前大運**：{logic.TRANS_PLANETS.get(act['major'], act['major'])} | **當前小運**：{logic.TRANS_PLANETS.get(act['minor'], act['minor'])} (直到 {act['end'].strftime('%Y/%m/%d')})")
+        act = d.f_data['active']
+        if act['major'] is not None:
+            st.info(f"**當前大運**：{logic.TRANS_PLANETS.get(act['major'], act['major'])} | **當前小運**：{logic.TRANS_PLANETS.get(act['minor'], act['minor'])} (直到 {act['end'].strftime('%Y/%m/%d')})")
+        else:
+            st.info("目前日期不在法達星限的 75 年週期內。")
         
         with st.expander("查看完整法達星限時間表"):
-            f_rows = []
-            for major in d['f_data']['timeline']:
-                for minor in major['subs']:
-                    f_rows.append({
-                        '大運': logic.TRANS_PLANETS.get(major['lord'], major['lord']),
-                        '小運': logic.TRANS_PLANETS.get(minor['minor'], minor['minor']),
-                        '開始日期': minor['start'].strftime('%Y/%m/%d'),
-                        '結束日期': minor['end'].strftime('%Y/%m/%d')
-                    })
-            st.table(pd.DataFrame(f_rows))
+            st.table(pd.DataFrame(tables['firdaria'][1], columns=tables['firdaria'][0]))
+
+        if d.natal_points:
+            with st.expander("時間主星事件曆 (小限 / 法達 / 行運)"):
+                cal_start = st.date_input("起始日期", value=date.today(), key="calendar_start")
+                cal_monthly = st.checkbox("包含小限月", value=False, key="calendar_monthly")
+                cal_args = (d.birth_date, d.houses[0]['lon'], d.is_day, cal_start)
+                # Lazy stream: only the first page of events is ever computed
+                page = list(itertools.islice(
+                    logic.time_lord_events(*cal_args, natal=d.natal_points, monthly=cal_monthly), 60
+                ))
+                if page:
+                    df_c = pd.DataFrame(page)
+                    df_c.columns = ['時間', '系統', '事件']
+                    st.table(df_c)
+                # The year of events is built once per chart and settings, not on every rerun
+                csv_key = (d.key, cal_start, cal_monthly)
+                if st.session_state.get('calendar_csv', (None,))[0] != csv_key:
+                    buf = io.StringIO()
+                    logic.calendar.export_csv(
+                        logic.time_lord_events(*cal_args, end=add_years(cal_start, 1), natal=d.natal_points, monthly=cal_monthly),
+                        buf
+                    )
+                    st.session_state.calendar_csv = (csv_key, buf.getvalue().encode('utf-8-sig'))
+                st.download_button("下載一年事件曆 (CSV)", st.session_state.calendar_csv[1],
+                                   file_name=f"time_lords_{cal_start:%Y%m%d}.csv", mime="text/csv")
+
+        if d.transits:
+            with st.expander("未來 12 個月行運 (Transits)"):
+                st.table(pd.DataFrame(tables['transits'][1], columns=tables['transits'][0]))
         st.markdown("</div>", unsafe_allow_html=True)
 
     # Tab 5: AI Analysis (Dynamic Chat)
@@ -559,13 +489,21 @@ if st.session_state.report_data:
     with st.sidebar:
         st.markdown("---")
         st.subheader("下載文字版本命盤資訊")
+        report_name = f"Chart_Report_{datetime.now().strftime('%Y%m%d')}"
         st.download_button(
             label="點擊下載",
-            data=st.session_state.report_md,
-            file_name=f"Chart_Report_{datetime.now().strftime('%Y%m%d')}.md",
+            data=logic.reports.markdown(d),
+            file_name=f"{report_name}.md",
             mime="text/markdown",
             use_container_width=True
         )
+        dl1, dl2 = st.columns(2)
+        with dl1:
+            st.download_button("HTML", logic.reports.html(d), file_name=f"{report_name}.html",
+                               mime="text/html", use_container_width=True)
+        with dl2:
+            st.download_button("JSON", logic.reports.to_json(d), file_name=f"{report_name}.json",
+                               mime="application/json", use_container_width=True)
 
 else:
     st.markdown("<br><br><div style='text-align: center;'>", unsafe_allow_html=True)
@@ -0,0 +1,152 @@
+from datetime import datetime, timedelta
+
+import swisseph as swe
+from flatlib import const
+
+from ephemeris import init_ephemeris
+
+SWE_BODIES = {
+    const.SUN: swe.SUN, const.MOON: swe.MOON, const.MERCURY: swe.MERCURY,
+    const.VENUS: swe.VENUS, const.MARS: swe.MARS, const.JUPITER: swe.JUPITER,
+    const.SATURN: swe.SATURN
+}
+
+JD_UNIX_EPOCH = 2440587.5
+
+
+def jd_to_datetime(jd):
+    """UT Julian day -> naive UTC datetime (to the second)."""
+    return datetime(1970, 1, 1) + timedelta(seconds=round((jd - JD_UNIX_EPOCH) * 86400.0))
+
+
+def _wrap180(x):
+    return (x + 180.0) % 360.0 - 180.0
+
+
+# Upper bounds of |longitude speed| in degrees/day, used to size grid steps
+MAX_SPEEDS = {
+    const.SUN: 1.02, const.MOON: 15.4, const.MERCURY: 2.2, const.VENUS: 1.26,
+    const.MARS: 0.8, const.JUPITER: 0.25, const.SATURN: 0.13
+}
+
+
+def _build_grid():
+    """Offsets in days: fine near the chart moment, then 2-day and 8-day steps to ~2 years."""
+    offsets = [0.125, 0.25, 0.5, 1.0, 2.0]
+    offsets += [float(d) for d in range(4, 31, 2)]
+    offsets += [float(d) for d in range(38, 731, 8)]
+    return offsets
+
+
+class EphemerisSampler:
+    """
+    Memoized body positions. Every aspect of a chart walks the same time
+    grid, so a (moment, body) pair is computed at most once per run.
+    """
+
+    def __init__(self):
+        self.calls = 0
+        self._cache = {}
+
+    def position(self, jd, body):
+        """(lon, speed) of one body at jd."""
+        key = (jd, body)
+        res = self._cache.get(key)
+        if res is None:
+            self.calls += 1
+            xx = swe.calc_ut(jd, SWE_BODIES[body])[0]
+            res = self._cache[key] = (xx[0], xx[3])
+        return res
+
+
+class AspectTimingLogic:
+    # Bracketing grid (days from the chart moment), shared by every aspect
+    GRID_OFFSETS = _build_grid()
+    # Largest change of separation allowed between grid samples, so that a
+    # crossing of the exact angle can never be confused with a wrap-around
+    MAX_STEP_DEGREES = 60.0
+    # Refinement stops at ~1 second or after MAX_ITER evaluations per aspect
+    TOLERANCE_DAYS = 1.0 / 86400.0
+    MAX_ITER = 40
+
+    def __init__(self):
+        init_ephemeris()
+        self.last_calc_calls = 0
+
+    def max_calc_calls(self, n_bodies, n_aspects):
+        """Upper bound on swe.calc_ut calls made by one time_aspects() run."""
+        return n_bodies * (2 * len(self.GRID_OFFSETS) + 1) + n_aspects * 2 * self.MAX_ITER
+
+    def time_aspects(self, jd, ids, records, angles):
+        """
+        Applying/separating status and perfection moment for each aspect record.
+        ids: point ids indexed by the records' i/j; angles: exact angle of each
+        record. Points that are not planets (lots, angles, stars) get status None.
+        Returns a list aligned with records of
+        {'status', 'perfect_jd', 'perfect_utc'}: the next perfection for an
+        applying aspect, the last one for a separating aspect, None if it is
+        not within the search horizon (about two years; a few weeks for the Moon).
+        """
+        sampler = EphemerisSampler()
+        results = []
+        for rec, angle in zip(records, angles):
+            b1, b2 = ids[rec['i']], ids[rec['j']]
+            if b1 not in SWE_BODIES or b2 not in SWE_BODIES:
+                results.append({'status': None, 'perfect_jd': None, 'perfect_utc': None})
+                continue
+            results.append(self._time_one(sampler, jd, b1, b2, angle))
+        self.last_calc_calls = sampler.calls
+        return results
+
+    def _time_one(self, sampler, jd, b1, b2, angle):
+        (lon1, spd1), (lon2, spd2) = sampler.position(jd, b1), sampler.position(jd, b2)
+        delta = _wrap180(lon2 - lon1)
+        # Perfect when the signed separation reaches the target on the current side
+        target = angle if angle in (0, 180) or delta >= 0 else -angle
+
+        def f(t):
+            return _wrap180(sampler.position(t, b2)[0] - sampler.position(t, b1)[0] - target)
+
+        f0 = f(jd)
+        applying = f0 == 0 or f0 * (spd2 - spd1) < 0
+        direction = 1 if applying else -1
+        max_step = self.MAX_STEP_DEGREES / (MAX_SPEEDS[b1] + MAX_SPEEDS[b2])
+
+        # Walk the shared grid until the separation crosses the target
+        perfect_jd = jd if f0 == 0 else None
+        t_prev, f_prev, prev_offset = jd, f0, 0.0
+        for offset in self.GRID_OFFSETS:
+            if perfect_jd is not None or offset - prev_offset > max_step:
+                break
+            t = jd + direction * offset
+            ft = f(t)
+            # A jump through ±180 is a wrap-around, not a crossing
+            if f_prev * ft <= 0 and abs(f_prev - ft) < 180:
+                perfect_jd = self._refine(f, t_prev, t, f_prev, ft)
+            t_prev, f_prev, prev_offset = t, ft, offset
+
+        return {
+            'status': 'applying' if applying else 'separating',
+            'perfect_jd': perfect_jd,
+            'perfect_utc': jd_to_datetime(perfect_jd) if perfect_jd is not None else None,
+        }
+
+    def _refine(self, f, a, b, fa, fb):
+        """Illinois (modified regula falsi) root finder on a sign-change bracket."""
+        if fa == 0:
+            return a
+        if fb == 0:
+            return b
+        c = b
+        for _ in range(self.MAX_ITER):
+            c_prev = c
+            c = b - fb * (b - a) / (fb - fa)
+            fc = f(c)
+            if abs(fc) < 1e-7 or abs(c - c_prev) < self.TOLERANCE_DAYS:
+                return c
+            if fc * fb < 0:
+                a, fa = b, fb
+            else:
+                fa /= 2.0
+            b, fb = c, fc
+        return c
@@ -1,46 +1,142 @@
+import numpy as np
 from flatlib import const
 from dignities_logic import DignitiesLogic
+from aspect_timing_logic import AspectTimingLogic
 
 class AspectsLogic:
+    # Ptolemaic aspects; the record field `aspect` indexes this list
+    ASPECTS = [(0, 'Conjunction'), (60, 'Sextile'), (90, 'Square'), (120, 'Trine'), (180, 'Opposition')]
+
+    # Orb for points without an entry in ORBS (lots, angles, nodes, stars...)
+    DEFAULT_ORB = 3.0
+
+    RECORD_DTYPE = np.dtype([('i', np.int32), ('j', np.int32), ('aspect', np.int8), ('orb', np.float64)])
+
+    TRANS_PHASES = {'applying': '入相位 (Applying)', 'separating': '離相位 (Separating)'}
+
     def __init__(self):
         self.dignities = DignitiesLogic()
+        self.timing = AspectTimingLogic()
         self.ORBS = {
             const.SUN: 15.0, const.MOON: 12.0, const.MERCURY: 7.0,
             const.VENUS: 7.0, const.MARS: 8.0, const.JUPITER: 9.0,
             const.SATURN: 9.0
         }
 
-    def get_aspects(self, chart, trans_planets, planet_glyphs, trans_aspects):
-        """Calculates major aspects using classical orbs."""
+    def orb_matrix(self, ids, orbs=None):
+        """
+        Pairwise orb matrix for a list of point ids: the mean of both points'
+        orbs, as in classical moieties. `orbs` overrides ORBS per id.
+        """
+        table = dict(self.ORBS, **(orbs or {}))
+        per_point = np.array([table.get(p_id, self.DEFAULT_ORB) for p_id in ids], dtype=np.float64)
+        return (per_point[:, None] + per_point[None, :]) / 2.0
+
+    def find_aspects(self, lons, orb_matrix):
+        """
+        Finds every aspect among n points by sort-and-sweep over the circle.
+        For each aspect angle, each point's partner window is located with a
+        binary search in the sorted longitudes, so the cost is
+        O(n log n + candidates) instead of testing all n² pairs.
+
+        lons: (n,) longitudes; orb_matrix: (n, n) allowed orbs.
+        Returns a RECORD_DTYPE array (i < j are input indices, aspect indexes
+        ASPECTS) sorted by (i, j, aspect).
+        """
+        lons = np.asarray(lons, dtype=np.float64) % 360.0
+        orb_matrix = np.asarray(orb_matrix, dtype=np.float64)
+        n = lons.shape[0]
+        if n < 2:
+            return np.zeros(0, dtype=self.RECORD_DTYPE)
+
+        order = np.argsort(lons, kind='stable')
+        ordered = lons[order]
+        # Three laps of the circle so every window is contiguous
+        ext = np.concatenate([ordered - 360.0, ordered, ordered + 360.0])
+        ext_idx = np.concatenate([order, order, order])
+        width = float(orb_matrix.max())
+
+        found_i, found_j, found_a = [], [], []
+        for a_idx, (angle, _) in enumerate(self.ASPECTS):
+            target = ordered + angle
+            lo = np.searchsorted(ext, target - width, side='left')
+            hi = np.searchsorted(ext, target + width, side='right')
+            counts = hi - lo
+            total = int(counts.sum())
+            if total == 0:
+                continue
+            starts = np.repeat(lo, counts)
+            offsets = np.arange(total) - np.repeat(np.cumsum(counts) - counts, counts)
+            i_pts = np.repeat(order, counts)
+            j_pts = ext_idx[starts + offsets]
+            keep = i_pts != j_pts
+            found_i.append(np.minimum(i_pts[keep], j_pts[keep]))
+            found_j.append(np.maximum(i_pts[keep], j_pts[keep]))
+            found_a.append(np.full(int(keep.sum()), a_idx, dtype=np.int8))
+
+        if not found_i:
+            return np.zeros(0, dtype=self.RECORD_DTYPE)
+        cand = np.zeros(sum(len(x) for x in found_i), dtype=self.RECORD_DTYPE)
+        cand['i'] = np.concatenate(found_i)
+        cand['j'] = np.concatenate(found_j)
+        cand['aspect'] = np.concatenate(found_a)
+        # Each pair can be reached from both ends of the window (orb is still 0 here)
+        cand = np.unique(cand)
+
+        diff = np.abs(lons[cand['i']] - lons[cand['j']])
+        diff = np.where(diff > 180.0, 360.0 - diff, diff)
+        angles = np.array([a for a, _ in self.ASPECTS], dtype=np.float64)[cand['aspect']]
+        cand['orb'] = np.abs(diff - angles)
+        return cand[cand['orb'] <= orb_matrix[cand['i'], cand['j']]]
+
+    def format_aspects(self, records, ids, lons, trans_planets, planet_glyphs, trans_aspects, timing=None):
+        """
+        Turns numeric aspect records into display rows (with reception).
+        Rows keep the point ids and the aspect angle for drawing.
+        With timing (from AspectTimingLogic.time_aspects), rows also carry
+        'phase' and 'perfection' (UTC).
+        """
         aspects = []
-        planets_to_check = [
-            const.SUN, const.MOON, const.MERCURY, 
+        for k, rec in enumerate(records):
+            p1_id, p2_id = ids[rec['i']], ids[rec['j']]
+            angle, name = self.ASPECTS[rec['aspect']]
+            row = {
+                'p1_id': p1_id,
+                'p2_id': p2_id,
+                'angle': angle,
+                'p1': f"{planet_glyphs.get(p1_id, '')} {trans_planets.get(p1_id, p1_id)}".strip(),
+                'p2': f"{planet_glyphs.get(p2_id, '')} {trans_planets.get(p2_id, p2_id)}".strip(),
+                'aspect': trans_aspects.get(name, name),
+                'orb': f"{round(float(rec['orb']), 2)}°",
+                'reception': self.check_reception(p1_id, lons[rec['i']], p2_id, lons[rec['j']], trans_planets)
+            }
+            if timing is not None:
+                t = timing[k]
+                row['phase'] = self.TRANS_PHASES.get(t['status'], '')
+                row['perfection'] = t['perfect_utc'].strftime('%Y/%m/%d %H:%M UTC') if t['perfect_utc'] else ''
+            aspects.append(row)
+        return aspects
+
+    def get_aspects(self, chart, trans_planets, planet_glyphs, trans_aspects, extra_points=None, orbs=None, timed=False):
+        """
+        Calculates major aspects using classical orbs between the seven
+        planets plus any extra points ({id: longitude}, e.g. lots or angles).
+        timed=True adds applying/separating status and the perfection moment.
+        """
+        ids = [
+            const.SUN, const.MOON, const.MERCURY,
             const.VENUS, const.MARS, const.JUPITER, const.SATURN
         ]
-        major_angles = {0: 'Conjunction', 60: 'Sextile', 90: 'Square', 120: 'Trine', 180: 'Opposition'}
-        
-        for i in range(len(planets_to_check)):
-            for j in range(i + 1, len(planets_to_check)):
-                p1_id, p2_id = planets_to_check[i], planets_to_check[j]
-                p1, p2 = chart.get(p1_id), chart.get(p2_id)
-                
-                diff = abs(p1.lon - p2.lon)
-                if diff > 180: diff = 360 - diff
-                
-                max_orb = (self.ORBS.get(p1_id, 0) + self.ORBS.get(p2_id, 0)) / 2.0
-                
-                for angle, name in major_angles.items():
-                    if abs(diff - angle) <= max_orb:
-                        p1_sym = planet_glyphs.get(p1_id, '')
-                        p2_sym = planet_glyphs.get(p2_id, '')
-                        aspects.append({
-                            'p1': f"{p1_sym} {trans_planets.get(p1_id, p1_id)}",
-                            'p2': f"{p2_sym} {trans_planets.get(p2_id, p2_id)}",
-                            'aspect': trans_aspects.get(name, name),
-                            'orb': f"{round(abs(diff - angle), 2)}°",
-                            'reception': self.check_reception(p1_id, p1.lon, p2_id, p2.lon, trans_planets)
-                        })
-        return aspects
+        lons = [chart.get(p_id).lon for p_id in ids]
+        for p_id, lon in (extra_points or {}).items():
+            ids.append(p_id)
+            lons.append(lon)
+        records = self.find_aspects(lons, self.orb_matrix(ids, orbs))
+        timing = None
+        if timed:
+            angles = [self.ASPECTS[rec['aspect']][0] for rec in records]
+            timing = self.timing.time_aspects(chart.date.jd, ids, records, angles)
+        return self.format_aspects(records, ids, lons, trans_planets, planet_glyphs, trans_aspects, timing)
 
     def check_reception(self, p1_id, p1_lon, p2_id, p2_lon, trans_planets):
         """Checks for Mutual Reception or simple Reception."""
@@ -60,7 +156,8 @@ class AspectsLogic:
         if (p1_in_p2_dom or p1_in_p2_exalt) and (p2_in_p1_dom or p2_in_p1_exalt):
             return "互容 (Mutual Reception)"
         elif p1_in_p2_dom or p1_in_p2_exalt:
-            return f"{trans_planets.get(p1_id)} 接納 {trans_planets.get(p2_id)}"
-        elif p2_in_p1_dom or p2_in_p1_exalt:
+            # P1 sits in P2's sign or exaltation: P2 receives P1
             return f"{trans_planets.get(p2_id)} 接納 {trans_planets.get(p1_id)}"
+        elif p2_in_p1_dom or p2_in_p1_exalt:
+            return f"{trans_planets.get(p1_id)} 接納 {trans_planets.get(p2_id)}"
         return ""
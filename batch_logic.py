@@ -0,0 +1,97 @@
+import numpy as np
+import swisseph as swe
+from flatlib import const
+
+from dignities_logic import DignitiesLogic
+from ephemeris import init_ephemeris
+from lots_logic import LotsLogic
+
+# Same order as AstrologyLogic.get_planets_data
+PLANETS = [const.SUN, const.MOON, const.MERCURY, const.VENUS, const.MARS, const.JUPITER, const.SATURN]
+SWE_IDS = [swe.SUN, swe.MOON, swe.MERCURY, swe.VENUS, swe.MARS, swe.JUPITER, swe.SATURN]
+
+# flatlib's default house system (Alcabitus); only the Ascendant is used
+HOUSE_SYSTEM = b'B'
+
+UNIX_EPOCH_JD = 2440587.5
+
+
+class BatchChartLogic:
+    """
+    Computes the planet layer of many charts at once, straight from
+    swe.calc_ut without building flatlib Chart objects.
+    """
+
+    def __init__(self, table=None):
+        init_ephemeris()
+        # Optional EphemerisTable: planet positions are interpolated from it
+        # (within 0.3") for the dates it covers instead of calling swe.calc_ut
+        self.table = table
+        self.dignities = DignitiesLogic()
+        self.lots = LotsLogic()
+
+    @staticmethod
+    def julian_days(timestamps):
+        """Converts an array of UTC unix timestamps (seconds) to Julian days (UT)."""
+        return np.asarray(timestamps, dtype=np.float64) / 86400.0 + UNIX_EPOCH_JD
+
+    def compute(self, jd, lat, lon):
+        """
+        jd, lat, lon: equal-length arrays (or scalars) of UT Julian days and
+        geographic coordinates.
+        Returns a dict of NumPy arrays; per-planet arrays have shape (n, 7)
+        with columns in PLANETS order.
+        """
+        jd = np.atleast_1d(np.asarray(jd, dtype=np.float64))
+        lat = np.broadcast_to(np.asarray(lat, dtype=np.float64), jd.shape)
+        lon = np.broadcast_to(np.asarray(lon, dtype=np.float64), jd.shape)
+        n = jd.shape[0]
+
+        lons = np.empty((n, len(SWE_IDS)), dtype=np.float64)
+        speeds = np.empty((n, len(SWE_IDS)), dtype=np.float64)
+        asc = np.empty(n, dtype=np.float64)
+
+        use_table = self.table is not None and n > 0 and self.table.covers(jd.min(), jd.max())
+        if use_table:
+            lons[:], _, speeds[:] = self.table.lookup(jd, PLANETS)
+
+        calc_ut, houses = swe.calc_ut, swe.houses
+        for i in range(n):
+            t = jd[i]
+            if not use_table:
+                for j, body in enumerate(SWE_IDS):
+                    xx = calc_ut(t, body)[0]
+                    lons[i, j] = xx[0]
+                    speeds[i, j] = xx[3]
+            asc[i] = houses(t, lat[i], lon[i], HOUSE_SYSTEM)[1][0]
+
+        signs = (lons // 30).astype(np.int8)
+        house_nums = (((lons - asc[:, None]) % 360) // 30).astype(np.int8) + 1
+        # Day birth: Sun above the horizon (houses 7-12), as in AstrologyLogic.is_day_birth
+        is_day = house_nums[:, 0] >= 7
+
+        planet_idx = [DignitiesLogic.PLANET_INDEX[p_id] for p_id in PLANETS]
+        dignity_flags, dignity = self.dignities.score_essential_dignities(
+            np.array(planet_idx)[None, :], lons, is_day[:, None]
+        )
+
+        points = {const.ASC: asc, **{p_id: lons[:, j] for j, p_id in enumerate(PLANETS)}}
+        lot_values = np.column_stack([points[p_id] for p_id in LotsLogic.LOT_INPUTS])
+        lots = self.lots.evaluate_lots(lot_values, is_day)
+
+        return {
+            'jd': jd,
+            'asc': asc,
+            'lon': lons,
+            'speed': speeds,
+            'retro': speeds < 0,
+            'sign': signs,
+            'house': house_nums,
+            'is_day': is_day,
+            'dignity': dignity,
+            'dignity_flags': dignity_flags,
+            # Columns in LotsLogic.LOTS order
+            'lots': lots,
+            'lot_sign': (lots // 30).astype(np.int8),
+            'lot_house': (((lots - asc[:, None]) % 360) // 30).astype(np.int8) + 1,
+        }
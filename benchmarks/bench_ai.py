@@ -0,0 +1,161 @@
+"""
+Streaming latency of AIAssistant against the local mock LLM server: no
+API keys, no credits, reproducible numbers.
+
+    python benchmarks/bench_ai.py [--ttft 0.2] [--rate 50] [--tokens 100]
+                                  [--concurrency 1,4,16] [provider ...]
+
+For each provider (OpenAI, Groq, OpenRouter via the OpenAI-compatible
+API; Gemini via its REST shim) it reports:
+  - time to first token and tokens/s at the configured server pacing,
+  - client-side overhead per chunk with an unpaced server,
+  - first-token latency and throughput with concurrent sessions, on
+    threads (as Streamlit sessions do) and, for OpenAI-compatible
+    providers, on one asyncio loop.
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import time
+import warnings
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ai_clients import ClientRegistry
+from ai_logic import AIAssistant
+from benchmarks.mock_llm_server import MockLLMServer
+
+PROVIDERS = ["OpenAI", "Groq", "OpenRouter", "Gemini"]
+SYSTEM_PROMPT = "你是一位古典占星師。"
+OVERHEAD_TOKENS = 2000
+
+
+def messages(i=0):
+    return [{"role": "user", "content": f"請解析這張命盤 #{i}"}]
+
+
+def assistant(server, provider):
+    model = "mock-gemini" if provider == "Gemini" else "mock-fast"
+    return AIAssistant(provider, api_key="mock-key", model_name=model, response_cache=False,
+                       clients=ClientRegistry(base_urls=server.base_urls()))
+
+
+def measure_stream(ai, msgs):
+    """{'ttft', 'total', 'chunks'} of one streamed reply (seconds)."""
+    t0 = time.perf_counter()
+    ttft, chunks = None, 0
+    for chunk in ai.generate_chat_stream(SYSTEM_PROMPT, msgs):
+        if chunk.startswith("❌"):
+            raise RuntimeError(chunk)
+        if ttft is None:
+            ttft = time.perf_counter() - t0
+        chunks += 1
+    return {"ttft": ttft, "total": time.perf_counter() - t0, "chunks": chunks}
+
+
+async def ameasure_stream(ai, msgs):
+    t0 = time.perf_counter()
+    ttft, chunks = None, 0
+    async for chunk in ai.agenerate_chat_stream(SYSTEM_PROMPT, msgs):
+        if chunk.startswith("❌"):
+            raise RuntimeError(chunk)
+        if ttft is None:
+            ttft = time.perf_counter() - t0
+        chunks += 1
+    return {"ttft": ttft, "total": time.perf_counter() - t0, "chunks": chunks}
+
+
+def tokens_per_second(m):
+    streaming = m["total"] - m["ttft"]
+    return (m["chunks"] - 1) / streaming if streaming > 0 else float("inf")
+
+
+def single(server, provider, runs=5):
+    ai = assistant(server, provider)
+    measure_stream(ai, messages())  # connection set-up
+    samples = [measure_stream(ai, messages(i)) for i in range(runs)]
+    return {
+        "ttft": statistics.median(m["ttft"] for m in samples),
+        "tokens_per_second": statistics.median(tokens_per_second(m) for m in samples),
+    }
+
+
+def chunk_overhead(server, provider):
+    """Client-side seconds per chunk with no server pacing."""
+    pacing = (server.ttft, server.tokens_per_second, server.reply_tokens)
+    server.ttft, server.tokens_per_second, server.reply_tokens = 0.0, 0, OVERHEAD_TOKENS
+    try:
+        ai = assistant(server, provider)
+        measure_stream(ai, messages())
+        m = min((measure_stream(ai, messages(i)) for i in range(3)), key=lambda m: m["total"])
+        return (m["total"] - m["ttft"]) / max(1, m["chunks"] - 1)
+    finally:
+        server.ttft, server.tokens_per_second, server.reply_tokens = pacing
+
+
+def _summary(samples, wall):
+    ttfts = sorted(m["ttft"] for m in samples)
+    return {
+        "ttft_p50": ttfts[len(ttfts) // 2],
+        "ttft_p95": ttfts[min(len(ttfts) - 1, int(len(ttfts) * 0.95))],
+        "tokens_per_second": sum(m["chunks"] for m in samples) / wall,
+    }
+
+
+def concurrent_threads(server, provider, sessions):
+    ai = assistant(server, provider)
+    measure_stream(ai, messages())
+    t0 = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=sessions) as pool:
+        samples = list(pool.map(lambda i: measure_stream(ai, messages(i)), range(sessions)))
+    return _summary(samples, time.perf_counter() - t0)
+
+
+def concurrent_async(server, provider, sessions):
+    ai = assistant(server, provider)
+
+    async def main():
+        await ameasure_stream(ai, messages())
+        t0 = time.perf_counter()
+        samples = await asyncio.gather(*(ameasure_stream(ai, messages(i)) for i in range(sessions)))
+        wall = time.perf_counter() - t0
+        # Close the connections while their loop is still running
+        await ai.async_client.close()
+        return _summary(samples, wall)
+    return asyncio.run(main())
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("providers", nargs="*", default=PROVIDERS)
+    parser.add_argument("--ttft", type=float, default=0.2, help="server first-token latency (s)")
+    parser.add_argument("--rate", type=float, default=50, help="server tokens per second")
+    parser.add_argument("--tokens", type=int, default=100, help="chunks per reply")
+    parser.add_argument("--concurrency", default="1,4,16", help="comma-separated session counts")
+    args = parser.parse_args()
+    warnings.filterwarnings("ignore", category=FutureWarning)
+
+    with MockLLMServer(ttft=args.ttft, tokens_per_second=args.rate, reply_tokens=args.tokens) as server:
+        print(f"mock server: first token {args.ttft * 1000:.0f} ms, {args.rate:g} tokens/s, {args.tokens} tokens per reply\n")
+        print(f"{'provider':<12}{'TTFT ms':>10}{'tokens/s':>10}{'µs/chunk':>10}")
+        for p in args.providers:
+            s = single(server, p)
+            overhead = chunk_overhead(server, p)
+            print(f"{p:<12}{s['ttft'] * 1000:>10.1f}{s['tokens_per_second']:>10.1f}{overhead * 1e6:>10.0f}")
+
+        print(f"\n{'provider':<12}{'mode':<8}{'sessions':>9}{'TTFT p50':>10}{'TTFT p95':>10}{'tokens/s':>10}")
+        for p in args.providers:
+            for n in (int(x) for x in args.concurrency.split(",")):
+                modes = [("threads", concurrent_threads)]
+                if p != "Gemini":
+                    modes.append(("async", concurrent_async))
+                for mode, run in modes:
+                    r = run(server, p, n)
+                    print(f"{p:<12}{mode:<8}{n:>9}{r['ttft_p50'] * 1000:>10.1f}{r['ttft_p95'] * 1000:>10.1f}{r['tokens_per_second']:>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
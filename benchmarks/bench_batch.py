@@ -0,0 +1,66 @@
+"""
+Per-chart path vs. BatchChartLogic over the same random birth moments.
+
+    python benchmarks/bench_batch.py [n_charts]
+"""
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from flatlib.chart import Chart
+from flatlib.datetime import Datetime
+from flatlib.geopos import GeoPos
+
+from batch_logic import BatchChartLogic
+from ephemeris_table import default_table
+from logic import AstrologyLogic
+
+
+def random_births(n, seed=42):
+    rng = np.random.default_rng(seed)
+    jd = rng.uniform(2415020.5, 2469807.5, n)  # 1900-2050
+    lat = rng.uniform(-60.0, 60.0, n)
+    lon = rng.uniform(-180.0, 180.0, n)
+    return jd, lat, lon
+
+
+def run_per_chart(logic, jd, lat, lon):
+    for i in range(len(jd)):
+        chart = Chart(Datetime.fromJD(jd[i], '+00:00'), GeoPos(lat[i], lon[i]))
+        houses = logic.calculate_equal_houses(chart.get('Asc').lon)
+        logic.get_planets_data(chart, houses)
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    jd, lat, lon = random_births(n)
+    logic, batch = AstrologyLogic(), BatchChartLogic()
+    batch.compute(jd[:2], lat[:2], lon[:2])  # warm the dignity table
+
+    t0 = time.perf_counter()
+    run_per_chart(logic, jd, lat, lon)
+    t_chart = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    batch.compute(jd, lat, lon)
+    t_batch = time.perf_counter() - t0
+
+    print(f"{n} charts")
+    print(f"per-chart (flatlib Chart + get_planets_data): {t_chart:.3f} s ({n / t_chart:,.0f} charts/s)")
+    print(f"batch (BatchChartLogic.compute):              {t_batch:.3f} s ({n / t_batch:,.0f} charts/s)")
+    print(f"speedup: {t_chart / t_batch:.1f}x")
+
+    table = default_table()
+    if table is not None:
+        t0 = time.perf_counter()
+        BatchChartLogic(table=table).compute(jd, lat, lon)
+        t_table = time.perf_counter() - t0
+        print(f"batch + ephemeris table:                      {t_table:.3f} s ({n / t_table:,.0f} charts/s)")
+
+
+if __name__ == "__main__":
+    main()
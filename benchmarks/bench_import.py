@@ -0,0 +1,70 @@
+"""
+Cold-import benchmark for the chart engine.
+
+Each sample runs in a fresh interpreter so nothing is shared with the
+previous import. Run from the repository root:
+
+    python benchmarks/bench_import.py [samples]
+"""
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Modules that make up the headless engine (everything except app.py and
+# the AI layer); add new engine modules here so the checks cover them
+ENGINE_MODULES = [
+    'ephemeris', 'ephemeris_table', 'dignities_logic', 'aspects_logic',
+    'aspect_timing_logic', 'lots_logic', 'fixed_stars_logic', 'time_lords_logic',
+    'calendar_logic', 'transits_logic', 'batch_logic', 'timezones', 'gazetteer',
+    'chart_cache', 'prompt_logic', 'visuals', 'report_logic', 'logic',
+]
+
+# The engine must never pull these in at import time (pandas is presentation only)
+FORBIDDEN_MODULES = ['streamlit', 'pandas', 'kerykeion']
+
+# Budget for a cold `import logic` in milliseconds (median of the samples)
+IMPORT_BUDGET_MS = 400.0
+
+_PROBE = """
+import json, sys, time
+t0 = time.perf_counter()
+for name in {modules!r}:
+    __import__(name)
+elapsed = (time.perf_counter() - t0) * 1000.0
+print(json.dumps({{'ms': elapsed, 'loaded': [m for m in {forbidden!r} if m in sys.modules]}}))
+"""
+
+
+def measure_cold_import(modules=None, samples=5):
+    """Returns (list of import times in ms, forbidden modules that got loaded)."""
+    modules = modules or ENGINE_MODULES
+    probe = _PROBE.format(modules=modules, forbidden=FORBIDDEN_MODULES)
+    times, loaded = [], set()
+    for _ in range(samples):
+        out = subprocess.run(
+            [sys.executable, '-c', probe], cwd=ROOT,
+            capture_output=True, text=True, check=True
+        )
+        res = json.loads(out.stdout.strip().splitlines()[-1])
+        times.append(res['ms'])
+        loaded.update(res['loaded'])
+    return times, sorted(loaded)
+
+
+def main():
+    samples = int(sys.argv[1]) if len(sys.argv) > 1 else 5
+    times, loaded = measure_cold_import(samples=samples)
+    median = statistics.median(times)
+    print(f"engine cold import: median {median:.1f} ms, min {min(times):.1f} ms, max {max(times):.1f} ms ({samples} runs)")
+    print(f"budget: {IMPORT_BUDGET_MS:.0f} ms -> {'OK' if median <= IMPORT_BUDGET_MS else 'OVER BUDGET'}")
+    if loaded:
+        print(f"forbidden modules imported: {', '.join(loaded)}")
+    return 0 if median <= IMPORT_BUDGET_MS and not loaded else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
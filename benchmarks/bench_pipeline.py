@@ -0,0 +1,237 @@
+"""
+End-to-end chart pipeline benchmark with regression thresholds.
+
+Runs the real stages app.py goes through for a natal chart (flatlib Chart,
+equal houses, planets, aspects, lots, fixed stars, profections, firdaria,
+transits, report rendering) over a fixed corpus of births, and reports
+per-stage latency (p50/p95/max over all samples) and peak memory
+allocated by each stage.
+
+    python benchmarks/bench_pipeline.py [--repeats N] [--update-baseline]
+
+Exits with status 1 when a stage's p50 or peak memory regresses past the
+stored baseline (benchmarks/baselines/pipeline.json) by more than the
+tolerance. Baselines are machine specific: refresh them with
+--update-baseline on the machine the numbers are compared on.
+"""
+import argparse
+import json
+import os
+import platform
+import sys
+import time
+import tracemalloc
+from collections import OrderedDict
+from datetime import date, datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from flatlib import const
+from flatlib.chart import Chart
+from flatlib.datetime import Datetime
+from flatlib.geopos import GeoPos
+
+from logic import AstrologyLogic
+from report_logic import ReportLogic, add_years
+from time_lords_logic import TimeLordsLogic
+
+BASELINE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'baselines', 'pipeline.json')
+
+# (date, time, UTC offset, lat, lon): both hemispheres, high latitudes, day
+# and night births, leap day, and dates from 1900 to 2040
+CORPUS = [
+    ('1990/01/01', '12:00', '+08:00', 25.03, 121.50),
+    ('1985/07/13', '03:25', '+08:00', 22.32, 114.17),
+    ('2000/02/29', '23:59', '+00:00', 51.48, -0.00),
+    ('1969/07/20', '20:17', '-05:00', 40.71, -74.01),
+    ('1955/11/05', '06:15', '+09:00', 35.68, 139.69),
+    ('1977/03/21', '17:45', '-03:00', -34.60, -58.38),
+    ('2012/12/21', '11:11', '+10:00', -33.87, 151.21),
+    ('1923/09/01', '11:58', '+09:00', 35.45, 139.64),
+    ('2024/06/21', '04:30', '+03:00', 64.13, -21.90),
+    ('1900/01/01', '00:00', '+00:00', 0.00, 0.00),
+    ('1999/08/11', '14:00', '+05:30', 28.61, 77.21),
+    ('2040/10/10', '10:10', '-08:00', 37.77, -122.42),
+]
+TARGET_DATE = date(2026, 1, 1)
+
+# A stage may be this much slower than its baseline p50 before it counts
+# as a regression (relative, plus an absolute slack for sub-ms stages)
+TOLERANCE = 0.5
+SLACK_MS = 0.25
+MEMORY_TOLERANCE = 0.5
+MEMORY_SLACK_KB = 64
+
+
+def pipeline(astro, reports, birth):
+    """
+    Yields (stage, callable) in pipeline order; each callable returns the
+    stage's result, which later stages read from `state`.
+    """
+    birth_date, birth_time, offset, lat, lon = birth
+    state = {}
+
+    def chart():
+        state['chart'] = Chart(Datetime(birth_date, birth_time, offset), GeoPos(lat, lon))
+
+    def houses():
+        state['houses'] = astro.calculate_equal_houses(state['chart'].get(const.ASC).lon)
+        state['is_day'] = astro.is_day_birth(state['chart'], state['houses'])
+
+    def firdaria():
+        state['f_data'] = astro.get_firdaria_data(birth_date, state['is_day'], current_date=TARGET_DATE)
+
+    def transits():
+        natal_points = astro.transits.natal_points(state['chart'])
+        list(astro.scan_transits(natal_points, TARGET_DATE, TARGET_DATE + timedelta(days=ReportLogic.TRANSIT_DAYS)))
+
+    def report():
+        state['report'] = reports.build('natal', birth_date, birth_time, offset, lat, lon, 'benchmark', TARGET_DATE)
+
+    birth_d = datetime.strptime(birth_date, '%Y/%m/%d').date()
+    return state, [
+        ('chart', chart),
+        ('equal_houses', houses),
+        ('planets', lambda: astro.get_planets_data(state['chart'], state['houses'])),
+        ('aspects', lambda: astro.get_aspects(state['chart'], timed=True)),
+        ('lots', lambda: astro.calculate_lots(state['chart'], state['houses'], state['is_day'])),
+        ('fixed_stars', lambda: astro.get_fixed_stars(state['chart'])),
+        ('profections', lambda: astro.calculate_profections(state['chart'], state['houses'], birth_date, current_date=TARGET_DATE)),
+        ('profection_range', lambda: astro.profection_range(state['chart'], birth_date, birth_d,
+                                                            add_years(birth_d, ReportLogic.LIFETIME_YEARS))),
+        ('firdaria', firdaria),
+        ('transits', transits),
+        ('build_report', report),
+        ('render_markdown', lambda: reports.markdown(state['report'])),
+        ('render_prompt', lambda: reports.prompt(state['report'])),
+        ('render_html', lambda: reports.html(state['report'])),
+    ]
+
+
+def _cold():
+    """Drops per-birth caches, so every sample is a first view of its chart."""
+    TimeLordsLogic.compile_firdaria.cache_clear()
+    TimeLordsLogic._parse_birth.cache_clear()
+
+
+def _percentile(sorted_values, q):
+    return sorted_values[min(len(sorted_values) - 1, int(len(sorted_values) * q))]
+
+
+def run(corpus=CORPUS, repeats=5, astro=None):
+    """
+    {stage: {'p50_ms', 'p95_ms', 'max_ms', 'peak_kb', 'samples'}} over
+    `repeats` passes of the corpus (after one warm-up pass).
+    """
+    astro = astro or AstrologyLogic()
+    reports = ReportLogic(astro)
+    timings = OrderedDict()
+    peaks = {}
+
+    for i in range(repeats + 1):
+        for birth in corpus:
+            _cold()
+            reports.clear()
+            _, stages = pipeline(astro, reports, birth)
+            for name, stage in stages:
+                t0 = time.perf_counter_ns()
+                stage()
+                elapsed = (time.perf_counter_ns() - t0) / 1e6
+                if i:
+                    timings.setdefault(name, []).append(elapsed)
+
+    # Memory in a separate pass: tracing slows everything down
+    tracemalloc.start()
+    try:
+        for birth in corpus:
+            _cold()
+            reports.clear()
+            _, stages = pipeline(astro, reports, birth)
+            for name, stage in stages:
+                current = tracemalloc.get_traced_memory()[0]
+                tracemalloc.reset_peak()
+                stage()
+                peaks[name] = max(peaks.get(name, 0), tracemalloc.get_traced_memory()[1] - current)
+    finally:
+        tracemalloc.stop()
+
+    results = OrderedDict()
+    for name, samples in timings.items():
+        s = sorted(samples)
+        results[name] = {
+            'p50_ms': round(_percentile(s, 0.5), 4),
+            'p95_ms': round(_percentile(s, 0.95), 4),
+            'max_ms': round(s[-1], 4),
+            'peak_kb': round(peaks[name] / 1024, 1),
+            'samples': len(s),
+        }
+    return results
+
+
+def compare(results, baseline, tolerance=TOLERANCE):
+    """List of human-readable regressions of results against a baseline."""
+    regressions = []
+    for name, r in results.items():
+        b = baseline.get(name)
+        if b is None:
+            continue
+        limit = b['p50_ms'] * (1 + tolerance) + SLACK_MS
+        if r['p50_ms'] > limit:
+            regressions.append(f"{name}: p50 {r['p50_ms']:.3f} ms > {limit:.3f} ms (baseline {b['p50_ms']:.3f} ms)")
+        mem_limit = b['peak_kb'] * (1 + MEMORY_TOLERANCE) + MEMORY_SLACK_KB
+        if r['peak_kb'] > mem_limit:
+            regressions.append(f"{name}: peak {r['peak_kb']:.0f} KB > {mem_limit:.0f} KB (baseline {b['peak_kb']:.0f} KB)")
+    return regressions
+
+
+def load_baseline(path=BASELINE_PATH):
+    if not os.path.exists(path):
+        return None
+    with open(path, encoding='utf-8') as f:
+        return json.load(f)
+
+
+def save_baseline(results, path=BASELINE_PATH):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    data = {
+        'machine': f"{platform.machine()} {platform.python_implementation()} {platform.python_version()}",
+        'corpus': len(CORPUS),
+        'stages': results,
+    }
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(data, f, indent=2)
+        f.write('\n')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--repeats', type=int, default=5, help='passes over the corpus')
+    parser.add_argument('--tolerance', type=float, default=TOLERANCE, help='allowed relative p50 slowdown')
+    parser.add_argument('--update-baseline', action='store_true', help=f'write {os.path.relpath(BASELINE_PATH)}')
+    args = parser.parse_args()
+
+    results = run(repeats=args.repeats)
+    total = sum(r['p50_ms'] for r in results.values())
+    print(f"{len(CORPUS)} births x {args.repeats} passes, natal pipeline p50 total {total:.1f} ms\n")
+    print(f"{'stage':<18}{'p50 ms':>9}{'p95 ms':>9}{'max ms':>9}{'peak KB':>9}")
+    for name, r in results.items():
+        print(f"{name:<18}{r['p50_ms']:>9.3f}{r['p95_ms']:>9.3f}{r['max_ms']:>9.3f}{r['peak_kb']:>9.0f}")
+
+    if args.update_baseline:
+        save_baseline(results)
+        print(f"\nbaseline written to {BASELINE_PATH}")
+        return 0
+
+    baseline = load_baseline()
+    if baseline is None:
+        print("\nno baseline yet: run with --update-baseline")
+        return 0
+    regressions = compare(results, baseline['stages'], args.tolerance)
+    print(f"\nbaseline ({baseline['machine']}): " + ("OK" if not regressions else "REGRESSED"))
+    for line in regressions:
+        print(f"  {line}")
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
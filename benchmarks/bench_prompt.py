@@ -0,0 +1,65 @@
+"""
+First-message size and time-to-first-token: the full Markdown report (what
+the chat used to send) vs. the compact, token-budgeted prompt.
+
+    python benchmarks/bench_prompt.py [provider ...]
+
+Token counts are printed for every provider. First-token latency is only
+measured for providers with an API key in the environment (GOOGLE_API_KEY,
+GROQ_API_KEY, OPENAI_API_KEY, OPENROUTER_API_KEY); each variant is sent
+three times with the response cache disabled.
+"""
+import os
+import statistics
+import sys
+import time
+from datetime import date
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ai_logic import AIAssistant
+from logic import AstrologyLogic
+from natal_prompt import NATAL_SYSTEM_PROMPT
+from prompt_logic import TOKEN_RATIOS, PromptLogic, count_tokens
+
+BUDGETS = [PromptLogic.DEFAULT_BUDGET, 600]
+QUESTION = "\n\n請只用一句話總結這張命盤。"
+
+
+def first_token_latency(assistant, message, runs=3):
+    samples = []
+    for _ in range(runs):
+        t0 = time.perf_counter()
+        for _chunk in assistant.generate_chat_stream(NATAL_SYSTEM_PROMPT, [{"role": "user", "content": message}]):
+            samples.append(time.perf_counter() - t0)
+            break
+    return statistics.median(samples) if samples else None
+
+
+def main():
+    providers = sys.argv[1:] or list(TOKEN_RATIOS)
+    logic = AstrologyLogic()
+    report = logic.build_report('natal', '1990/01/01', '12:00', '+08:00', 25.03, 121.50, '台北市', date(2026, 1, 1))
+
+    # name -> chart data sent to a provider
+    variants = {'full markdown': lambda p: logic.reports.markdown(report)}
+    for budget in BUDGETS:
+        variants[f"compact {budget}"] = lambda p, budget=budget: logic.reports.prompt(report, p, budget)
+
+    print(f"{'variant':<16}" + "".join(f"{p:>12}" for p in providers) + "   (tokens of chart data)")
+    for name, chart_text in variants.items():
+        print(f"{name:<16}" + "".join(f"{count_tokens(chart_text(p), p):>12}" for p in providers))
+    print(f"{'system prompt':<16}" + "".join(f"{count_tokens(NATAL_SYSTEM_PROMPT, p):>12}" for p in providers))
+
+    for p in providers:
+        assistant = AIAssistant(provider=p, response_cache=False)
+        if not assistant.is_configured:
+            print(f"{p}: no API key, first-token latency skipped")
+            continue
+        for name, chart_text in variants.items():
+            ttft = first_token_latency(assistant, chart_text(p) + QUESTION)
+            print(f"{p} {assistant.model_name} {name}: first token {ttft * 1000:.0f} ms" if ttft else f"{p} {name}: no response")
+
+
+if __name__ == "__main__":
+    main()
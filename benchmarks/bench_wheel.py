@@ -0,0 +1,71 @@
+"""
+Chart wheel rendering: draw_wheel_svg from a computed report vs. the
+kerykeion path (visuals.draw_circular_chart), which recomputes the chart
+and goes through a file. The kerykeion timing is skipped when it is not
+installed.
+
+    python benchmarks/bench_wheel.py [n_charts]
+"""
+import os
+import sys
+import time
+from datetime import date
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from aspect_timing_logic import jd_to_datetime
+from logic import AstrologyLogic
+from visuals import draw_circular_chart, draw_wheel_svg
+
+
+def random_reports(logic, n, seed=7):
+    rng = np.random.default_rng(seed)
+    reports, births = [], []
+    for jd, lat, lon in zip(rng.uniform(2415020.5, 2469807.5, n), rng.uniform(-60, 60, n), rng.uniform(-180, 180, n)):
+        utc = jd_to_datetime(jd)
+        reports.append(logic.build_report('horary', utc.strftime('%Y/%m/%d'), utc.strftime('%H:%M'), '+00:00',
+                                          lat, lon, '', date(2026, 1, 1)))
+        births.append({'year': utc.year, 'month': utc.month, 'day': utc.day, 'hour': utc.hour,
+                       'minute': utc.minute, 'lat': lat, 'lng': lon, 'tz': 0.0})
+    return reports, births
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    logic = AstrologyLogic()
+    reports, births = random_reports(logic, n)
+
+    t0 = time.perf_counter()
+    for r in reports:
+        draw_wheel_svg(r)
+    t_draw = time.perf_counter() - t0
+
+    for r in reports:
+        logic.reports.svg(r)
+    t0 = time.perf_counter()
+    for r in reports:
+        logic.reports.svg(r)
+    t_cached = time.perf_counter() - t0
+
+    print(f"{n} charts")
+    print(f"draw_wheel_svg (uncached):  {t_draw / n * 1000:.3f} ms/chart")
+    print(f"ReportLogic.svg (cached):   {t_cached / n * 1000:.4f} ms/chart")
+
+    try:
+        import kerykeion  # noqa: F401
+    except ImportError:
+        print("kerykeion not installed: skipping draw_circular_chart")
+        return
+    k = min(n, 20)
+    t0 = time.perf_counter()
+    for b in births[:k]:
+        draw_circular_chart(b)
+    t_kery = time.perf_counter() - t0
+    print(f"kerykeion draw_circular_chart: {t_kery / k * 1000:.3f} ms/chart")
+    print(f"speedup: {(t_kery / k) / (t_draw / n):.0f}x")
+
+
+if __name__ == "__main__":
+    main()
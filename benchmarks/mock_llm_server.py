@@ -0,0 +1,226 @@
+"""
+Local stand-in for the chat APIs used by AIAssistant, for tests and
+latency benchmarks without API credits.
+
+Speaks the OpenAI-compatible streaming chat API (OpenAI, OpenRouter and
+Groq's /openai/v1 paths) and the Gemini REST streamGenerateContent call.
+Replies are deterministic text streamed one token per chunk with a
+configurable first-token latency, token rate and injected failures.
+
+    python benchmarks/mock_llm_server.py [port]
+
+    with MockLLMServer(ttft=0.2, tokens_per_second=50) as server:
+        clients = ClientRegistry(base_urls=server.base_urls())
+        ai = AIAssistant("Groq", api_key="mock", clients=clients)
+"""
+import json
+import random
+import re
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Cycled to build replies; one entry is one streamed chunk
+VOCABULARY = [
+    "太陽", "位於", "摩羯座", "，", "落在", "第十宮", "。", "月亮", "與", "金星",
+    "形成", "三分相", "，", "象徵", "情感", "穩定", "。", "土星", "為", "年主星", "。",
+]
+
+OPENAI_MODELS = ["mock-fast", "mock-large"]
+GEMINI_MODELS = ["models/mock-gemini"]
+
+
+def reply_tokens(n):
+    """The n chunks of every mock reply."""
+    return [VOCABULARY[i % len(VOCABULARY)] for i in range(n)]
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    # Small writes must not wait for delayed ACKs, or every reply gains ~40 ms
+    disable_nagle_algorithm = True
+
+    def log_message(self, format, *args):
+        pass
+
+    @property
+    def mock(self):
+        return self.server.mock
+
+    def _send_json(self, status, payload):
+        body = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _start_chunked(self, content_type):
+        self.send_response(200)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+
+    def _write_chunk(self, data):
+        data = data.encode("utf-8")
+        self.wfile.write(f"{len(data):x}\r\n".encode("ascii") + data + b"\r\n")
+        self.wfile.flush()
+
+    def _end_chunked(self):
+        self.wfile.write(b"0\r\n\r\n")
+        self.wfile.flush()
+
+    def _stream(self, tokens, frame, opening="", closing=""):
+        """Writes tokens with the configured pacing; False if the connection was cut."""
+        mock = self.mock
+        if opening:
+            self._write_chunk(opening)
+        for i, tok in enumerate(tokens):
+            if mock.disconnect_after is not None and i >= mock.disconnect_after:
+                self.close_connection = True
+                return False
+            if i and mock.tokens_per_second:
+                time.sleep(1.0 / mock.tokens_per_second)
+            self._write_chunk(frame(i, tok))
+        if closing:
+            self._write_chunk(closing)
+        self._end_chunked()
+        return True
+
+    def do_GET(self):
+        if self.path.split("?")[0].endswith("/v1beta/models"):
+            self._send_json(200, {"models": [
+                {"name": m, "supportedGenerationMethods": ["generateContent"]} for m in GEMINI_MODELS
+            ]})
+        elif self.path.endswith("/models"):
+            self._send_json(200, {"object": "list", "data": [
+                {"id": m, "object": "model", "created": 0, "owned_by": "mock"} for m in OPENAI_MODELS
+            ]})
+        else:
+            self._send_json(404, {"error": {"message": f"unknown path {self.path}"}})
+
+    def do_POST(self):
+        body = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+        path = self.path.split("?")[0]
+        self.mock._log(path, body)
+
+        failure = self.mock._failure()
+        if failure:
+            self._send_json(failure, {"error": {"message": "mock injected error", "type": "server_error", "code": failure}})
+            return
+
+        time.sleep(self.mock.ttft)
+        tokens = reply_tokens(self.mock.reply_tokens)
+        if path.endswith("/chat/completions"):
+            self._openai(body, tokens)
+        elif re.search(r"/models/[^/:]+:streamGenerateContent$", path):
+            self._start_chunked("application/json")
+            self._stream(tokens, lambda i, tok: ("," if i else "") + json.dumps(_gemini_chunk(tok), ensure_ascii=False),
+                         opening="[", closing="]")
+        elif re.search(r"/models/[^/:]+:generateContent$", path):
+            self._send_json(200, _gemini_chunk("".join(tokens)))
+        else:
+            self._send_json(404, {"error": {"message": f"unknown path {self.path}"}})
+
+    def _openai(self, body, tokens):
+        model = body.get("model", "mock")
+        if not body.get("stream"):
+            self._send_json(200, {
+                "id": "mock", "object": "chat.completion", "created": 0, "model": model,
+                "choices": [{"index": 0, "message": {"role": "assistant", "content": "".join(tokens)}, "finish_reason": "stop"}],
+            })
+            return
+
+        def frame(i, tok):
+            chunk = {"id": "mock", "object": "chat.completion.chunk", "created": 0, "model": model,
+                     "choices": [{"index": 0, "delta": {"content": tok}, "finish_reason": None}]}
+            return f"data: {json.dumps(chunk, ensure_ascii=False)}\n\n"
+        self._start_chunked("text/event-stream")
+        self._stream(tokens, frame, closing="data: [DONE]\n\n")
+
+
+class _Server(ThreadingHTTPServer):
+    daemon_threads = True
+    # Room for bursts of concurrent sessions opening connections at once
+    request_queue_size = 256
+
+    def handle_error(self, request, client_address):
+        # Clients dropping keep-alive connections or cancelled streams
+        if not isinstance(sys.exc_info()[1], ConnectionError):
+            super().handle_error(request, client_address)
+
+
+def _gemini_chunk(text):
+    return {"candidates": [{"content": {"role": "model", "parts": [{"text": text}]}, "index": 0}]}
+
+
+class MockLLMServer:
+    """
+    Threaded mock chat API on localhost. All settings can be changed while
+    it runs and apply to the next request.
+
+    ttft: seconds before the first token; tokens_per_second: pacing of the
+    rest (0 for as fast as possible); reply_tokens: chunks per reply;
+    error_rate: share of requests answered with error_status;
+    disconnect_after: cut every stream after this many tokens.
+    """
+
+    def __init__(self, host="127.0.0.1", port=0, ttft=0.0, tokens_per_second=0, reply_tokens=40,
+                 error_rate=0.0, error_status=503, disconnect_after=None, seed=0):
+        self.ttft = ttft
+        self.tokens_per_second = tokens_per_second
+        self.reply_tokens = reply_tokens
+        self.error_rate = error_rate
+        self.error_status = error_status
+        self.disconnect_after = disconnect_after
+        self.requests = []
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self._httpd = _Server((host, port), _Handler)
+        self._httpd.mock = self
+        self._thread = None
+
+    @property
+    def url(self):
+        host, port = self._httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def base_urls(self):
+        """ClientRegistry base_urls pointing every provider here."""
+        return {"OpenAI": f"{self.url}/v1", "OpenRouter": f"{self.url}/v1", "Groq": self.url, "Gemini": self.url}
+
+    def _log(self, path, body):
+        with self._lock:
+            self.requests.append((path, body))
+
+    def _failure(self):
+        with self._lock:
+            if self.error_rate and self._random.random() < self.error_rate:
+                return self.error_status
+        return None
+
+    def start(self):
+        self._thread = threading.Thread(target=self._httpd.serve_forever, name="mock-llm", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._httpd.shutdown()
+        self._httpd.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+if __name__ == "__main__":
+    server = MockLLMServer(port=int(sys.argv[1]) if len(sys.argv) > 1 else 8765, ttft=0.2, tokens_per_second=50)
+    print(f"Mock LLM server on {server.url} (Ctrl+C to stop)")
+    print(json.dumps(server.base_urls(), indent=2))
+    try:
+        server._httpd.serve_forever()
+    except KeyboardInterrupt:
+        server.stop()
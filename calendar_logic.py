@@ -0,0 +1,115 @@
+import csv
+import heapq
+from datetime import date, datetime, timedelta
+from operator import itemgetter
+
+from flatlib import const
+
+
+def _as_datetime(d):
+    return d if isinstance(d, datetime) else datetime(d.year, d.month, d.day)
+
+
+class TimeLordCalendar:
+    """
+    One chronological stream of "what changes when": profection years (and
+    optionally months), firdaria periods and, when natal points are given,
+    transits. Each system is a lazy generator already in time order; they
+    are merged with heapq.merge, so only the next event of each system is
+    held in memory and the caller can stop (or page) at any point.
+    """
+
+    # Transits need a finite range; an open-ended calendar scans this far ahead
+    TRANSIT_HORIZON_DAYS = 366 * 10
+
+    def __init__(self, time_lords, transits=None):
+        self.time_lords = time_lords
+        self.transits = transits
+
+    def events(self, birth_date, asc_sign_idx, is_day, start, end=None, natal=None, monthly=False):
+        """
+        Yields events with start <= time < end (end=None: no bound for the
+        time-lord systems) in time order. Every event is a dict with 'time'
+        (naive datetime; UTC for transits, local calendar day otherwise),
+        'system' and the system's own fields.
+        """
+        start, end = _as_datetime(start), end and _as_datetime(end)
+        sources = [
+            self._profection_events(birth_date, asc_sign_idx, start, end, monthly),
+            self._firdaria_events(birth_date, is_day, start, end),
+        ]
+        if natal and self.transits is not None:
+            transit_end = end or start + timedelta(days=self.TRANSIT_HORIZON_DAYS)
+            sources.append(self._transit_events(natal, start, transit_end))
+        return heapq.merge(*sources, key=itemgetter('time'))
+
+    def window(self, birth_date, asc_sign_idx, is_day, start, end, natal=None, monthly=False):
+        """Materialized events of a bounded window."""
+        return list(self.events(birth_date, asc_sign_idx, is_day, start, end, natal, monthly))
+
+    def _profection_events(self, birth_date, asc_sign_idx, start, end, monthly):
+        unit = 'month' if monthly else 'year'
+        year = max(start.date(), birth_date).year
+        while end is None or date(year, 1, 1) < end.date():
+            # One calendar year of periods at a time
+            p = self.time_lords.profection_periods(birth_date, asc_sign_idx, date(year, 1, 1), date(year, 12, 31), unit)
+            for s, age, sign_idx, house_num in zip(p['start'], p['age'], p['sign_idx'], p['house_num']):
+                t = datetime.fromordinal(int(s))
+                if t.year != year or t < start:
+                    continue
+                if end is not None and t >= end:
+                    return
+                yield {
+                    'time': t, 'system': 'profection', 'unit': unit, 'age': int(age),
+                    'sign_idx': int(sign_idx), 'house_num': int(house_num),
+                    'lord': self.time_lords.SIGN_RULERS[sign_idx],
+                }
+            year += 1
+
+    def _firdaria_events(self, birth_date, is_day, start, end):
+        tl = self.time_lords.compile_firdaria(birth_date, bool(is_day))
+        for i in range(len(tl.majors)):
+            # Periods take over on the calendar day their boundary falls on
+            t = datetime.fromordinal(tl.start_days[i])
+            if t < start:
+                continue
+            if end is not None and t >= end:
+                return
+            yield {
+                'time': t, 'system': 'firdaria', 'major': tl.majors[i], 'minor': tl.minors[i],
+                'new_major': i == 0 or tl.majors[i] != tl.majors[i - 1],
+            }
+
+    def _transit_events(self, natal, start, end):
+        for ev in self.transits.scan(natal, start, end):
+            yield {'time': ev['utc'], 'system': 'transit', **ev}
+
+    def format_event(self, event, trans_signs, trans_planets, planet_glyphs, trans_aspects):
+        """Display row: {'time', 'system', 'event'}."""
+        def planet(p_id):
+            return f"{planet_glyphs.get(p_id, '')} {trans_planets.get(p_id, p_id)}".strip()
+
+        system = event['system']
+        if system == 'profection':
+            sign = const.LIST_SIGNS[event['sign_idx']]
+            kind = '小限月' if event['unit'] == 'month' else f"小限年 ({event['age']} 歲)"
+            text = f"{kind}：{trans_signs.get(sign, sign)} (第 {event['house_num']} 宮)，主星 {planet(event['lord'])}"
+            label = '小限'
+        elif system == 'firdaria':
+            text = f"大運 {planet(event['major'])} / 小運 {planet(event['minor'])}"
+            label = '法達'
+        else:
+            retro = ' Ⓡ' if event['retro'] else ''
+            aspect = trans_aspects.get(event['aspect'], event['aspect'])
+            text = f"行運{planet(event['transit'])}{retro} {aspect} 本命{trans_planets.get(event['natal'], event['natal'])}"
+            label = '行運'
+        fmt = '%Y/%m/%d %H:%M UTC' if system == 'transit' else '%Y/%m/%d'
+        return {'time': event['time'].strftime(fmt), 'system': label, 'event': text}
+
+    @staticmethod
+    def export_csv(rows, fp):
+        """Writes formatted rows (see format_event) to an open text file."""
+        writer = csv.DictWriter(fp, fieldnames=['time', 'system', 'event'])
+        writer.writeheader()
+        for row in rows:
+            writer.writerow(row)
@@ -0,0 +1,185 @@
+import hashlib
+import json
+import logging
+import os
+import pickle
+import tempfile
+import threading
+from collections import OrderedDict
+from datetime import timezone
+
+# Bump when the shape or content of cached chart results changes
+CACHE_VERSION = 16
+
+DEFAULT_CACHE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '.cache')
+
+logger = logging.getLogger(__name__)
+
+
+class ChartCache:
+    """
+    Content-addressed cache of computed chart results.
+    Entries live in a bounded in-memory LRU and in an on-disk store
+    (one pickle per key, written atomically) so that results survive
+    restarts and are shared by every Streamlit session and worker process
+    pointing at the same directory. The disk store is pruned to
+    max_disk_entries, oldest first, whenever it grows past that bound.
+    """
+
+    def __init__(self, max_entries=256, cache_dir=None, namespace='charts', max_disk_entries=20000):
+        self.max_entries = max_entries
+        self.max_disk_entries = max_disk_entries
+        base_dir = cache_dir or os.environ.get('ASTRO_CACHE_DIR') or DEFAULT_CACHE_DIR
+        self.cache_dir = os.path.join(base_dir, namespace) if namespace else base_dir
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+        # Files on disk as of the last scan plus those written since (None: not scanned yet)
+        self._disk_entries = None
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def make_key(utc_moment, lat, lon, **settings):
+        """
+        Builds a stable key from the chart moment (normalized to UTC, minute
+        precision), the coordinates (rounded to ~10 m) and any settings that
+        change the computed result.
+        """
+        if utc_moment.tzinfo is not None:
+            utc_moment = utc_moment.astimezone(timezone.utc).replace(tzinfo=None)
+        payload = {
+            'v': CACHE_VERSION,
+            'utc': utc_moment.strftime('%Y-%m-%dT%H:%M'),
+            'lat': round(float(lat), 4),
+            'lon': round(float(lon), 4),
+            'settings': settings,
+        }
+        raw = json.dumps(payload, sort_keys=True, ensure_ascii=False, default=str)
+        return hashlib.sha256(raw.encode('utf-8')).hexdigest()
+
+    def _path(self, key):
+        return os.path.join(self.cache_dir, key[:2], f"{key}.pkl")
+
+    def _remember(self, key, value):
+        with self._lock:
+            self._memory[key] = value
+            self._memory.move_to_end(key)
+            while len(self._memory) > self.max_entries:
+                self._memory.popitem(last=False)
+
+    def get(self, key):
+        """Returns the cached result or None."""
+        with self._lock:
+            if key in self._memory:
+                self._memory.move_to_end(key)
+                self.hits += 1
+                return self._memory[key]
+
+        try:
+            with open(self._path(key), 'rb') as f:
+                value = pickle.load(f)
+        except (OSError, pickle.UnpicklingError, EOFError, AttributeError, ImportError):
+            with self._lock:
+                self.misses += 1
+            return None
+
+        self._remember(key, value)
+        with self._lock:
+            self.hits += 1
+        return value
+
+    def put(self, key, value):
+        """
+        Stores a result in memory and on disk. Disk errors are not fatal; a
+        value that cannot be pickled raises before anything is stored.
+        """
+        data = pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+        self._remember(key, value)
+        path = self._path(key)
+        tmp_path = None
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            is_new = not os.path.exists(path)
+            fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix='.tmp')
+            with os.fdopen(fd, 'wb') as f:
+                f.write(data)
+            # Atomic on POSIX and Windows: readers never see a partial file
+            os.replace(tmp_path, path)
+            tmp_path = None
+        except OSError as e:
+            logger.warning("%s write failed: %s", type(self).__name__, e)
+            return
+        finally:
+            if tmp_path is not None:
+                try:
+                    os.remove(tmp_path)
+                except OSError:
+                    pass
+        if is_new:
+            self._count_disk_entry()
+
+    def _count_disk_entry(self):
+        with self._lock:
+            if self._disk_entries is not None:
+                self._disk_entries += 1
+            due = self._disk_entries is None or self._disk_entries > self.max_disk_entries
+        if due:
+            self._prune_disk()
+
+    def _prune_disk(self):
+        """
+        Removes the oldest files beyond max_disk_entries, leaving a tenth of
+        the bound free so the directory is not rescanned on every write.
+        """
+        entries = []
+        for root, _, files in os.walk(self.cache_dir):
+            for name in files:
+                if name.endswith('.pkl'):
+                    path = os.path.join(root, name)
+                    try:
+                        entries.append((os.path.getmtime(path), path))
+                    except OSError:
+                        pass
+        if len(entries) > self.max_disk_entries:
+            entries.sort()
+            excess = len(entries) - (self.max_disk_entries - self.max_disk_entries // 10)
+            for _, path in entries[:excess]:
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+            entries = entries[excess:]
+        with self._lock:
+            self._disk_entries = len(entries)
+
+    def get_or_compute(self, key, compute):
+        """Returns the cached result for key, computing and storing it on a miss."""
+        value = self.get(key)
+        if value is None:
+            value = compute()
+            self.put(key, value)
+        return value
+
+    def clear(self, disk=False):
+        with self._lock:
+            self._memory.clear()
+            if disk:
+                self._disk_entries = None
+        if disk and os.path.isdir(self.cache_dir):
+            for root, _, files in os.walk(self.cache_dir):
+                for name in files:
+                    if name.endswith('.pkl'):
+                        try:
+                            os.remove(os.path.join(root, name))
+                        except OSError:
+                            pass
+
+    def stats(self):
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                'entries': len(self._memory),
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': self.hits / total if total else 0.0,
+            }
@@ -0,0 +1,119 @@
+import hashlib
+import json
+import threading
+import time
+from collections import namedtuple
+from datetime import timedelta
+from functools import lru_cache
+
+from ai_clients import key_fingerprint
+from prompt_logic import count_tokens
+
+# messages: what is sent this turn; pinned: how many leading messages form
+# the stable prefix; dropped: older turns left out
+FittedChat = namedtuple('FittedChat', ['messages', 'pinned', 'dropped'])
+
+
+def prefix_hash(system_prompt, messages):
+    """Stable hash of a system prompt plus leading messages."""
+    raw = json.dumps([system_prompt, [[m['role'], m['content']] for m in messages]], ensure_ascii=False)
+    return hashlib.sha256(raw.encode('utf-8')).hexdigest()
+
+
+class ChatContext:
+    """
+    Keeps a long chat within a token budget. The first `pinned` messages
+    (the chart data and the first analysis) are sent verbatim every turn,
+    so together with the system prompt they form a prefix that providers
+    can cache. Once system prompt plus messages exceed the budget, the
+    oldest turns after that prefix are left out, and a short note listing
+    the questions that were asked is put in front of the first kept
+    question. The latest turn is always sent.
+    """
+
+    DEFAULT_BUDGET = 8000
+    PINNED = 2
+    NOTE_QUESTION_CHARS = 40
+
+    def __init__(self, budget=None, pinned=PINNED):
+        self.budget = self.DEFAULT_BUDGET if budget is None else budget
+        self.pinned = pinned
+
+    def _note(self, dropped):
+        questions = [m['content'].strip().replace('\n', ' ') for m in dropped if m['role'] == 'user']
+        quoted = "、".join(f"「{q[:self.NOTE_QUESTION_CHARS]}{'…' if len(q) > self.NOTE_QUESTION_CHARS else ''}」"
+                          for q in questions)
+        return f"（為控制篇幅，已省略較早的 {len(questions)} 輪對話。當時的提問：{quoted}）\n\n"
+
+    def fit(self, system_prompt, messages, provider=None):
+        pinned = min(self.pinned, len(messages))
+        rest = messages[pinned:]
+        fixed = count_tokens(system_prompt, provider) + sum(count_tokens(m['content'], provider) for m in messages[:pinned])
+        costs = [count_tokens(m['content'], provider) for m in rest]
+
+        # Candidate starts of the kept window: user messages, oldest first
+        starts = [i for i, m in enumerate(rest) if m['role'] == 'user'] or [0]
+        start = starts[0]
+        for start in starts:
+            note = self._note(rest[:start]) if start else ""
+            if fixed + count_tokens(note, provider) + sum(costs[start:]) <= self.budget:
+                break
+        if start == 0:
+            return FittedChat(list(messages), pinned, 0)
+
+        kept = [dict(m) for m in rest[start:]]
+        kept[0]['content'] = self._note(rest[:start]) + kept[0]['content']
+        return FittedChat(list(messages[:pinned]) + kept, pinned, start)
+
+
+class GeminiPrefixCache:
+    """
+    Gemini context caches (CachedContent) holding the system prompt and the
+    pinned messages, one per (API key, model, prefix), reused until shortly
+    before they expire. Prefixes below MIN_TOKENS are not cached (the API
+    rejects them); a failed creation is not retried for RETRY_SECONDS.
+    """
+
+    MIN_TOKENS = 4096
+    TTL_SECONDS = 3600
+    RETRY_SECONDS = 3600
+
+    def __init__(self, clock=time.time):
+        self.clock = clock
+        # key -> (CachedContent or None, valid until)
+        self._entries = {}
+        self._lock = threading.Lock()
+
+    def get(self, api_key, model_name, system_prompt, pinned_messages):
+        """CachedContent for this prefix, or None to send it in full."""
+        text = system_prompt + "".join(m['content'] for m in pinned_messages)
+        if not pinned_messages or count_tokens(text, 'Gemini') < self.MIN_TOKENS:
+            return None
+        key = (key_fingerprint(api_key), model_name, prefix_hash(system_prompt, pinned_messages))
+        now = self.clock()
+        with self._lock:
+            cached, valid_until = self._entries.get(key, (None, 0))
+            if now < valid_until:
+                return cached
+        try:
+            from google.generativeai import caching
+            cached = caching.CachedContent.create(
+                model=model_name if model_name.startswith('models/') else f"models/{model_name}",
+                system_instruction=system_prompt,
+                contents=[{"role": "user" if m["role"] == "user" else "model", "parts": [m["content"]]}
+                          for m in pinned_messages],
+                ttl=timedelta(seconds=self.TTL_SECONDS),
+            )
+            valid_until = now + self.TTL_SECONDS * 0.9
+        except Exception as e:
+            print(f"Gemini context cache unavailable for {model_name}: {e}")
+            cached, valid_until = None, now + self.RETRY_SECONDS
+        with self._lock:
+            self._entries[key] = (cached, valid_until)
+        return cached
+
+    @staticmethod
+    @lru_cache(maxsize=None)
+    def default():
+        """The process-wide Gemini prefix cache."""
+        return GeminiPrefixCache()
@@ -1,3 +1,4 @@
+import numpy as np
 from flatlib import const
 
 class DignitiesLogic:
@@ -98,63 +99,106 @@ class DignitiesLogic:
         const.CAPRICORN: const.SATURN, const.AQUARIUS: const.SATURN, const.PISCES: const.JUPITER
     }
 
+    # Essential dignity flags (bit mask), in display order with their scores
+    DOMICILE, DETRIMENT, EXALTATION, FALL = 1, 2, 4, 8
+    TRIPLICITY_DAY, TRIPLICITY_NIGHT, TRIPLICITY_PART = 16, 32, 64
+    TERM, FACE = 128, 256
+
+    DIGNITY_LABELS = [
+        (DOMICILE, "廟 (Domicile)", 5),
+        (DETRIMENT, "陷 (Detriment)", -5),
+        (EXALTATION, "旺 (Exaltation)", 4),
+        (FALL, "弱 (Fall)", -4),
+        (TRIPLICITY_DAY, "三分 (Triplicity - Day)", 3),
+        (TRIPLICITY_NIGHT, "三分 (Triplicity - Night)", 3),
+        (TRIPLICITY_PART, "三分 (Triplicity - Part.)", 3),
+        (TERM, "界 (Term)", 2),
+        (FACE, "面 (Face)", 1),
+    ]
+
+    # Row order of the compiled tables
+    PLANETS = [const.SUN, const.MOON, const.MERCURY, const.VENUS, const.MARS, const.JUPITER, const.SATURN]
+    PLANET_INDEX = {p_id: i for i, p_id in enumerate(PLANETS)}
+
+    _tables = None
+
+    @classmethod
+    def compiled_tables(cls):
+        """
+        Compiles the whole dignity system once per process into dense
+        (sect, planet, degree) arrays: `flags` (uint16 bit mask) and `scores`
+        (int8). Sect index 0 = night, 1 = day. Every boundary (signs, terms,
+        faces) falls on a whole degree, so one entry per degree is exact.
+        """
+        if cls._tables is None:
+            flags = np.zeros((2, len(cls.PLANETS), 360), dtype=np.uint16)
+            for deg in range(360):
+                sign_const = const.LIST_SIGNS[deg // 30]
+                sign_deg = deg % 30
+                element = cls.SIGN_ELEMENTS[sign_const]
+                tri_lords = cls.TRIPLICITIES[element]
+                exalt = cls.EXALTATIONS.get(sign_const)
+                term_ruler = next(ruler for max_deg, ruler in cls.TERMS[sign_const] if sign_deg < max_deg)
+                face_ruler = cls.FACES[sign_const][sign_deg // 10]
+                for p_idx, p_id in enumerate(cls.PLANETS):
+                    for sect in (0, 1):
+                        f = 0
+                        if cls.RULERS[sign_const] == p_id:
+                            f |= cls.DOMICILE
+                        elif cls.DETRIMENTS[sign_const] == p_id:
+                            f |= cls.DETRIMENT
+                        if exalt and exalt[0] == p_id:
+                            f |= cls.EXALTATION
+                        elif cls.FALLS.get(sign_const) == p_id:
+                            f |= cls.FALL
+                        if sect and tri_lords[0] == p_id:
+                            f |= cls.TRIPLICITY_DAY
+                        elif not sect and tri_lords[1] == p_id:
+                            f |= cls.TRIPLICITY_NIGHT
+                        elif tri_lords[2] == p_id:
+                            f |= cls.TRIPLICITY_PART
+                        if term_ruler == p_id:
+                            f |= cls.TERM
+                        if face_ruler == p_id:
+                            f |= cls.FACE
+                        flags[sect, p_idx, deg] = f
+
+            scores = np.zeros(flags.shape, dtype=np.int8)
+            for bit, _, points in cls.DIGNITY_LABELS:
+                scores += ((flags & bit) != 0).astype(np.int8) * points
+            cls._tables = {'flags': flags, 'scores': scores}
+        return cls._tables
+
+    def essential_dignity_flags(self, p_id, lon, is_day):
+        """O(1) table read: (flag bit mask, score) for a planet at a longitude."""
+        p_idx = self.PLANET_INDEX.get(p_id)
+        if p_idx is None:
+            return 0, 0
+        tables = self.compiled_tables()
+        deg = int(lon // 1) % 360
+        sect = 1 if is_day else 0
+        return int(tables['flags'][sect, p_idx, deg]), int(tables['scores'][sect, p_idx, deg])
+
+    def score_essential_dignities(self, planet_idx, lons, is_day):
+        """
+        Vectorized scoring. planet_idx (indices into PLANETS), lons and is_day
+        are broadcast against each other; returns (flags, scores) arrays.
+        """
+        tables = self.compiled_tables()
+        deg = np.floor(np.asarray(lons, dtype=np.float64)).astype(np.int64) % 360
+        sect = np.asarray(is_day, dtype=bool).astype(np.int64)
+        idx = np.asarray(planet_idx, dtype=np.int64)
+        return tables['flags'][sect, idx, deg], tables['scores'][sect, idx, deg]
+
+    def dignity_labels(self, flags):
+        """Localizes a flag bit mask into display strings (render time only)."""
+        return [label for bit, label, _ in self.DIGNITY_LABELS if flags & bit]
+
     def calculate_essential_dignities(self, p_id, lon, is_day):
         """Calculates Essential Dignities and total score."""
-        sign_idx = int(lon // 30)
-        sign_deg = lon % 30
-        sign_const = const.LIST_SIGNS[sign_idx]
-        element = self.SIGN_ELEMENTS[sign_const]
-        
-        dignities = []
-        score = 0
-        
-        # 1. Domicile (+5)
-        if self.RULERS[sign_const] == p_id:
-            dignities.append("廟 (Domicile)")
-            score += 5
-        elif self.DETRIMENTS[sign_const] == p_id:
-            dignities.append("陷 (Detriment)")
-            score -= 5
-            
-        # 2. Exaltation (+4)
-        exalt = self.EXALTATIONS.get(sign_const)
-        if exalt and exalt[0] == p_id:
-            dignities.append("旺 (Exaltation)")
-            score += 4
-        elif self.FALLS.get(sign_const) == p_id:
-            dignities.append("弱 (Fall)")
-            score -= 4
-            
-        # 3. Triplicity (+3)
-        tri_lords = self.TRIPLICITIES[element]
-        if is_day and tri_lords[0] == p_id:
-             dignities.append("三分 (Triplicity - Day)")
-             score += 3
-        elif not is_day and tri_lords[1] == p_id:
-             dignities.append("三分 (Triplicity - Night)")
-             score += 3
-        elif tri_lords[2] == p_id:
-             dignities.append("三分 (Triplicity - Part.)")
-             score += 3
-             
-        # 4. Term (+2)
-        term_list = self.TERMS[sign_const]
-        for max_deg, ruler in term_list:
-            if sign_deg < max_deg:
-                if ruler == p_id:
-                    dignities.append("界 (Term)")
-                    score += 2
-                break
-                
-        # 5. Face (+1)
-        face_list = self.FACES[sign_const]
-        face_idx = int(sign_deg // 10)
-        if face_list[face_idx] == p_id:
-            dignities.append("面 (Face)")
-            score += 1
-            
+        flags, score = self.essential_dignity_flags(p_id, lon, is_day)
         return {
-            'list': dignities,
+            'list': self.dignity_labels(flags),
             'score': score,
             'is_peregrine': score == 0
         }
@@ -0,0 +1,31 @@
+import os
+import threading
+
+import swisseph as swe
+
+# Bundled Swiss Ephemeris files (see setup_ephem.py)
+EPHEM_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'ephem')
+
+_lock = threading.Lock()
+_ephe_path = None
+
+
+def init_ephemeris(path=None):
+    """
+    Points the Swiss Ephemeris at the bundled data files once per process.
+    Safe to call from every constructor; later calls are a no-op.
+    Returns the path in effect (None if the directory is missing and the
+    library defaults are used).
+    """
+    global _ephe_path
+    if _ephe_path is not None:
+        return _ephe_path
+    with _lock:
+        if _ephe_path is None:
+            ephem_path = path or os.environ.get('ASTRO_EPHEM_PATH') or EPHEM_DIR
+            if os.path.exists(ephem_path):
+                swe.set_ephe_path(ephem_path)
+                _ephe_path = ephem_path
+            else:
+                _ephe_path = ''
+    return _ephe_path or None
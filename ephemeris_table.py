@@ -0,0 +1,164 @@
+"""
+Precomputed ephemeris of the seven classical planets as a memory-mapped
+array, interpolated with cubic Hermite splines (positions + speeds).
+
+    python ephemeris_table.py [start_year end_year]
+
+builds ephem/table_1800_2200.npy (~65 MB) from the Swiss Ephemeris.
+"""
+import json
+import logging
+import os
+import sys
+import threading
+
+import numpy as np
+import swisseph as swe
+from flatlib import const
+
+from ephemeris import EPHEM_DIR, init_ephemeris
+
+BODIES = [const.SUN, const.MOON, const.MERCURY, const.VENUS, const.MARS, const.JUPITER, const.SATURN]
+SWE_IDS = [swe.SUN, swe.MOON, swe.MERCURY, swe.VENUS, swe.MARS, swe.JUPITER, swe.SATURN]
+BODY_INDEX = {b: i for i, b in enumerate(BODIES)}
+
+# Columns of the last axis
+LON, LAT, LON_SPEED, LAT_SPEED = range(4)
+
+# Half-day samples stay within 0.3" of swe.calc_ut for every body, including
+# the hours around solar conjunctions where light deflection bends the path
+STEP_DAYS = 0.5
+DEFAULT_TABLE_PATH = os.path.join(EPHEM_DIR, 'table_1800_2200.npy')
+
+logger = logging.getLogger(__name__)
+
+
+def _meta_path(path):
+    return os.path.splitext(path)[0] + '.json'
+
+
+def build_table(path=DEFAULT_TABLE_PATH, start_year=1800, end_year=2200, step=STEP_DAYS):
+    """
+    Writes a (n_samples, 7, 4) float64 .npy file of lon, lat, lon speed and
+    lat speed at every `step` days from Jan 1 of start_year to Jan 1 of
+    end_year (UT), plus a .json sidecar with the time axis.
+    """
+    init_ephemeris()
+    start_jd = swe.julday(start_year, 1, 1, 0.0)
+    end_jd = swe.julday(end_year, 1, 1, 0.0)
+    n = int(round((end_jd - start_jd) / step)) + 1
+
+    tmp, meta_tmp = path + '.tmp', _meta_path(path) + '.tmp'
+    try:
+        table = np.lib.format.open_memmap(tmp, mode='w+', dtype=np.float64, shape=(n, len(BODIES), 4))
+        calc_ut = swe.calc_ut
+        for i in range(n):
+            t = start_jd + i * step
+            for j, body in enumerate(SWE_IDS):
+                xx = calc_ut(t, body)[0]
+                table[i, j] = (xx[0], xx[1], xx[3], xx[4])
+        table.flush()
+        del table
+
+        meta = {
+            'start_jd': start_jd, 'step': step, 'n': n,
+            'bodies': BODIES, 'swe_version': swe.version,
+        }
+        with open(meta_tmp, 'w', encoding='utf-8') as f:
+            json.dump(meta, f)
+        # Both files are complete before either replaces the old build; the
+        # sidecar goes last, and EphemerisTable checks that the two agree
+        os.replace(tmp, path)
+        os.replace(meta_tmp, _meta_path(path))
+    finally:
+        for leftover in (tmp, meta_tmp):
+            if os.path.exists(leftover):
+                os.remove(leftover)
+    return EphemerisTable(path)
+
+
+class EphemerisTable:
+    """
+    Read-only view of a built table. The array is memory-mapped, so every
+    process opening the same file shares its pages through the OS cache.
+    Raises ValueError if the table was built by another Swiss Ephemeris
+    version or does not match its .json sidecar.
+    """
+
+    def __init__(self, path=DEFAULT_TABLE_PATH):
+        with open(_meta_path(path), encoding='utf-8') as f:
+            meta = json.load(f)
+        if meta.get('swe_version') != swe.version:
+            raise ValueError(f"{path} was built with swisseph {meta.get('swe_version')}, running {swe.version}: rebuild it")
+        self.path = path
+        self.start_jd = meta['start_jd']
+        self.step = meta['step']
+        self.data = np.load(path, mmap_mode='r')
+        if self.data.shape != (meta['n'], len(BODIES), 4):
+            raise ValueError(f"{path} does not match its metadata (interrupted build?): rebuild it")
+        self.end_jd = self.start_jd + (self.data.shape[0] - 1) * self.step
+
+    def covers(self, jd_min, jd_max):
+        return self.start_jd <= jd_min and jd_max <= self.end_jd
+
+    def lookup(self, jd, bodies=None):
+        """
+        Interpolated (lon, lat, lon_speed) at UT Julian day(s) jd, each of
+        shape (len(jd), len(bodies)). Longitudes are in [0, 360).
+        """
+        jd = np.atleast_1d(np.asarray(jd, dtype=np.float64))
+        cols = [BODY_INDEX[b] for b in (bodies or BODIES)]
+        if not self.covers(jd.min(), jd.max()):
+            raise ValueError(f"JD outside table range {self.start_jd}..{self.end_jd}")
+
+        x = (jd - self.start_jd) / self.step
+        i = np.minimum(np.floor(x).astype(np.int64), self.data.shape[0] - 2)
+        s = (x - i)[:, None]
+        r0 = self.data[i][:, cols]
+        r1 = self.data[i + 1][:, cols]
+        h = self.step
+
+        p0 = r0[..., LON]
+        # Unwrap the 360 -> 0 step before interpolating
+        p1 = p0 + ((r1[..., LON] - p0 + 180.0) % 360.0 - 180.0)
+        lon, lon_speed = self._hermite(p0, p1, r0[..., LON_SPEED] * h, r1[..., LON_SPEED] * h, s)
+        lat, _ = self._hermite(r0[..., LAT], r1[..., LAT], r0[..., LAT_SPEED] * h, r1[..., LAT_SPEED] * h, s)
+        return lon % 360.0, lat, lon_speed / h
+
+    @staticmethod
+    def _hermite(p0, p1, m0, m1, s):
+        """Cubic Hermite value and derivative (per unit s) on [0, 1]."""
+        s2, s3 = s * s, s * s * s
+        value = (2 * s3 - 3 * s2 + 1) * p0 + (s3 - 2 * s2 + s) * m0 + (-2 * s3 + 3 * s2) * p1 + (s3 - s2) * m1
+        deriv = (6 * s2 - 6 * s) * p0 + (3 * s2 - 4 * s + 1) * m0 + (-6 * s2 + 6 * s) * p1 + (3 * s2 - 2 * s) * m1
+        return value, deriv
+
+
+_table_lock = threading.Lock()
+_table = None
+
+
+def default_table():
+    """
+    The process-wide table at ASTRO_EPHEM_TABLE (or the default path),
+    opened on first use; None if it has not been built or is stale.
+    """
+    global _table
+    if _table is None:
+        with _table_lock:
+            if _table is None:
+                path = os.environ.get('ASTRO_EPHEM_TABLE') or DEFAULT_TABLE_PATH
+                _table = False
+                if os.path.exists(_meta_path(path)):
+                    try:
+                        _table = EphemerisTable(path)
+                    except ValueError as e:
+                        # Callers compute with the Swiss Ephemeris directly instead
+                        logger.warning("%s", e)
+    return _table or None
+
+
+if __name__ == "__main__":
+    years = [int(a) for a in sys.argv[1:3]] or [1800, 2200]
+    out = build_table(start_year=years[0], end_year=years[1])
+    print(f"Wrote {out.path}: {out.data.shape}, {out.data.nbytes / 1e6:.1f} MB")
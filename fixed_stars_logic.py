@@ -0,0 +1,105 @@
+import csv
+import os
+from collections import namedtuple
+from functools import lru_cache
+
+import numpy as np
+
+STARS_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data', 'fixed_stars.csv')
+
+J2000 = 2451545.0
+DAYS_PER_YEAR = 365.25
+
+# Column arrays of the catalog, one entry per star.
+# lon/lat: mean ecliptic of date at J2000 (degrees); motion: annual change of
+# longitude in arc-seconds (general precession plus the star's proper motion)
+StarCatalog = namedtuple('StarCatalog', ['name', 'zh', 'bayer', 'lon', 'lat', 'mag', 'motion'])
+
+
+@lru_cache(maxsize=None)
+def load_catalog(path=STARS_PATH):
+    """Bundled catalog (data/fixed_stars.csv), loaded once per process."""
+    with open(path, encoding='utf-8', newline='') as f:
+        rows = list(csv.DictReader(f))
+    return StarCatalog(
+        name=[r['name'] for r in rows],
+        zh=[r['zh'] for r in rows],
+        bayer=[r['bayer'] for r in rows],
+        lon=np.array([float(r['lon']) for r in rows]),
+        lat=np.array([float(r['lat']) for r in rows]),
+        mag=np.array([float(r['mag']) for r in rows]),
+        motion=np.array([float(r['motion']) for r in rows]),
+    )
+
+
+class FixedStarsLogic:
+    # Conjunction orb by brightness: (faintest magnitude, orb in degrees)
+    ORBS_BY_MAGNITUDE = [(1.5, 1.5), (2.5, 1.0), (99.0, 0.5)]
+    # Stars fainter than this are left out of chart reports
+    MAX_MAGNITUDE = 2.5
+
+    def __init__(self, path=STARS_PATH):
+        self.path = path
+
+    @property
+    def catalog(self):
+        return load_catalog(self.path)
+
+    def orb(self, mag):
+        for max_mag, orb in self.ORBS_BY_MAGNITUDE:
+            if mag <= max_mag:
+                return orb
+        return self.ORBS_BY_MAGNITUDE[-1][1]
+
+    def label(self, idx):
+        """Display name, e.g. 'Regulus (軒轅十四)'."""
+        cat = self.catalog
+        return f"{cat.name[idx]} ({cat.zh[idx]})" if cat.zh[idx] else cat.name[idx]
+
+    def longitudes(self, jd):
+        """Every star's tropical longitude at jd, precessed from J2000."""
+        cat = self.catalog
+        years = (jd - J2000) / DAYS_PER_YEAR
+        return (cat.lon + cat.motion * years / 3600.0) % 360.0
+
+    def sorted_positions(self, jd, max_magnitude=None):
+        """(longitudes ascending, catalog indices) of the stars bright enough."""
+        cat = self.catalog
+        max_magnitude = self.MAX_MAGNITUDE if max_magnitude is None else max_magnitude
+        idx = np.flatnonzero(cat.mag <= max_magnitude)
+        lons = self.longitudes(jd)[idx]
+        order = np.argsort(lons, kind='stable')
+        return lons[order], idx[order]
+
+    def find_conjunctions(self, points, jd, max_magnitude=None, margin=0.0):
+        """
+        Stars within their orb (plus margin) of each point.
+        points: {id: longitude}. Returns a list of
+        {'point', 'star', 'star_lon', 'orb'} ordered by point, then orb; 'star'
+        is the catalog index. Each point costs two binary searches over the
+        sorted longitudes, however large the catalog.
+        """
+        lons, idx = self.sorted_positions(jd, max_magnitude)
+        if len(lons) == 0:
+            return []
+        # Three laps so that windows around 0° Aries need no special case
+        ext = np.concatenate([lons - 360.0, lons, lons + 360.0])
+        ext_idx = np.concatenate([idx, idx, idx])
+        window = self.ORBS_BY_MAGNITUDE[0][1] + margin
+
+        ids = list(points)
+        p_lons = np.array([points[p] for p in ids], dtype=np.float64) % 360.0
+        lo = np.searchsorted(ext, p_lons - window, side='left')
+        hi = np.searchsorted(ext, p_lons + window, side='right')
+
+        mags = self.catalog.mag
+        found = []
+        for p_id, p_lon, a, b in zip(ids, p_lons, lo, hi):
+            hits = []
+            for k in range(a, b):
+                star = int(ext_idx[k])
+                diff = abs(p_lon - ext[k])
+                if diff <= self.orb(mags[star]) + margin:
+                    hits.append({'point': p_id, 'star': star, 'star_lon': ext[k] % 360.0, 'orb': diff})
+            found.extend(sorted(hits, key=lambda h: h['orb']))
+        return found
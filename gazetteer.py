@@ -0,0 +1,102 @@
+import bisect
+import csv
+import difflib
+import os
+import unicodedata
+from collections import namedtuple
+from functools import lru_cache
+
+GAZETTEER_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data', 'gazetteer.csv')
+
+Place = namedtuple('Place', ['name', 'country', 'lat', 'lon', 'timezone'])
+
+# Variant characters folded to one form so that 臺北 and 台北 share a key
+_CHAR_FOLDS = str.maketrans({'臺': '台', '・': '', '·': ''})
+# Administrative suffixes that users may or may not type
+_SUFFIXES = ('市', '縣', '县', ' city', ' county')
+
+
+def normalize_place_name(name, strip_suffix=True):
+    """Canonical lookup key: NFKC, case-folded, variant-folded, no spaces (or suffix)."""
+    key = unicodedata.normalize('NFKC', name or '').casefold().strip()
+    key = key.translate(_CHAR_FOLDS)
+    if strip_suffix:
+        for suffix in _SUFFIXES:
+            if key.endswith(suffix) and len(key) > len(suffix):
+                key = key[:-len(suffix)]
+                break
+    return ''.join(ch for ch in key if ch.isalnum())
+
+
+class Gazetteer:
+    """
+    Offline city index. Every name and alias is normalized into a sorted
+    key array, so exact lookups are a dict read and prefix queries are a
+    bisect over the array (a flattened trie).
+    """
+
+    def __init__(self, places_with_names):
+        self.places = []
+        exact = {}
+        entries = list(places_with_names)
+        # Full names first so that 新竹市 and 新竹縣 keep their own entries;
+        # the suffix-less forms only fill the gaps
+        for strip_suffix in (False, True):
+            for idx, (place, names) in enumerate(entries):
+                if not strip_suffix:
+                    self.places.append(place)
+                for n in names:
+                    key = normalize_place_name(n, strip_suffix)
+                    if key:
+                        exact.setdefault(key, idx)
+        self._exact = exact
+        self._keys = sorted(exact)
+        self._key_places = [exact[k] for k in self._keys]
+
+    @classmethod
+    def from_csv(cls, path=GAZETTEER_PATH):
+        rows = []
+        with open(path, encoding='utf-8', newline='') as f:
+            for row in csv.DictReader(f):
+                place = Place(row['name'], row['country'], float(row['lat']), float(row['lon']), row['timezone'])
+                aliases = [a for a in row['aliases'].split('|') if a]
+                rows.append((place, [row['name']] + aliases))
+        return cls(rows)
+
+    @staticmethod
+    @lru_cache(maxsize=None)
+    def default():
+        """The bundled gazetteer, loaded once per process."""
+        return Gazetteer.from_csv()
+
+    def __len__(self):
+        return len(self.places)
+
+    def lookup(self, name):
+        """Exact (normalized) match or None."""
+        idx = self._exact.get(normalize_place_name(name, strip_suffix=False))
+        if idx is None:
+            idx = self._exact.get(normalize_place_name(name))
+        return self.places[idx] if idx is not None else None
+
+    def suggest(self, text, limit=8):
+        """
+        Places whose name or alias starts with text; if nothing does, the
+        closest spellings instead. Results are unique and at most `limit`.
+        """
+        prefix = normalize_place_name(text)
+        if not prefix:
+            return []
+        found = []
+        i = bisect.bisect_left(self._keys, prefix)
+        while i < len(self._keys) and self._keys[i].startswith(prefix) and len(found) < limit:
+            idx = self._key_places[i]
+            if idx not in found:
+                found.append(idx)
+            i += 1
+        if not found:
+            for key in difflib.get_close_matches(prefix, self._keys, n=limit, cutoff=0.6):
+                idx = self._exact[key]
+                if idx not in found:
+                    found.append(idx)
+        return [self.places[idx] for idx in found]
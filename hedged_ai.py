@@ -0,0 +1,200 @@
+import asyncio
+import contextlib
+import queue
+import threading
+import time
+from collections import deque
+from functools import lru_cache
+
+
+class LatencyTracker:
+    """
+    Recent time-to-first-token samples per (provider, model). The hedge
+    delay for a provider is a high quantile of its samples, so the backup
+    is only called for requests slower than usual; until MIN_SAMPLES are
+    seen the default delay is used.
+    """
+
+    DEFAULT_DELAY = 2.0
+    MIN_DELAY = 0.3
+    MAX_DELAY = 10.0
+    MIN_SAMPLES = 5
+    QUANTILE = 0.9
+
+    def __init__(self, window=50):
+        self.window = window
+        self._samples = {}
+        self._lock = threading.Lock()
+
+    def record(self, provider, model, seconds):
+        with self._lock:
+            self._samples.setdefault((provider, model), deque(maxlen=self.window)).append(seconds)
+
+    def samples(self, provider, model):
+        with self._lock:
+            return list(self._samples.get((provider, model), ()))
+
+    def hedge_delay(self, provider, model):
+        """Seconds to wait for a first token before calling the backup."""
+        samples = sorted(self.samples(provider, model))
+        if len(samples) < self.MIN_SAMPLES:
+            return self.DEFAULT_DELAY
+        q = samples[min(len(samples) - 1, int(len(samples) * self.QUANTILE))]
+        return min(self.MAX_DELAY, max(self.MIN_DELAY, q))
+
+    def stats(self):
+        """{(provider, model): {'count', 'median', 'p90'}} in seconds."""
+        with self._lock:
+            items = {k: sorted(v) for k, v in self._samples.items() if v}
+        return {k: {'count': len(v), 'median': v[len(v) // 2], 'p90': v[min(len(v) - 1, int(len(v) * 0.9))]}
+                for k, v in items.items()}
+
+    @staticmethod
+    @lru_cache(maxsize=None)
+    def default():
+        """The process-wide latency record."""
+        return LatencyTracker()
+
+
+class HedgedAssistant:
+    """
+    Sends a chat to the primary AIAssistant and, if no first token arrives
+    within the hedge delay (or the primary fails first), to the backup as
+    well. Whichever produces a token first is streamed; the other is
+    cancelled. Drop-in for AIAssistant.generate_chat_stream.
+
+    Both requests run as asyncio tasks (AIAssistant.astream) on a shared
+    background event loop, so cancelling the loser aborts its HTTP request
+    even while it is still waiting for a first token.
+
+    delay: fixed hedge delay in seconds, None to adapt it from the
+    primary's recorded latency (see LatencyTracker).
+    """
+
+    def __init__(self, primary, backup, delay=None, latencies=None, clock=time.monotonic):
+        self.primary = primary
+        self.backup = backup if backup is not None and backup.is_configured else None
+        self.delay = delay
+        self.latencies = LatencyTracker.default() if latencies is None else latencies
+        self.clock = clock
+        self.winner = None
+
+    @property
+    def provider(self):
+        return self.primary.provider
+
+    @property
+    def is_configured(self):
+        return self.primary.is_configured or self.backup is not None
+
+    def cache_stats(self):
+        return self.primary.cache_stats()
+
+    def hedge_delay(self):
+        if self.delay is not None:
+            return self.delay
+        return self.latencies.hedge_delay(self.primary.provider, self.primary.model_name)
+
+    async def _pump(self, assistant, system_prompt, messages, events):
+        """Streams one assistant on the event loop, posting (assistant, kind, value) to events."""
+        try:
+            async with contextlib.aclosing(assistant.astream(system_prompt, messages)) as stream:
+                async for chunk in stream:
+                    await events.put((assistant, 'chunk', chunk))
+            await events.put((assistant, 'done', None))
+        except Exception as e:
+            await events.put((assistant, 'error', e))
+
+    async def _race(self, candidates, system_prompt, messages, emit):
+        """
+        Runs the hedged request, passing each chunk of the winner to emit.
+        The loser's task is cancelled, which aborts its HTTP request even
+        before it produced a first token.
+        """
+        events = asyncio.Queue()
+        tasks = {}
+        started = {}
+
+        def launch(assistant):
+            started[assistant] = self.clock()
+            tasks[assistant] = asyncio.create_task(self._pump(assistant, system_prompt, messages, events))
+
+        launch(candidates[0])
+        deadline = self.clock() + self.hedge_delay()
+        errors = {}
+        try:
+            # Wait for the first token from either side
+            while self.winner is None:
+                waiting = len(started) < len(candidates)
+                try:
+                    timeout = max(0.0, deadline - self.clock()) if waiting else None
+                    assistant, kind, value = await asyncio.wait_for(events.get(), timeout)
+                except asyncio.TimeoutError:
+                    launch(candidates[1])
+                    continue
+                if kind == 'chunk':
+                    self.winner = assistant
+                    self.latencies.record(assistant.provider, assistant.model_name, self.clock() - started[assistant])
+                    for other in started:
+                        if other is not assistant:
+                            tasks[other].cancel()
+                            if other is candidates[0]:
+                                # Lost the race: it took at least this long
+                                self.latencies.record(other.provider, other.model_name, self.clock() - started[other])
+                    emit(value)
+                    break
+                errors[assistant] = value or RuntimeError("empty response")
+                if waiting:
+                    launch(candidates[1])
+                elif len(errors) == len(started):
+                    emit("❌ " + "；".join(f"{a.provider} 對話發生錯誤：{e}" for a, e in errors.items()))
+                    return
+
+            while True:
+                assistant, kind, value = await events.get()
+                if assistant is not self.winner:
+                    continue
+                if kind == 'chunk':
+                    emit(value)
+                elif kind == 'error':
+                    emit(f"❌ {assistant.provider} 對話發生錯誤：{str(value)}")
+                    return
+                else:
+                    return
+        finally:
+            for task in tasks.values():
+                task.cancel()
+            await asyncio.gather(*tasks.values(), return_exceptions=True)
+
+    def generate_chat_stream(self, system_prompt, messages):
+        self.winner = None
+        candidates = [a for a in (self.primary, self.backup) if a is not None and a.is_configured]
+        if not candidates:
+            yield from self.primary.generate_chat_stream(system_prompt, messages)
+            return
+
+        out = queue.Queue()
+        race = asyncio.run_coroutine_threadsafe(
+            self._race(candidates, system_prompt, messages, out.put), _event_loop())
+        race.add_done_callback(lambda _: out.put(_FINISHED))
+        try:
+            while True:
+                chunk = out.get()
+                if chunk is _FINISHED:
+                    break
+                yield chunk
+            race.result()
+        finally:
+            # Stopped early by the caller: cancels both requests
+            race.cancel()
+
+
+_FINISHED = object()
+
+
+@lru_cache(maxsize=None)
+def _event_loop():
+    """Process-wide event loop on a daemon thread that runs the hedged races."""
+    loop = asyncio.new_event_loop()
+    threading.Thread(target=loop.run_forever, name="hedge-loop", daemon=True).start()
+    return loop
@@ -1,36 +1,31 @@
-import swisseph as swe
 from flatlib import const
 from flatlib.chart import Chart
 from flatlib.datetime import Datetime
 from flatlib.geopos import GeoPos
-from datetime import datetime, date
-import pandas as pd
+from datetime import datetime, date, timezone
+import threading
+import time
+from collections import OrderedDict
 from geopy.geocoders import ArcGIS
-from timezonefinder import TimezoneFinder
-import pytz
 
 # Modular Imports
 from dignities_logic import DignitiesLogic
 from aspects_logic import AspectsLogic
 from lots_logic import LotsLogic
 from time_lords_logic import TimeLordsLogic
-import streamlit as st
-import os
-
-@st.cache_resource
-def init_ephemeris():
-    """Initializes the Swiss Ephemeris path once."""
-    ephem_path = os.path.abspath('ephem')
-    if os.path.exists(ephem_path):
-        swe.set_ephe_path(ephem_path)
-    return True
+from transits_logic import TransitsLogic
+from calendar_logic import TimeLordCalendar
+from report_logic import ReportLogic
+from ephemeris import init_ephemeris
+from gazetteer import Gazetteer, normalize_place_name
+import timezones
 
 class AstrologyLogic:
     # Localization Dictionaries (Shared)
     TRANS_PLANETS = {
         const.SUN: '太陽', const.MOON: '月亮', const.MERCURY: '水星',
         const.VENUS: '金星', const.MARS: '火星', const.JUPITER: '木星',
-        const.SATURN: '土星', const.ASC: '上升點', 'Sun': '太陽',
+        const.SATURN: '土星', const.ASC: '上升點', const.MC: '天頂', 'Sun': '太陽',
         'Moon': '月亮', 'Mercury': '水星', 'Venus': '金星', 'Mars': '火星',
         'Jupiter': '木星', 'Saturn': '土星', 'Asc': '上升點', 'Ascendant': '上升點'
     }
@@ -66,7 +61,7 @@ class AstrologyLogic:
     }
 
     def __init__(self):
-        # Cache initialization
+        # Process-level initialization (no-op after the first call)
         init_ephemeris()
             
         # Initialize Logic Modules
@@ -74,29 +69,83 @@ class AstrologyLogic:
         self.aspects = AspectsLogic()
         self.lots = LotsLogic()
         self.time_lords = TimeLordsLogic()
-        self.tf = TimezoneFinder()
-
-    def get_timezone_info(self, lat, lon):
-        """Returns (timezone_name, utc_offset_hours) for given coordinates."""
+        self.transits = TransitsLogic()
+        self.calendar = TimeLordCalendar(self.time_lords, self.transits)
+        self.reports = ReportLogic(self)
+        self.gazetteer = Gazetteer.default()
+        # Remote geocoder results: normalized name -> (coords or None, timestamp),
+        # least recently used dropped beyond GEOCODE_CACHE_SIZE
+        self._geocode_cache = OrderedDict()
+        self._geocode_lock = threading.Lock()
+
+    def get_timezone_info(self, lat, lon, local_dt=None):
+        """
+        Returns (timezone_name, utc_offset_hours) for given coordinates.
+        The offset is the one in effect at local_dt (naive local wall time,
+        e.g. the birth moment); defaults to now.
+        """
         try:
-            tz_name = self.tf.timezone_at(lat=lat, lng=lon)
+            tz_name = timezones.timezone_at(lat, lon)
             if tz_name:
-                tz = pytz.timezone(tz_name)
-                # Get offset for NOW
-                now = datetime.now(pytz.utc)
-                offset_seconds = tz.utcoffset(now).total_seconds()
-                return tz_name, offset_seconds / 3600.0
+                return tz_name, self.get_utc_offset(tz_name, local_dt)
             return None, None
         except Exception:
             return None, None
 
+    def get_utc_offset(self, tz_name, local_dt=None):
+        """UTC offset (hours) of an IANA zone at local_dt, or now if omitted."""
+        if local_dt is None:
+            return timezones.utc_offset_at_utc(tz_name, datetime.now(timezone.utc))
+        return timezones.utc_offset_at(tz_name, local_dt)
+
+    # Seconds a remote "not found" answer is remembered before retrying
+    GEOCODE_NEGATIVE_TTL = 3600
+    GEOCODE_CACHE_SIZE = 1024
+
     def get_location_coordinates(self, location_name):
+        """Remote (ArcGIS) geocoding with positive and negative result caching."""
+        key = normalize_place_name(location_name)
+        with self._geocode_lock:
+            cached = self._geocode_cache.get(key)
+            if cached is not None:
+                self._geocode_cache.move_to_end(key)
+        if cached is not None:
+            coords, ts = cached
+            if coords is not None or time.monotonic() - ts < self.GEOCODE_NEGATIVE_TTL:
+                return coords
         try:
             geolocator = ArcGIS()
             location = geolocator.geocode(location_name, timeout=10)
-            return (location.latitude, location.longitude) if location else None
+            coords = (location.latitude, location.longitude) if location else None
         except Exception:
+            # Network errors are not cached; the next call retries
             return None
+        with self._geocode_lock:
+            self._geocode_cache[key] = (coords, time.monotonic())
+            self._geocode_cache.move_to_end(key)
+            while len(self._geocode_cache) > self.GEOCODE_CACHE_SIZE:
+                self._geocode_cache.popitem(last=False)
+        return coords
+
+    def resolve_location(self, location_name):
+        """
+        Returns {'name', 'lat', 'lon', 'timezone', 'source'} for a place name,
+        answering from the offline gazetteer and only falling back to the
+        remote geocoder on a miss. None if neither knows the place.
+        """
+        place = self.gazetteer.lookup(location_name)
+        if place:
+            return {'name': place.name, 'lat': place.lat, 'lon': place.lon,
+                    'timezone': place.timezone, 'source': 'gazetteer'}
+        coords = self.get_location_coordinates(location_name)
+        if coords:
+            return {'name': location_name, 'lat': coords[0], 'lon': coords[1],
+                    'timezone': None, 'source': 'geocoder'}
+        return None
+
+    def suggest_locations(self, text, limit=8):
+        """Offline prefix/fuzzy matches for the sidebar city input."""
+        return [p.name for p in self.gazetteer.suggest(text, limit)]
 
     def degree_to_dms(self, degree):
         d = int(degree)
@@ -162,8 +211,13 @@ class AstrologyLogic:
             })
         return res
 
-    def get_aspects(self, chart):
-        return self.aspects.get_aspects(chart, self.TRANS_PLANETS, self.PLANET_GLYPHS, self.TRANS_ASPECTS)
+    def get_aspects(self, chart, extra_points=None, orbs=None, timed=False):
+        return self.aspects.get_aspects(chart, self.TRANS_PLANETS, self.PLANET_GLYPHS, self.TRANS_ASPECTS, extra_points, orbs, timed)
+
+    def scan_transits(self, natal, start, end, transiting=None):
+        """Localized transit events (see TransitsLogic.scan), in time order."""
+        for ev in self.transits.scan(natal, start, end, transiting):
+            yield self.transits.format_event(ev, self.TRANS_PLANETS, self.PLANET_GLYPHS, self.TRANS_ASPECTS)
 
     def calculate_lots(self, chart, houses, is_day):
         return self.lots.calculate_lots(chart, houses, is_day, self.TRANS_SIGNS, self.TRANS_HOUSES)
@@ -174,5 +228,18 @@ class AstrologyLogic:
     def calculate_profections(self, chart, houses, birth_dt_str, current_date=None):
         return self.time_lords.calculate_profections(chart, self.TRANS_SIGNS, self.PLANET_GLYPHS, self.TRANS_PLANETS, birth_dt_str, current_date)
 
+    def profection_range(self, chart, birth_dt_str, start, end, unit='year'):
+        return self.time_lords.profection_range(chart, self.TRANS_SIGNS, self.PLANET_GLYPHS, self.TRANS_PLANETS, birth_dt_str, start, end, unit)
+
+    def time_lord_events(self, birth_dt_str, asc_lon, is_day, start, end=None, natal=None, monthly=False):
+        """Localized, time-ordered event stream (see TimeLordCalendar.events)."""
+        birth_date = datetime.strptime(birth_dt_str, '%Y/%m/%d').date()
+        for ev in self.calendar.events(birth_date, int(asc_lon // 30), is_day, start, end, natal, monthly):
+            yield self.calendar.format_event(ev, self.TRANS_SIGNS, self.TRANS_PLANETS, self.PLANET_GLYPHS, self.TRANS_ASPECTS)
+
     def get_firdaria_data(self, birth_dt_str, is_day, current_date=None):
         return self.time_lords.get_firdaria_data(birth_dt_str, is_day, current_date)
+
+    def build_report(self, chart_type, birth_date_str, birth_time_str, offset_str, lat, lon, location, target_date, key=None):
+        """Full chart pipeline as a ChartReport (see ReportLogic)."""
+        return self.reports.build(chart_type, birth_date_str, birth_time_str, offset_str, lat, lon, location, target_date, key)
@@ -1,32 +1,61 @@
+import numpy as np
+import swisseph as swe
 from flatlib import const
 
+from fixed_stars_logic import FixedStarsLogic
+
 class LotsLogic:
+    # Chart points a lot formula can use, besides earlier lots, equal-house
+    # cusps H1..H12 and constant longitudes in degrees
+    LOT_INPUTS = [const.ASC, const.SUN, const.MOON, const.MERCURY, const.VENUS, const.MARS, const.JUPITER, const.SATURN]
+
+    # (key, name, formula by day, by night: True reverses the day formula,
+    # False keeps it, a string replaces it). Reversing swaps every term after
+    # the first, e.g. Fortune: Asc + Moon - Sun by day, Asc + Sun - Moon by night.
+    LOTS = [
+        ('Fortune', '幸運點 (Fortune)', 'Asc + Moon - Sun', True),
+        ('Spirit', '精神點 (Spirit)', 'Asc + Sun - Moon', True),
+        ('Eros', '愛情點 (Eros)', 'Asc + Venus - Spirit', True),
+        ('Necessity', '必要點 (Necessity)', 'Asc + Fortune - Mercury', True),
+        ('Courage', '勇氣點 (Courage)', 'Asc + Fortune - Mars', True),
+        ('Victory', '勝利點 (Victory)', 'Asc + Jupiter - Spirit', True),
+        ('Nemesis', '報應點 (Nemesis)', 'Asc + Fortune - Saturn', True),
+        ('Basis', '基礎點 (Basis)', 'Asc + Fortune - Spirit', True),
+        # 19° Aries (Sun's exaltation) by day, 3° Taurus (Moon's) by night
+        ('Exaltation', '擢升點 (Exaltation)', 'Asc + 19 - Sun', 'Asc + 33 - Moon'),
+        ('Marriage', '婚姻點 (Marriage)', 'Asc + Venus - Saturn', False),
+        ('Father', '父親點 (Father)', 'Asc + Saturn - Sun', True),
+        ('Mother', '母親點 (Mother)', 'Asc + Moon - Venus', True),
+        ('Siblings', '手足點 (Siblings)', 'Asc + Jupiter - Saturn', False),
+        ('Children', '子女點 (Children)', 'Asc + Saturn - Jupiter', True),
+        ('Illness', '疾病點 (Illness)', 'Asc + Mars - Saturn', True),
+        ('Death', '死亡點 (Death)', 'Saturn + H8 - Moon', False),
+    ]
+
+    _compiled = None
+
+    # Chart points checked against the fixed stars
+    STAR_POINTS = [const.SUN, const.MOON, const.MERCURY, const.VENUS, const.MARS, const.JUPITER, const.SATURN, const.ASC, const.MC]
+    # Catalog candidates are widened by this much before the exact check
+    STAR_MARGIN = 0.1
+
+    def __init__(self):
+        self.stars = FixedStarsLogic()
+
     def calculate_lots(self, chart, houses, is_day, trans_signs, trans_houses):
-        """Calculates Part of Fortune and Part of Spirit."""
-        asc = chart.get(const.ASC)
-        sun = chart.get(const.SUN)
-        moon = chart.get(const.MOON)
-        
-        # Part of Fortune: Asc + Moon - Sun (Day), Asc + Sun - Moon (Night)
-        if is_day:
-            pof_lon = (asc.lon + moon.lon - sun.lon) % 360
-            pos_lon = (asc.lon + sun.lon - moon.lon) % 360
-        else:
-            pof_lon = (asc.lon + sun.lon - moon.lon) % 360
-            pos_lon = (asc.lon + moon.lon - sun.lon) % 360
-            
+        """Calculates every lot in LOTS for one chart, placed by sign and (equal) house."""
+        values = np.array([[chart.get(p_id).lon for p_id in self.LOT_INPUTS]])
+        lons = self.evaluate_lots(values, np.array([is_day]))[0]
+        h1_lon = houses[0]['lon']
+
         lots = []
-        for name, lon in [("幸運點 (Fortune)", pof_lon), ("精神點 (Spirit)", pos_lon)]:
+        for (key, name, _, _), lon in zip(self.LOTS, lons):
             sign_idx = int(lon // 30)
             sign_deg = lon % 30
             d = int(sign_deg)
             m = int((sign_deg - d) * 60)
-            
-            # Find house
-            h1_lon = houses[0]['lon']
-            diff = (lon - h1_lon) % 360
-            house_num = int(diff // 30) + 1
-            
+            house_num = int(((lon - h1_lon) % 360) // 30) + 1
+
             lots.append({
                 'name': name,
                 'sign': trans_signs.get(const.LIST_SIGNS[sign_idx]),
@@ -35,26 +64,94 @@ class LotsLogic:
             })
         return lots
 
-    def get_fixed_stars(self, chart, trans_planets):
-        """Checks for conjunctions with major fixed stars."""
-        # 2026 Epoch (Approximate modern positions)
-        stars = {
-            'Regulus (軒轅十四)': 150.1, 
-            'Spica (角宿一)': 204.0     
-        }
-        
+    @classmethod
+    def compiled_lots(cls):
+        """
+        Compiles LOTS once per process into two (lot, input + 1) coefficient
+        matrices, index 0 = night and 1 = day; the last column is a constant
+        in degrees. References to earlier lots are expanded in place, so
+        every lot is a single linear combination of the chart inputs.
+        """
+        if cls._compiled is None:
+            cols = {p_id: i for i, p_id in enumerate(cls.LOT_INPUTS)}
+            n_cols = len(cls.LOT_INPUTS) + 1
+            asc_col = cols[const.ASC]
+            rows = ({}, {})
+            matrices = np.zeros((2, len(cls.LOTS), n_cols))
+            for lot_idx, (key, _, formula, night) in enumerate(cls.LOTS):
+                for sect in (0, 1):
+                    terms = cls._parse_formula(formula)
+                    if not sect:
+                        if night is True:
+                            terms = terms[:1] + [(-sign, token) for sign, token in terms[1:]]
+                        elif night:
+                            terms = cls._parse_formula(night)
+                    row = np.zeros(n_cols)
+                    for sign, token in terms:
+                        if token in cols:
+                            row[cols[token]] += sign
+                        elif token in rows[sect]:
+                            row += sign * rows[sect][token]
+                        elif token[0] == 'H' and token[1:].isdigit():
+                            # Equal houses: cusp n is the Ascendant plus (n - 1) signs
+                            row[asc_col] += sign
+                            row[-1] += sign * 30.0 * (int(token[1:]) - 1)
+                        else:
+                            try:
+                                row[-1] += sign * float(token)
+                            except ValueError:
+                                raise ValueError(f"Unknown term '{token}' in lot {key}") from None
+                    rows[sect][key] = row
+                    matrices[sect, lot_idx] = row
+            cls._compiled = matrices
+        return cls._compiled
+
+    @staticmethod
+    def _parse_formula(formula):
+        """'Asc + Moon - Sun' -> [(1, 'Asc'), (1, 'Moon'), (-1, 'Sun')]"""
+        tokens = formula.split()
+        terms = [(1, tokens[0])]
+        for op, token in zip(tokens[1::2], tokens[2::2]):
+            terms.append((1 if op == '+' else -1, token))
+        return terms
+
+    def evaluate_lots(self, values, is_day):
+        """
+        Vectorized evaluation for a batch of charts. values: (n, len(LOT_INPUTS))
+        longitudes; is_day: (n,) booleans. Returns (n, len(LOTS)) longitudes.
+        """
+        matrices = self.compiled_lots()
+        values = np.asarray(values, dtype=np.float64)
+        x = np.concatenate([values, np.ones((values.shape[0], 1))], axis=1)
+        day = x @ matrices[1].T
+        night = x @ matrices[0].T
+        return np.where(np.asarray(is_day, dtype=bool)[:, None], day, night) % 360.0
+
+    def get_fixed_stars(self, chart, trans_planets, max_magnitude=None):
+        """Conjunctions of the planets and angles with the catalog stars, precessed to the chart date."""
+        jd = chart.date.jd
+        points = {p_id: chart.get(p_id).lon for p_id in self.STAR_POINTS}
+
         findings = []
-        planets = [const.SUN, const.MOON, const.MERCURY, const.VENUS, const.MARS, const.JUPITER, const.SATURN]
-        
-        for p_id in planets:
-            p = chart.get(p_id)
-            for s_name, s_lon in stars.items():
-                diff = abs(p.lon - s_lon)
-                if diff > 180: diff = 360 - diff
-                if diff <= 1.5: # 1.5 degree orb for stars
-                    findings.append({
-                        'planet': trans_planets.get(p_id),
-                        'star': s_name,
-                        'orb': f"{round(diff, 2)}°"
-                    })
+        # Catalog positions select the candidates; the exact orb comes from
+        # the Swiss Ephemeris star file when it is available
+        for hit in self.stars.find_conjunctions(points, jd, max_magnitude, margin=self.STAR_MARGIN):
+            star_lon = self._star_lon(hit['star'], jd, hit['star_lon'])
+            diff = abs(points[hit['point']] - star_lon) % 360
+            if diff > 180: diff = 360 - diff
+            if diff <= self.stars.orb(self.stars.catalog.mag[hit['star']]):
+                findings.append({
+                    'planet': trans_planets.get(hit['point'], hit['point']),
+                    'star': self.stars.label(hit['star']),
+                    'orb': f"{round(diff, 2)}°"
+                })
         return findings
+
+    def _star_lon(self, star, jd, fallback):
+        try:
+            # By Bayer designation: traditional names are ambiguous in sefstars.txt
+            # (e.g. 'Ras Algethi' matches a Taurus star, not alpha Herculis)
+            return swe.fixstar2_ut(',' + self.stars.catalog.bayer[star], jd)[0][0]
+        except (swe.Error, KeyError):
+            # Star file missing or star not in it: the catalog position is close enough
+            return fallback
@@ -0,0 +1,96 @@
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+
+from ai_clients import key_fingerprint
+
+
+class ModelCatalog:
+    """
+    Discovered model lists per (provider, key fingerprint) with a TTL.
+    get() never waits on the network: it returns the cached list (even when
+    stale) or the fallback, and schedules at most one background refresh
+    per entry when the list is missing or older than the TTL. A failed
+    discovery is retried after ERROR_RETRY_SECONDS rather than a full TTL.
+    Least recently used entries are dropped beyond max_entries.
+    """
+
+    TTL_SECONDS = 6 * 3600
+    ERROR_RETRY_SECONDS = 60
+
+    def __init__(self, ttl=TTL_SECONDS, max_workers=2, clock=time.monotonic, max_entries=256):
+        self.ttl = ttl
+        self.clock = clock
+        self.max_entries = max_entries
+        # (provider, fingerprint) -> (models or None, time of the last attempt)
+        self._entries = OrderedDict()
+        self._refreshing = set()
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='model-catalog')
+        self.refreshes = 0
+        self.errors = 0
+
+    def get(self, provider, api_key, discover, fallback):
+        """
+        Cached model list for provider/key, or fallback if none yet.
+        discover: callable returning the provider's current list (may raise).
+        """
+        key = (provider, key_fingerprint(api_key))
+        with self._lock:
+            models, fetched_at = self._entries.get(key, (None, None))
+            if fetched_at is None:
+                due = True
+            elif models is None:
+                due = self.clock() - fetched_at >= self.ERROR_RETRY_SECONDS
+            else:
+                due = self.clock() - fetched_at >= self.ttl
+            if due and key not in self._refreshing:
+                self._refreshing.add(key)
+                self._executor.submit(self._refresh, key, discover)
+            if key in self._entries:
+                self._entries.move_to_end(key)
+        return list(models) if models else list(fallback)
+
+    def _refresh(self, key, discover):
+        try:
+            models = list(discover()) or None
+        except Exception as e:
+            print(f"Model discovery failed for {key[0]}: {e}")
+            models = None
+        with self._lock:
+            previous = self._entries.get(key, (None, None))[0]
+            now = self.clock()
+            if models is not None:
+                self._entries[key] = (models, now)
+                self.refreshes += 1
+            else:
+                # Keep serving the previous list, and try again soon
+                fetched_at = now - self.ttl + self.ERROR_RETRY_SECONDS if previous is not None else now
+                self._entries[key] = (previous, fetched_at)
+                self.errors += 1
+            self._refreshing.discard(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def is_refreshing(self, provider, api_key):
+        with self._lock:
+            return (provider, key_fingerprint(api_key)) in self._refreshing
+
+    def wait(self, timeout=None):
+        """Blocks until no refresh is running (for tests and warm-up scripts)."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            with self._lock:
+                if not self._refreshing:
+                    return True
+            if deadline is not None and time.monotonic() >= deadline:
+                return False
+            time.sleep(0.01)
+
+    @staticmethod
+    @lru_cache(maxsize=None)
+    def default():
+        """The process-wide catalog."""
+        return ModelCatalog()
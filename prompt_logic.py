@@ -0,0 +1,167 @@
+import re
+from collections import namedtuple
+
+try:
+    import tiktoken
+except ImportError:  # optional: exact counts for OpenAI-family models
+    tiktoken = None
+
+# A block of the prompt. Sections with a higher priority number are trimmed
+# first, one line at a time from the end, down to 'keep' lines; then the
+# whole section is dropped. Priority 0 is never trimmed.
+PromptSection = namedtuple('PromptSection', ['title', 'priority', 'lines', 'keep'])
+
+# Approximate tokenizer ratios per provider when no exact tokenizer is
+# available: (tokens per CJK/symbol character, ASCII characters per token)
+TOKEN_RATIOS = {
+    'OpenAI': (1.0, 4.0),
+    'OpenRouter': (1.0, 4.0),
+    'Groq': (1.4, 3.8),
+    'Gemini': (0.8, 4.0),
+}
+DEFAULT_RATIO = (1.2, 3.8)
+
+_ENGLISH_GLOSS = re.compile(r' ?\((?:[A-Z][A-Za-z ]*|Peregrine)\)')
+
+
+def count_tokens(text, provider=None):
+    """Token count of text for a provider's tokenizer (estimated unless tiktoken is installed)."""
+    if tiktoken is not None and provider in ('OpenAI', 'OpenRouter'):
+        return len(_encoding().encode(text))
+    wide_ratio, ascii_chars = TOKEN_RATIOS.get(provider, DEFAULT_RATIO)
+    wide = sum(1 for ch in text if ord(ch) > 0x7F)
+    return int(round(wide * wide_ratio + (len(text) - wide) / ascii_chars))
+
+
+def _encoding():
+    return tiktoken.get_encoding('o200k_base')
+
+
+def _short(label):
+    """Drops the English glosses, e.g. '果宮 (Cadent)' -> '果宮'."""
+    return _ENGLISH_GLOSS.sub('', label).strip()
+
+
+def format_coords(lat, lon):
+    """'25.03N, 121.50E' style coordinates; southern/western ones get S/W."""
+    return f"{abs(lat):.2f}{'S' if lat < 0 else 'N'}, {abs(lon):.2f}{'W' if lon < 0 else 'E'}"
+
+
+class PromptLogic:
+    """
+    Compact chart serialization for AI prompts, built from a ChartReport.
+    Sections are ordered by value and trimmed to a token budget: the chart
+    itself is always sent, then aspects and current time lords, while the
+    house list, lots, stars and forecasts give way first.
+    """
+
+    DEFAULT_BUDGET = 1200
+    FIRDARIA_AHEAD = 6
+    MAX_TRANSITS = 24
+
+    def __init__(self, astro):
+        self.astro = astro
+
+    def sections(self, report):
+        astro = self.astro
+        kind = '本命盤' if report.chart_type == 'natal' else '卜卦盤'
+        sect = '日間盤' if report.is_day else '夜間盤'
+        out = [PromptSection(f"{kind} ({sect})", 0, [
+            f"時間：{report.birth_date} {report.birth_time}　地點：{report.location} ({format_coords(report.lat, report.lon)})",
+            f"上升 {report.asc}｜太陽 {report.sun}｜月亮 {report.moon}",
+        ], 2)]
+
+        planets = []
+        for p in report.planets:
+            dig = p['dignity']
+            essential = "、".join(_short(x) for x in dig['list']) or "無"
+            retro = "R" if p['retro'] else ""
+            planets.append(f"{p['symbol']}{p['name']} {p['sign']}{p['degree_str']}{retro} {p['house_num']}宮"
+                           f"｜本質 {essential} ({dig['score']})｜後天 {'、'.join(_short(x) for x in p['accidental'])}")
+        out.append(PromptSection("行星", 0, planets, len(planets)))
+
+        # Tightest aspects first, so trimming drops the widest
+        aspects = []
+        for a in sorted(report.aspects, key=lambda a: float(a['orb'].rstrip('°'))):
+            line = f"{a['p1']}-{a['p2']} {_short(a['aspect'])} {a['orb']}"
+            if a.get('phase'):
+                line += f" {_short(a['phase'])}"
+            if a.get('perfection'):
+                line += f" 正相位 {a['perfection'][:10]}"
+            if a['reception']:
+                line += f"｜{a['reception']}"
+            aspects.append(line)
+        out.append(PromptSection("相位", 1, aspects or ["無顯著相位"], min(len(aspects), 3) or 1))
+
+        if report.chart_type == 'natal':
+            pi = report.prof_info
+            act = report.f_data['active']
+            lords = [f"小限：{pi.get('age')} 歲，{pi.get('prof_sign')} (第 {pi.get('prof_house_num')} 宮)，年主星 {pi.get('lord_of_year')}"]
+            if act['major'] is not None:
+                lords.append(f"法達：大運 {astro.TRANS_PLANETS.get(act['major'], act['major'])} / "
+                             f"小運 {astro.TRANS_PLANETS.get(act['minor'], act['minor'])}，至 {act['end']:%Y/%m/%d}")
+            out.append(PromptSection("當前時間主星", 1, lords, len(lords)))
+
+        # Equal houses: one cusp degree, so signs and rulers suffice
+        houses = [f"{h['id']} {h['sign']}/{h['ruler']}" for h in report.houses]
+        out.append(PromptSection("宮位 (整宮制，主星)", 2, ["；".join(houses)], 1))
+
+        lots = [f"{_short(lot['name'])} {lot['sign']}{lot['degree']} {_short(lot['house'])}" for lot in report.lots]
+        stars = [f"{s['planet']} 合 {s['star']} ({s['orb']})" for s in report.fixed_stars]
+        out.append(PromptSection("希臘點", 3, lots, 2))
+        if stars:
+            out.append(PromptSection("恆星合相", 2, stars, 1))
+
+        if report.chart_type == 'natal':
+            future = [f"{p['year']}：{p['age']} 歲 {p['prof_sign']} (第 {p['prof_house_num']} 宮) {p['lord']}"
+                      for p in report.future_prof]
+            out.append(PromptSection("未來小限", 3, future, 2))
+
+            act = report.f_data['active']
+            upcoming = [
+                (major['lord'], minor['minor'], minor['start'])
+                for major in report.f_data['timeline'] for minor in major['subs']
+                if act['start'] is None or minor['start'] > act['start']
+            ][:self.FIRDARIA_AHEAD]
+            firdaria = [f"{start:%Y/%m/%d} 起：{astro.TRANS_PLANETS.get(m, m)} / {astro.TRANS_PLANETS.get(s, s)}"
+                        for m, s, start in upcoming]
+            if firdaria:
+                out.append(PromptSection("未來法達", 4, firdaria, 1))
+
+            transits = [f"{t['time'][:10]} 行運{t['transit']} {_short(t['aspect'])} {t['natal']}"
+                        for t in report.transits[:self.MAX_TRANSITS]]
+            if transits:
+                out.append(PromptSection("未來 12 個月行運", 5, transits, 0))
+        return out
+
+    @staticmethod
+    def _join(sections):
+        return "\n\n".join(f"## {s.title}\n" + "\n".join(s.lines) for s in sections if s.lines)
+
+    def serialize(self, report, provider=None, budget=None):
+        """Prompt text within budget tokens for provider (see count_tokens)."""
+        budget = self.DEFAULT_BUDGET if budget is None else budget
+        sections = [PromptSection(s.title, s.priority, list(s.lines), s.keep) for s in self.sections(report)]
+        cost = {id(s): [count_tokens(f"## {s.title}\n", provider) + 1] + [count_tokens(l, provider) + 1 for l in s.lines]
+                for s in sections}
+        total = sum(sum(c) for c in cost.values())
+
+        while total > budget:
+            trimmable = [s for s in sections if s.priority > 0 and s.lines]
+            if not trimmable:
+                break
+            # Lowest value first; among equals, the section listed last
+            s = max(reversed(trimmable), key=lambda s: s.priority)
+            c = cost[id(s)]
+            if len(s.lines) > s.keep:
+                s.lines.pop()
+                total -= c.pop()
+            else:
+                s.lines.clear()
+                total -= sum(c)
+                c.clear()
+        return self._join(sections)
+
+    def measure(self, text, providers=tuple(TOKEN_RATIOS)):
+        """{provider: token count} of a prompt."""
+        return {p: count_tokens(text, p) for p in providers}
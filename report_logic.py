@@ -0,0 +1,365 @@
+import html
+import json
+import threading
+from collections import OrderedDict, namedtuple
+from datetime import date, datetime, timedelta, timezone
+
+import numpy as np
+from flatlib import const
+from flatlib.chart import Chart
+from flatlib.datetime import Datetime
+from flatlib.geopos import GeoPos
+
+from chart_cache import ChartCache
+from prompt_logic import PromptLogic, format_coords
+from time_lords_logic import add_years
+from visuals import draw_wheel_svg
+
+# Everything a chart report shows, computed once per chart. 'key' is the
+# chart hash (see ChartCache.make_key) that rendered output is memoized on.
+ChartReport = namedtuple('ChartReport', [
+    'key', 'chart_type', 'title', 'generated_at',
+    'birth_date', 'birth_time', 'location', 'lat', 'lon', 'target_date',
+    'asc', 'sun', 'moon', 'planets', 'houses', 'aspects', 'lots', 'fixed_stars',
+    'is_day', 'prof_info', 'future_prof', 'lifetime_prof', 'f_data',
+    'transits', 'natal_points',
+])
+
+
+def _json_default(value):
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, np.generic):
+        return value.item()
+    return str(value)
+
+
+class ReportLogic:
+    """
+    Builds the ChartReport of a chart and renders it as Markdown, JSON, HTML,
+    the AI prompt, the chart wheel (SVG) or display tables. Rendered output is kept in a bounded LRU
+    keyed on (chart hash, format), shared by every session of the process.
+    """
+
+    TITLES = {'natal': '古典占星本命盤完整資料', 'horary': '古典占星卜卦盤解析資料'}
+    DEFAULT_TITLE = '古典占星命盤資料'
+    FUTURE_YEARS = 5
+    LIFETIME_YEARS = 90
+    TRANSIT_DAYS = 365
+
+    def __init__(self, astro, max_entries=256):
+        self.astro = astro
+        self.prompts = PromptLogic(astro)
+        self.max_entries = max_entries
+        self._rendered = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def report_key(chart_type, birth_date_str, birth_time_str, utc_offset, lat, lon, location, target_date):
+        """Chart hash of a report request (ChartCache.make_key); utc_offset in hours."""
+        local_moment = datetime.strptime(f"{birth_date_str} {birth_time_str}", '%Y/%m/%d %H:%M')
+        return ChartCache.make_key(
+            local_moment.replace(tzinfo=timezone(timedelta(hours=utc_offset))), lat, lon,
+            chart_type=chart_type, target_date=target_date.isoformat(), location=location,
+        )
+
+    def build(self, chart_type, birth_date_str, birth_time_str, offset_str, lat, lon, location, target_date, key=None):
+        """Runs the full chart pipeline once and returns its ChartReport."""
+        astro = self.astro
+        chart = Chart(Datetime(birth_date_str, birth_time_str, offset_str), GeoPos(lat, lon))
+        if key is None:
+            sign = -1 if offset_str.startswith('-') else 1
+            h, m = offset_str.lstrip('+-').split(':')
+            key = self.report_key(chart_type, birth_date_str, birth_time_str, sign * (int(h) + int(m) / 60),
+                                  lat, lon, location, target_date)
+
+        def position(obj):
+            deg, minute, _ = astro.degree_to_dms(obj.lon % 30)
+            return f"{astro.TRANS_SIGNS.get(obj.sign, obj.sign)} {deg}°{minute}'"
+
+        houses = astro.calculate_equal_houses(chart.get(const.ASC).lon)
+        is_day = astro.is_day_birth(chart, houses)
+        birth_d = datetime.strptime(birth_date_str, '%Y/%m/%d').date()
+
+        future_prof = []
+        transits, natal_points = [], None
+        if chart_type == 'natal':
+            # Profection years in effect on each of the next anniversaries of the target date
+            future = astro.profection_range(chart, birth_date_str, add_years(target_date, 1),
+                                            add_years(target_date, self.FUTURE_YEARS))
+            # Labelled by the year each period begins (the birthday), which for
+            # most births is not the year of the target date's anniversary
+            future_prof = [dict(p, year=p['start'].year) for p in future[-self.FUTURE_YEARS:]]
+            natal_points = astro.transits.natal_points(chart)
+            transits = list(astro.scan_transits(natal_points, target_date,
+                                                target_date + timedelta(days=self.TRANSIT_DAYS)))
+
+        return ChartReport(
+            key=key,
+            chart_type=chart_type,
+            title=self.TITLES.get(chart_type, self.DEFAULT_TITLE),
+            generated_at=datetime.now(),
+            birth_date=birth_date_str,
+            birth_time=birth_time_str,
+            location=location,
+            lat=lat,
+            lon=lon,
+            target_date=target_date,
+            asc=position(chart.get(const.ASC)),
+            sun=position(chart.get(const.SUN)),
+            moon=position(chart.get(const.MOON)),
+            planets=astro.get_planets_data(chart, houses),
+            houses=houses,
+            aspects=astro.get_aspects(chart, timed=True),
+            lots=astro.calculate_lots(chart, houses, is_day),
+            fixed_stars=astro.get_fixed_stars(chart),
+            is_day=is_day,
+            prof_info=astro.calculate_profections(chart, houses, birth_date_str, current_date=target_date),
+            future_prof=future_prof,
+            lifetime_prof=astro.profection_range(chart, birth_date_str, birth_d,
+                                                 add_years(birth_d, self.LIFETIME_YEARS))[:self.LIFETIME_YEARS],
+            f_data=astro.get_firdaria_data(birth_date_str, is_day, current_date=target_date),
+            transits=transits,
+            natal_points=natal_points,
+        )
+
+    # --- Memoized renderers ---
+
+    def render(self, report, fmt, *options):
+        """
+        Rendered report in fmt ('markdown', 'json', 'html', 'prompt', 'svg' or
+        'tables'); options are passed to the renderer and are part of the key.
+        """
+        renderer = getattr(self, f"_render_{fmt}", None)
+        if renderer is None:
+            raise ValueError(f"Unknown report format: {fmt}")
+        cache_key = (report.key, fmt) + options
+        with self._lock:
+            if cache_key in self._rendered:
+                self._rendered.move_to_end(cache_key)
+                return self._rendered[cache_key]
+
+        value = renderer(report, *options)
+        with self._lock:
+            self._rendered[cache_key] = value
+            while len(self._rendered) > self.max_entries:
+                self._rendered.popitem(last=False)
+        return value
+
+    def markdown(self, report):
+        return self.render(report, 'markdown')
+
+    def to_json(self, report):
+        return self.render(report, 'json')
+
+    def html(self, report):
+        return self.render(report, 'html')
+
+    def prompt(self, report, provider=None, budget=None):
+        """Compact chart data for the AI, within budget tokens (see PromptLogic)."""
+        return self.render(report, 'prompt', provider, budget)
+
+    def tables(self, report):
+        return self.render(report, 'tables')
+
+    def svg(self, report):
+        """Chart wheel (see visuals.draw_wheel_svg)."""
+        return self.render(report, 'svg')
+
+    def clear(self):
+        with self._lock:
+            self._rendered.clear()
+
+    # --- Renderers ---
+
+    def _planet(self, p_id):
+        return self.astro.TRANS_PLANETS.get(p_id, p_id)
+
+    def _firdaria_active(self, report):
+        """Lines on the active firdaria period."""
+        act = report.f_data['active']
+        if act['major'] is None:
+            return ["法達星限：目前日期不在 75 年週期內"]
+        return [
+            f"法達當前大運：{self._planet(act['major'])}",
+            f"法達當前小運：{self._planet(act['minor'])}",
+            f"下次換運日期：{act['end'].strftime('%Y/%m/%d')}",
+        ]
+
+    def _aspect_line(self, a):
+        rec = f" | 接納：{a['reception']}" if a['reception'] else ""
+        phase = f" | {a['phase']}" if a.get('phase') else ""
+        if a.get('perfection'):
+            verb = '將於' if a['phase'] == self.astro.aspects.TRANS_PHASES['applying'] else '已於'
+            phase += f"，{verb} {a['perfection']} 正相位"
+        return f"{a['p1']} - {a['p2']}：{a['aspect']} (誤差 {a['orb']}){phase}{rec}"
+
+    def _render_tables(self, report):
+        """Display tables: {name: (columns, rows)}."""
+        return {
+            'planets': (['行星', '位置', '宮位', '本質力量', '計分', '後天狀態'], [
+                [f"{p['symbol']} {p['name']}", f"{p['sign']} {p['degree_str']} {p['retro']}", p['house'],
+                 ", ".join(p['dignity']['list']) if p['dignity']['list'] else "無 (Peregrine)",
+                 p['dignity']['score'], ", ".join(p['accidental'])]
+                for p in report.planets
+            ]),
+            'houses': (['宮位名稱', '對應星座', '宮位主星'],
+                       [[h['id_str'], h['sign'], h['ruler']] for h in report.houses]),
+            'aspects': (['行星 1', '行星 2', '相位類型', '誤差', '入/離相位', '正相位時間', '接納關係'], [
+                [a['p1'], a['p2'], a['aspect'], a['orb'], a.get('phase') or '', a.get('perfection') or '', a['reception']]
+                for a in report.aspects
+            ]),
+            'lots': (['點位名稱', '星座', '度數', '宮位'],
+                     [[lot['name'], lot['sign'], lot['degree'], lot['house']] for lot in report.lots]),
+            'fixed_stars': (['行星', '恆星', '誤差'],
+                            [[s['planet'], s['star'], s['orb']] for s in report.fixed_stars]),
+            'future_prof': (['預測西元年', '年齡', '小限宮位', '年度主星'], [
+                [f"{p['year']} 年", f"{p['age']} 歲", f"{p['prof_sign']} (第 {p['prof_house_num']} 宮)", p['lord']]
+                for p in report.future_prof
+            ]),
+            'lifetime_prof': (['年齡', '開始日期', '小限星座', '小限宮位', '年度主星'], [
+                [p['age'], p['start'].strftime('%Y/%m/%d'), p['prof_sign'], p['prof_house_num'], p['lord']]
+                for p in report.lifetime_prof
+            ]),
+            'firdaria': (['大運', '小運', '開始日期', '結束日期'], [
+                [self._planet(major['lord']), self._planet(minor['minor']),
+                 minor['start'].strftime('%Y/%m/%d'), minor['end'].strftime('%Y/%m/%d')]
+                for major in report.f_data['timeline'] for minor in major['subs']
+            ]),
+            'transits': (['正相位時間', '行運行星', '相位類型', '本命點'],
+                         [[t['time'], t['transit'], t['aspect'], t['natal']] for t in report.transits]),
+        }
+
+    def _markdown_body(self, report):
+        md = "## 出生資訊\n\n"
+        md += f"- 生日：{report.birth_date} {report.birth_time}\n"
+        md += f"- 地點：{report.location} ({format_coords(report.lat, report.lon)})\n"
+        md += f"- 上升星座：{report.asc}\n"
+        md += f"- 太陽星座：{report.sun}\n"
+        md += f"- 月亮星座：{report.moon}\n\n"
+
+        md += "## 行星狀態與本質力量\n\n"
+        for p in report.planets:
+            d = p['dignity']
+            d_str = ", ".join(d['list']) if d['list'] else "無 (Peregrine)"
+            md += f"### {p['symbol']} {p['name']}\n"
+            md += f"- 位置：{p['sign']} {p['degree_str']} {p['retro']} | [{p['house']}]\n"
+            md += f"- 本質力量：{d_str} (總分: {d['score']})\n"
+            md += f"- 後天狀態：{', '.join(p['accidental'])}\n\n"
+
+        md += "## 特殊點位與恆星\n\n"
+        for lot in report.lots:
+            md += f"- {lot['name']}：{lot['sign']} {lot['degree']} ({lot['house']})\n"
+        for star in report.fixed_stars:
+            md += f"- 恆星合相：{star['planet']} 合相 {star['star']} (誤差 {star['orb']})\n"
+        md += "\n"
+
+        md += "## 宮位資料\n\n"
+        for h in report.houses:
+            h_deg, h_min, _ = self.astro.degree_to_dms(h['degree'])
+            md += f"- {h['id_str']}：{h['sign']} {h_deg}°{h_min}' (主：{h['ruler']})\n"
+        md += "\n"
+
+        md += "## 相位與接納\n\n"
+        if report.aspects:
+            for a in report.aspects:
+                md += f"- {self._aspect_line(a)}\n"
+        else:
+            md += "無顯著相位。\n"
+        md += "\n"
+
+        if report.chart_type == 'natal':
+            tables = self.tables(report)
+            pi = report.prof_info
+            md += "## 推運資訊\n\n"
+            md += f"- 小限分限：{pi.get('prof_sign')} (第 {pi.get('prof_house_num')} 宮)\n"
+            md += f"- 當前年主星：{pi.get('lord_of_year')}\n\n"
+            md += f"### 未來 {self.FUTURE_YEARS} 年小限主星預告\n"
+            md += self._markdown_table(*tables['future_prof']) + "\n"
+            md += "".join(f"- {line}\n" for line in self._firdaria_active(report)) + "\n"
+            md += "### 完整法達星限時間表\n"
+            md += self._markdown_table(*tables['firdaria']) + "\n"
+            if report.transits:
+                md += "### 未來 12 個月行運 (Transits)\n"
+                md += self._markdown_table(*tables['transits']) + "\n"
+        return md
+
+    @staticmethod
+    def _markdown_table(columns, rows):
+        out = "| " + " | ".join(columns) + " |\n"
+        out += "|" + "|".join("----------" for _ in columns) + "|\n"
+        for row in rows:
+            out += "| " + " | ".join(str(v) for v in row) + " |\n"
+        return out
+
+    def _render_markdown(self, report):
+        md = f"# {report.title} (升級版)\n\n"
+        md += f"產出時間：{report.generated_at.strftime('%Y/%m/%d %H:%M:%S')}\n\n"
+        md += "---\n\n"
+        md += self._markdown_body(report)
+        md += "---\n\n"
+        md += "## 🤖 AI 自動解析已就緒\n"
+        report_type = "本命盤" if report.chart_type == 'natal' else "卜卦占星盤"
+        md += f"目前的分析模式為：**{report_type}**。請點擊側邊欄的「🚀 啟動 AI 深度解析」開始互動。\n\n"
+        return md
+
+    def _render_prompt(self, report, provider=None, budget=None):
+        return self.prompts.serialize(report, provider, budget)
+
+    def _render_svg(self, report):
+        return draw_wheel_svg(report)
+
+    def _render_json(self, report):
+        return json.dumps(report._asdict(), ensure_ascii=False, indent=2, default=_json_default)
+
+    def _render_html(self, report):
+        esc = html.escape
+        tables = self.tables(report)
+
+        def table(name):
+            columns, rows = tables[name]
+            if not rows:
+                return ""
+            head = "".join(f"<th>{esc(str(c))}</th>" for c in columns)
+            body = "".join("<tr>" + "".join(f"<td>{esc(str(v))}</td>" for v in row) + "</tr>" for row in rows)
+            return f"<table><thead><tr>{head}</tr></thead><tbody>{body}</tbody></table>\n"
+
+        def items(lines):
+            return "<ul>" + "".join(f"<li>{esc(line)}</li>" for line in lines) + "</ul>\n"
+
+        out = [
+            "<!DOCTYPE html>\n<html lang=\"zh-Hant\">\n<head><meta charset=\"utf-8\">",
+            f"<title>{esc(report.title)}</title>",
+            "<style>body{font-family:sans-serif;max-width:960px;margin:auto;color:#212529}"
+            "table{border-collapse:collapse;margin-bottom:1em}th,td{border:1px solid #DEE2E6;padding:4px 8px}"
+            "th{background:#F8F9FA}</style>\n</head>\n<body>",
+            f"<h1>{esc(report.title)}</h1>",
+            f"<p>產出時間：{report.generated_at.strftime('%Y/%m/%d %H:%M:%S')}</p>",
+            self.svg(report),
+            "<h2>出生資訊</h2>",
+            items([
+                f"生日：{report.birth_date} {report.birth_time}",
+                f"地點：{report.location} ({format_coords(report.lat, report.lon)})",
+                f"上升星座：{report.asc}", f"太陽星座：{report.sun}", f"月亮星座：{report.moon}",
+            ]),
+            "<h2>行星狀態與本質力量</h2>", table('planets'),
+            "<h2>宮位資料</h2>", table('houses'),
+            "<h2>相位與接納</h2>", table('aspects') or "<p>無顯著相位。</p>",
+            "<h2>希臘點 (Lots)</h2>", table('lots'),
+            "<h2>重要恆星合相 (Fixed Stars)</h2>", table('fixed_stars') or "<p>目前無行星與重要恆星合相。</p>",
+        ]
+        if report.chart_type == 'natal':
+            pi = report.prof_info
+            out += [
+                "<h2>推運資訊</h2>",
+                items([
+                    f"小限分限：{pi.get('prof_sign')} (第 {pi.get('prof_house_num')} 宮)",
+                    f"當前年主星：{pi.get('lord_of_year')}",
+                ] + self._firdaria_active(report)),
+                f"<h3>未來 {self.FUTURE_YEARS} 年小限主星預告</h3>", table('future_prof'),
+                "<h3>完整法達星限時間表</h3>", table('firdaria'),
+            ]
+            if report.transits:
+                out += ["<h3>未來 12 個月行運 (Transits)</h3>", table('transits')]
+        out.append("</body>\n</html>\n")
+        return "\n".join(out)
@@ -0,0 +1,35 @@
+import hashlib
+import json
+from functools import lru_cache
+
+from chart_cache import ChartCache
+
+
+class ResponseCache(ChartCache):
+    """
+    Completed LLM responses, stored as the list of streamed chunks so that a
+    hit can be replayed through the same generator interface. Keys hash the
+    provider, model, system prompt and message list. Responses are larger
+    and less reused than charts, so the disk store is kept smaller.
+    """
+
+    def __init__(self, max_entries=128, cache_dir=None, max_disk_entries=2000):
+        super().__init__(max_entries=max_entries, cache_dir=cache_dir, namespace='responses',
+                         max_disk_entries=max_disk_entries)
+
+    @staticmethod
+    def response_key(provider, model, system_prompt, messages):
+        payload = {
+            'provider': provider,
+            'model': model,
+            'system': system_prompt,
+            'messages': [{'role': m['role'], 'content': m['content']} for m in messages],
+        }
+        raw = json.dumps(payload, sort_keys=True, ensure_ascii=False)
+        return hashlib.sha256(raw.encode('utf-8')).hexdigest()
+
+    @staticmethod
+    @lru_cache(maxsize=None)
+    def default():
+        """The process-wide response cache (ASTRO_CACHE_DIR/responses)."""
+        return ResponseCache()
@@ -6,6 +6,7 @@ FILES_TO_DOWNLOAD = {
     'sepl_18.se1': 'https://www.astro.com/ftp/swisseph/ephe/sepl_18.se1',
     'semo_18.se1': 'https://www.astro.com/ftp/swisseph/ephe/semo_18.se1',
     'seas_18.se1': 'https://www.astro.com/ftp/swisseph/ephe/seas_18.se1',
+    'sefstars.txt': 'https://www.astro.com/ftp/swisseph/ephe/sefstars.txt',
 }
 
 def download_ephem():
@@ -0,0 +1,18 @@
+import sys
+from unittest import mock
+
+import pytest
+
+ENGINE_LIBRARIES = ('swisseph', 'flatlib', 'flatlib.const', 'flatlib.chart')
+
+
+@pytest.fixture(autouse=True, scope='module')
+def real_engine_libraries(request):
+    """
+    Fails a test module up front if an earlier one left a mock in place of
+    an engine library (see tests/engine_mocks.py); numerical tests would
+    otherwise fail far from the cause.
+    """
+    leaked = [name for name in ENGINE_LIBRARIES if isinstance(sys.modules.get(name), mock.Base)]
+    if leaked:
+        pytest.fail(f"{', '.join(leaked)} replaced by a mock in sys.modules before {request.module.__name__}")
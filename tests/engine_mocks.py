@@ -0,0 +1,21 @@
+import importlib
+import os
+import sys
+from unittest import mock
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def import_with_mocks(name, mocks):
+    """
+    Imports repository module `name` with `mocks` standing in for entries of
+    sys.modules (e.g. swisseph, flatlib) and returns it. The mocks, and the
+    repository modules imported against them, are removed again afterwards,
+    so other test modules get the real libraries.
+    """
+    with mock.patch.dict(sys.modules, mocks):
+        # Import afresh even if another test module already loaded the real one
+        for key, module in list(sys.modules.items()):
+            if os.path.dirname(getattr(module, '__file__', None) or '') == ROOT:
+                del sys.modules[key]
+        return importlib.import_module(name)
@@ -0,0 +1,107 @@
+import asyncio
+import json
+import unittest
+from unittest import mock
+
+import httpx
+from openai import AsyncOpenAI, OpenAI
+
+from ai_clients import ClientRegistry, key_fingerprint
+from ai_logic import AIAssistant
+
+MESSAGES = [{"role": "user", "content": "盤面資料"}]
+
+
+def sse_body(tokens):
+    events = []
+    for tok in tokens:
+        chunk = {"id": "c1", "object": "chat.completion.chunk", "created": 0, "model": "m",
+                 "choices": [{"index": 0, "delta": {"content": tok}, "finish_reason": None}]}
+        events.append(f"data: {json.dumps(chunk, ensure_ascii=False)}\n\n")
+    events.append("data: [DONE]\n\n")
+    return "".join(events).encode("utf-8")
+
+
+class MockRegistry(ClientRegistry):
+    """Registry whose OpenAI clients talk to an in-process transport."""
+
+    def __init__(self, tokens):
+        super().__init__()
+        self.requests = []
+
+        def handler(request):
+            self.requests.append(json.loads(request.content))
+            return httpx.Response(200, content=sse_body(tokens), headers={"content-type": "text/event-stream"})
+        self.handler = handler
+
+    def _build(self, provider, api_key, is_async):
+        if is_async:
+            return AsyncOpenAI(api_key=api_key, http_client=httpx.AsyncClient(transport=httpx.MockTransport(self.handler)))
+        return OpenAI(api_key=api_key, http_client=httpx.Client(transport=httpx.MockTransport(self.handler)))
+
+
+class TestClientRegistry(unittest.TestCase):
+    def test_clients_are_shared_per_provider_and_key(self):
+        reg = ClientRegistry()
+        a = AIAssistant("Groq", api_key="gsk-1", clients=reg, response_cache=False)
+        b = AIAssistant("Groq", api_key="gsk-1", clients=reg, response_cache=False)
+        c = AIAssistant("Groq", api_key="gsk-2", clients=reg, response_cache=False)
+        d = AIAssistant("OpenRouter", api_key="gsk-1", clients=reg, response_cache=False)
+        self.assertIs(a.client, b.client)
+        self.assertIsNot(a.client, c.client)
+        self.assertEqual(str(d.client.base_url).rstrip('/'), "https://openrouter.ai/api/v1")
+        self.assertEqual(reg.created, 3)
+
+        async def async_clients():
+            return a.async_client, b.async_client
+        first, second = asyncio.run(async_clients())
+        self.assertIs(first, second)
+        # Async connections belong to their event loop
+        self.assertIsNot(asyncio.run(async_clients())[0], first)
+        self.assertNotIn("gsk-1", repr(list(reg._clients)))
+        self.assertEqual(len(key_fingerprint("gsk-1")), 16)
+
+    def test_lru_bound(self):
+        reg = ClientRegistry(max_clients=2)
+        for i in range(3):
+            reg.get("OpenAI", f"sk-{i}")
+        self.assertEqual(len(reg), 2)
+
+    def test_gemini_configuration_is_tracked_per_process(self):
+        a, b = ClientRegistry(), ClientRegistry(base_urls={"Gemini": "http://127.0.0.1:1"})
+        with mock.patch("ai_clients._gemini_config", None), mock.patch("google.generativeai.configure") as configure:
+            a.configure_gemini("key-a")
+            a.configure_gemini("key-a")
+            b.configure_gemini("key-b")
+            # b replaced the global configuration, so a must apply its key again
+            a.configure_gemini("key-a")
+        self.assertEqual([c.kwargs["api_key"] for c in configure.call_args_list], ["key-a", "key-b", "key-a"])
+        self.assertEqual(configure.call_args_list[1].kwargs["transport"], "rest")
+
+    def test_sync_and_async_streams_match(self):
+        reg = MockRegistry(["甲", "乙", "丙"])
+        ai = AIAssistant("OpenAI", api_key="sk-test", model_name="gpt-4o", clients=reg, response_cache=False)
+        self.assertEqual(list(ai.generate_chat_stream("sys", MESSAGES)), ["甲", "乙", "丙"])
+
+        async def collect():
+            return [c async for c in ai.agenerate_chat_stream("sys", MESSAGES)]
+        self.assertEqual(asyncio.run(collect()), ["甲", "乙", "丙"])
+        self.assertEqual(reg.requests[0]["messages"][0], {"role": "system", "content": "sys"})
+        self.assertEqual(reg.requests[0], reg.requests[1])
+
+    def test_concurrent_async_sessions(self):
+        reg = MockRegistry(["a", "b"])
+        ai = AIAssistant("OpenAI", api_key="sk-test", clients=reg, response_cache=False)
+
+        async def session(i):
+            msgs = [{"role": "user", "content": f"q{i}"}]
+            return "".join([c async for c in ai.agenerate_chat_stream("sys", msgs)])
+
+        async def main():
+            return await asyncio.gather(*(session(i) for i in range(20)))
+        self.assertEqual(asyncio.run(main()), ["ab"] * 20)
+        # One sync client from the constructor, one async client for all 20 sessions
+        self.assertEqual(reg.created, 2)
+
+if __name__ == '__main__':
+    unittest.main()
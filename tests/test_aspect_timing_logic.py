@@ -0,0 +1,63 @@
+import unittest
+
+import swisseph as swe
+from flatlib import const
+from flatlib.chart import Chart
+from flatlib.datetime import Datetime
+from flatlib.geopos import GeoPos
+
+from aspects_logic import AspectsLogic
+from aspect_timing_logic import AspectTimingLogic, SWE_BODIES
+
+
+class TestAspectTimingLogic(unittest.TestCase):
+    IDS = [const.SUN, const.MOON, const.MERCURY, const.VENUS, const.MARS, const.JUPITER, const.SATURN]
+
+    def setUp(self):
+        self.aspects = AspectsLogic()
+        self.timing = AspectTimingLogic()
+
+    def _timed(self, date_str):
+        chart = Chart(Datetime(date_str, '12:00', '+00:00'), GeoPos(25.03, 121.50))
+        lons = [chart.get(p_id).lon for p_id in self.IDS]
+        records = self.aspects.find_aspects(lons, self.aspects.orb_matrix(self.IDS))
+        angles = [self.aspects.ASPECTS[r['aspect']][0] for r in records]
+        return chart.date.jd, records, angles, self.timing.time_aspects(chart.date.jd, self.IDS, records, angles)
+
+    def _separation(self, jd, b1, b2):
+        diff = abs(swe.calc_ut(jd, SWE_BODIES[b1])[0][0] - swe.calc_ut(jd, SWE_BODIES[b2])[0][0])
+        return 360 - diff if diff > 180 else diff
+
+    def test_perfection_is_exact_and_on_the_right_side(self):
+        for date_str in ('1990/01/01', '2024/04/08'):
+            jd, records, angles, timing = self._timed(date_str)
+            self.assertTrue(timing)
+            for rec, angle, t in zip(records, angles, timing):
+                self.assertIn(t['status'], ('applying', 'separating'))
+                if t['perfect_jd'] is None:
+                    continue
+                b1, b2 = self.IDS[rec['i']], self.IDS[rec['j']]
+                self.assertAlmostEqual(self._separation(t['perfect_jd'], b1, b2), angle, places=3)
+                if t['status'] == 'applying':
+                    self.assertGreater(t['perfect_jd'], jd)
+                else:
+                    self.assertLess(t['perfect_jd'], jd)
+
+    def test_known_applying_conjunction(self):
+        # New moon of 2024-04-08 18:21 UTC (the total solar eclipse)
+        _, records, _, timing = self._timed('2024/04/08')
+        idx = [(int(r['i']), int(r['j']), int(r['aspect'])) for r in records].index((0, 1, 0))
+        self.assertEqual(timing[idx]['status'], 'applying')
+        self.assertEqual(timing[idx]['perfect_utc'].strftime('%Y-%m-%d %H:%M'), '2024-04-08 18:20')
+
+    def test_calc_calls_are_bounded(self):
+        _, records, _, _ = self._timed('1975/07/20')
+        self.assertLessEqual(self.timing.last_calc_calls, self.timing.max_calc_calls(len(self.IDS), len(records)))
+
+    def test_non_planet_points_are_skipped(self):
+        records = self.aspects.find_aspects([10.0, 11.0], [[3.0, 3.0], [3.0, 3.0]])
+        timing = self.timing.time_aspects(2451545.0, [const.SUN, 'Fortune'], records, [0])
+        self.assertEqual(timing, [{'status': None, 'perfect_jd': None, 'perfect_utc': None}])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,5 +1,6 @@
 import unittest
 from unittest.mock import MagicMock
+import numpy as np
 from aspects_logic import AspectsLogic
 from flatlib import const
 
@@ -31,5 +32,33 @@ class TestAspectsLogic(unittest.TestCase):
         res = self.logic.check_reception(const.MARS, 30, const.SUN, 0, trans_planets)
         self.assertEqual(res, "火星 接納 太陽")
 
+    def test_find_aspects_matches_pairwise_scan(self):
+        rng = np.random.default_rng(7)
+        lons = np.concatenate([[0.2, 359.8, 180.1], rng.uniform(0, 360, 40)])
+        orbs = self.logic.orb_matrix([f"p{i}" for i in range(len(lons))], {'p0': 10.0, 'p5': 12.0})
+        expected = []
+        for i in range(len(lons)):
+            for j in range(i + 1, len(lons)):
+                diff = abs(lons[i] - lons[j])
+                if diff > 180: diff = 360 - diff
+                for k, (angle, _) in enumerate(self.logic.ASPECTS):
+                    if abs(diff - angle) <= orbs[i, j]:
+                        expected.append((i, j, k))
+        records = self.logic.find_aspects(lons, orbs)
+        self.assertEqual([(int(r['i']), int(r['j']), int(r['aspect'])) for r in records], expected)
+        # Conjunction across 0° Aries
+        self.assertIn((0, 1, 0), expected)
+
+    def test_get_aspects_with_extra_points(self):
+        positions = {const.SUN: 10.0, const.MOON: 100.5, const.MERCURY: 30.0, const.VENUS: 50.0,
+                     const.MARS: 200.0, const.JUPITER: 250.0, const.SATURN: 330.0}
+        chart = MagicMock()
+        chart.get.side_effect = lambda p_id: MagicMock(lon=positions[p_id])
+        trans = {const.SUN: '太陽', const.MOON: '月亮', 'Fortune': '幸運點'}
+        aspects = self.logic.get_aspects(chart, trans, {}, {'Square': '四分相 (90°)'}, extra_points={'Fortune': 11.0})
+        pairs = [(a['p1'], a['p2'], a['aspect']) for a in aspects]
+        self.assertIn(('太陽', '月亮', '四分相 (90°)'), pairs)
+        self.assertIn(('太陽', '幸運點', 'Conjunction'), pairs)
+
 if __name__ == '__main__':
     unittest.main()
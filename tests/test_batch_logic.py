@@ -0,0 +1,54 @@
+import unittest
+
+import numpy as np
+from flatlib.chart import Chart
+from flatlib.datetime import Datetime
+from flatlib.geopos import GeoPos
+
+from batch_logic import BatchChartLogic, PLANETS
+from logic import AstrologyLogic
+
+
+class TestBatchChartLogic(unittest.TestCase):
+    BIRTHS = [
+        # (date, time, utc offset, lat, lon)
+        ('1990/01/01', '12:00', '+08:00', 25.03, 121.50),
+        ('1975/07/20', '03:45', '+00:00', 51.50, -0.12),
+        ('2003/11/11', '22:10', '-05:00', 40.71, -74.00),
+    ]
+
+    def setUp(self):
+        self.logic = AstrologyLogic()
+        self.batch = BatchChartLogic()
+
+    def test_matches_per_chart_path(self):
+        charts = [Chart(Datetime(d, t, off), GeoPos(lat, lon)) for d, t, off, lat, lon in self.BIRTHS]
+        res = self.batch.compute(
+            [c.date.jd for c in charts],
+            [b[3] for b in self.BIRTHS],
+            [b[4] for b in self.BIRTHS],
+        )
+        for i, chart in enumerate(charts):
+            houses = self.logic.calculate_equal_houses(chart.get('Asc').lon)
+            planets = self.logic.get_planets_data(chart, houses)
+            self.assertAlmostEqual(res['asc'][i], chart.get('Asc').lon, places=6)
+            self.assertEqual(bool(res['is_day'][i]), self.logic.is_day_birth(chart, houses))
+            for j, p in enumerate(planets):
+                self.assertEqual(p['id'], PLANETS[j])
+                self.assertAlmostEqual(res['lon'][i, j], p['lon'], places=6)
+                self.assertEqual(res['house'][i, j], p['house_num'])
+                self.assertEqual(res['dignity'][i, j], p['dignity']['score'])
+                self.assertEqual(bool(res['retro'][i, j]), p['retro'] != "")
+
+    def test_shapes_and_broadcast(self):
+        jd = np.linspace(2447892.5, 2447900.5, 5)
+        res = self.batch.compute(jd, 25.03, 121.50)
+        self.assertEqual(res['lon'].shape, (5, 7))
+        self.assertEqual(res['sign'].shape, (5, 7))
+        self.assertTrue(((res['house'] >= 1) & (res['house'] <= 12)).all())
+
+    def test_julian_days(self):
+        self.assertEqual(BatchChartLogic.julian_days([0.0])[0], 2440587.5)
+
+if __name__ == '__main__':
+    unittest.main()
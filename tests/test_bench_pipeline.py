@@ -0,0 +1,43 @@
+import unittest
+
+from benchmarks import bench_pipeline
+from benchmarks.bench_pipeline import CORPUS, compare, load_baseline, run
+
+
+class TestPipelineBenchmark(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.results = run(CORPUS[:2], repeats=1)
+
+    def test_every_stage_is_measured(self):
+        stages = list(self.results)
+        self.assertEqual(stages[:3], ['chart', 'equal_houses', 'planets'])
+        for name in ('aspects', 'lots', 'fixed_stars', 'profections', 'firdaria', 'render_markdown'):
+            self.assertIn(name, stages)
+        for name, r in self.results.items():
+            self.assertEqual(r['samples'], 2, name)
+            self.assertLessEqual(r['p50_ms'], r['max_ms'], name)
+            self.assertGreaterEqual(r['peak_kb'], 0, name)
+
+    def test_stored_baseline_covers_the_pipeline(self):
+        baseline = load_baseline()
+        self.assertIsNotNone(baseline)
+        self.assertEqual(list(baseline['stages']), list(self.results))
+
+    def test_regressions_are_reported(self):
+        baseline = {name: dict(r) for name, r in self.results.items()}
+        self.assertEqual(compare(self.results, baseline), [])
+
+        slower = {name: dict(r) for name, r in self.results.items()}
+        slower['aspects']['p50_ms'] = baseline['aspects']['p50_ms'] * 3 + 1
+        slower['transits']['peak_kb'] = baseline['transits']['peak_kb'] * 2 + 2 * bench_pipeline.MEMORY_SLACK_KB
+        regressions = compare(slower, baseline)
+        self.assertEqual(len(regressions), 2)
+        self.assertTrue(regressions[0].startswith('aspects: p50'))
+        self.assertTrue(regressions[1].startswith('transits: peak'))
+        # Noise within the tolerance is not a regression
+        slower['aspects']['p50_ms'] = baseline['aspects']['p50_ms'] * 1.2
+        self.assertEqual(len(compare(slower, baseline)), 1)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,55 @@
+import io
+import unittest
+from datetime import date, datetime
+from itertools import islice
+
+from flatlib import const
+
+from calendar_logic import TimeLordCalendar
+from logic import AstrologyLogic
+from time_lords_logic import TimeLordsLogic
+from transits_logic import TransitsLogic
+
+
+class TestTimeLordCalendar(unittest.TestCase):
+    BIRTH = date(1990, 1, 1)
+    NATAL = {const.SUN: 280.0, const.MOON: 100.0, const.ASC: 200.0}
+
+    def setUp(self):
+        self.calendar = TimeLordCalendar(TimeLordsLogic(), TransitsLogic())
+
+    def test_merged_stream_is_time_ordered(self):
+        events = self.calendar.window(self.BIRTH, 6, True, date(2020, 1, 1), date(2022, 1, 1), natal=self.NATAL)
+        times = [e['time'] for e in events]
+        self.assertEqual(times, sorted(times))
+        self.assertEqual({e['system'] for e in events}, {'profection', 'firdaria', 'transit'})
+        self.assertTrue(all(datetime(2020, 1, 1) <= t < datetime(2022, 1, 1) for t in times))
+
+    def test_lifetime_time_lords(self):
+        events = self.calendar.window(self.BIRTH, 6, True, self.BIRTH, date(2080, 1, 1))
+        profections = [e for e in events if e['system'] == 'profection']
+        firdaria = [e for e in events if e['system'] == 'firdaria']
+        self.assertEqual([e['age'] for e in profections], list(range(90)))
+        self.assertEqual(len(firdaria), 7 * 7 + 2)
+        self.assertEqual((firdaria[0]['major'], firdaria[0]['minor']), (const.SUN, const.SUN))
+        self.assertEqual(sum(e['new_major'] for e in firdaria), 9)
+
+    def test_open_ended_stream_is_lazy(self):
+        # No end date: the stream is unbounded, so only a lazy merge can return
+        events = list(islice(self.calendar.events(self.BIRTH, 6, True, date(2030, 6, 1), monthly=True), 30))
+        self.assertEqual(len(events), 30)
+        self.assertTrue(all(e['time'] >= datetime(2030, 6, 1) for e in events))
+        self.assertIn('month', {e.get('unit') for e in events})
+
+    def test_formatted_rows_and_csv_export(self):
+        logic = AstrologyLogic()
+        rows = list(logic.time_lord_events('1990/01/01', 200.0, True, date(2026, 1, 1), date(2027, 1, 1), natal=self.NATAL))
+        self.assertTrue(rows)
+        self.assertEqual(set(rows[0]), {'time', 'system', 'event'})
+        self.assertIn('小限年 (36 歲)', ' '.join(r['event'] for r in rows))
+        buf = io.StringIO()
+        TimeLordCalendar.export_csv(rows, buf)
+        self.assertEqual(len(buf.getvalue().strip().splitlines()), len(rows) + 1)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,71 @@
+import os
+import shutil
+import tempfile
+import unittest
+from datetime import datetime, timedelta, timezone
+
+from chart_cache import ChartCache
+
+
+class TestChartCache(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.cache = ChartCache(max_entries=2, cache_dir=self.tmp_dir)
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir, ignore_errors=True)
+
+    def test_key_normalizes_moment_and_coordinates(self):
+        naive_utc = datetime(1990, 1, 1, 4, 0)
+        aware_local = datetime(1990, 1, 1, 12, 0, tzinfo=timezone(timedelta(hours=8)))
+        k1 = ChartCache.make_key(naive_utc, 25.03, 121.5, chart_type='natal')
+        k2 = ChartCache.make_key(aware_local, 25.030001, 121.500001, chart_type='natal')
+        self.assertEqual(k1, k2)
+        k3 = ChartCache.make_key(naive_utc, 25.03, 121.5, chart_type='horary')
+        self.assertNotEqual(k1, k3)
+
+    def test_lru_eviction_falls_back_to_disk(self):
+        for name in ('a', 'b', 'c'):
+            self.cache.put(name, {'report_md': name})
+        self.assertEqual(self.cache.stats()['entries'], 2)
+        # 'a' was evicted from memory but is still on disk
+        self.assertEqual(self.cache.get('a'), {'report_md': 'a'})
+
+    def test_shared_across_instances(self):
+        self.cache.put('k', {'report_md': 'x'})
+        other = ChartCache(cache_dir=self.tmp_dir)
+        self.assertEqual(other.get('k'), {'report_md': 'x'})
+        self.assertIsNone(other.get('missing'))
+
+    def test_get_or_compute(self):
+        calls = []
+        compute = lambda: calls.append(1) or {'report_md': 'y'}
+        self.assertEqual(self.cache.get_or_compute('k', compute), {'report_md': 'y'})
+        self.assertEqual(self.cache.get_or_compute('k', compute), {'report_md': 'y'})
+        self.assertEqual(len(calls), 1)
+
+    def test_disk_store_is_pruned_oldest_first(self):
+        cache = ChartCache(cache_dir=self.tmp_dir, max_disk_entries=10)
+        for i in range(12):
+            key = f"{i:064x}"
+            cache.put(key, i)
+            os.utime(cache._path(key), (i, i))
+        cache.clear()
+        on_disk = [i for i in range(12) if cache.get(f"{i:064x}") is not None]
+        # Pruned to 9 when the 11th arrived, then one more written
+        self.assertEqual(on_disk, list(range(2, 12)))
+
+    def test_failed_writes_are_logged_and_leave_nothing_behind(self):
+        with self.assertRaises(Exception):
+            self.cache.put('unpicklable', lambda: None)
+        self.assertIsNone(self.cache.get('unpicklable'))
+        leftovers = [name for _, _, files in os.walk(self.tmp_dir) for name in files]
+        self.assertEqual(leftovers, [])
+
+        blocked = os.path.join(self.tmp_dir, 'blocked')
+        open(blocked, 'w').close()
+        with self.assertLogs('chart_cache', 'WARNING'):
+            ChartCache(cache_dir=blocked).put('k', 1)
+
+if __name__ == '__main__':
+    unittest.main()
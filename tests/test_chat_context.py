@@ -0,0 +1,88 @@
+import sys
+import unittest
+from unittest import mock
+
+from ai_logic import AIAssistant
+from chat_context import ChatContext, GeminiPrefixCache, prefix_hash
+from prompt_logic import count_tokens
+from tests.test_ai_clients import MockRegistry
+
+
+def chat(turns):
+    """Chart message, first analysis, then `turns` follow-up question/answer pairs."""
+    messages = [{"role": "user", "content": "命盤資料 " * 50}, {"role": "assistant", "content": "初步解析 " * 50}]
+    for i in range(turns):
+        messages.append({"role": "user", "content": f"第 {i} 個問題"})
+        messages.append({"role": "assistant", "content": "回答內容 " * 40})
+    return messages
+
+
+class TestChatContext(unittest.TestCase):
+    def test_short_chat_is_sent_as_is(self):
+        messages = chat(2) + [{"role": "user", "content": "再問一題"}]
+        fitted = ChatContext(budget=100000).fit("sys", messages)
+        self.assertEqual(fitted.messages, messages)
+        self.assertEqual((fitted.pinned, fitted.dropped), (2, 0))
+
+    def test_old_turns_are_dropped_behind_the_pinned_prefix(self):
+        messages = chat(10) + [{"role": "user", "content": "最新的問題"}]
+        original = [dict(m) for m in messages]
+        ctx = ChatContext(budget=1400)
+        fitted = ctx.fit("sys", messages, "Groq")
+
+        self.assertEqual(messages, original)
+        self.assertEqual(fitted.messages[:2], messages[:2])
+        self.assertEqual(fitted.messages[-1], messages[-1])
+        self.assertGreater(fitted.dropped, 0)
+        self.assertEqual(fitted.messages[2]["role"], "user")
+        self.assertIn("已省略較早的", fitted.messages[2]["content"])
+        self.assertIn("「第 0 個問題」", fitted.messages[2]["content"])
+        self.assertLessEqual(sum(count_tokens(m["content"], "Groq") for m in fitted.messages) + count_tokens("sys", "Groq"), 1400)
+
+    def test_latest_turn_survives_any_budget(self):
+        messages = chat(3) + [{"role": "user", "content": "最新的問題"}]
+        fitted = ChatContext(budget=10).fit("sys", messages)
+        self.assertEqual(len(fitted.messages), 3)
+        self.assertTrue(fitted.messages[-1]["content"].endswith("最新的問題"))
+
+
+class TestPrefixCaching(unittest.TestCase):
+    def test_gemini_prefix_cache(self):
+        clock = [0.0]
+        cache = GeminiPrefixCache(clock=lambda: clock[0])
+        caching = mock.MagicMock()
+        with mock.patch.dict(sys.modules, {"google.generativeai.caching": caching}), \
+                mock.patch("google.generativeai.caching", caching, create=True):
+            self.assertIsNone(cache.get("key", "gemini-2.0-flash", "sys", chat(0)))
+            caching.CachedContent.create.assert_not_called()
+
+            big = [{"role": "user", "content": "命盤資料" * 3000}]
+            first = cache.get("key", "gemini-2.0-flash", "sys", big)
+            self.assertIs(first, caching.CachedContent.create.return_value)
+            self.assertIs(cache.get("key", "gemini-2.0-flash", "sys", big), first)
+            self.assertEqual(caching.CachedContent.create.call_args.kwargs["model"], "models/gemini-2.0-flash")
+
+            # Failures are remembered, not retried on every turn
+            caching.CachedContent.create.side_effect = RuntimeError("unsupported model")
+            self.assertIsNone(cache.get("key", "gemini-exp", "sys", big))
+            self.assertIsNone(cache.get("key", "gemini-exp", "sys", big))
+            self.assertEqual(caching.CachedContent.create.call_count, 2)
+            clock[0] = GeminiPrefixCache.RETRY_SECONDS + 1
+            cache.get("key", "gemini-exp", "sys", big)
+            self.assertEqual(caching.CachedContent.create.call_count, 3)
+
+    def test_openai_prompt_cache_key_is_stable_across_turns(self):
+        reg = MockRegistry(["好"])
+        ai = AIAssistant("OpenAI", api_key="sk-test", clients=reg, response_cache=False)
+        messages = chat(1) + [{"role": "user", "content": "追問"}]
+        "".join(ai.generate_chat_stream("sys", messages[:1]))
+        "".join(ai.generate_chat_stream("sys", messages))
+        keys = {r["prompt_cache_key"] for r in reg.requests}
+        self.assertEqual(keys, {prefix_hash("sys", messages[:1])[:32]})
+
+        groq = MockRegistry(["好"])
+        "".join(AIAssistant("Groq", api_key="gsk-test", clients=groq, response_cache=False).generate_chat_stream("sys", messages))
+        self.assertNotIn("prompt_cache_key", groq.requests[0])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,65 @@
+import unittest
+
+import numpy as np
+from flatlib import const
+
+from dignities_logic import DignitiesLogic
+
+
+class TestDignitiesLogic(unittest.TestCase):
+    def setUp(self):
+        self.logic = DignitiesLogic()
+
+    def test_domicile_and_day_triplicity(self):
+        # Sun at Leo 10°, day chart: Domicile (+5) and Fire day triplicity (+3)
+        res = self.logic.calculate_essential_dignities(const.SUN, 130.0, True)
+        self.assertEqual(res['list'], ["廟 (Domicile)", "三分 (Triplicity - Day)"])
+        self.assertEqual(res['score'], 8)
+        self.assertFalse(res['is_peregrine'])
+
+    def test_exaltation_term_and_participating_triplicity(self):
+        # Mars at Capricorn 28.5°: Exaltation (+4), Earth participating (+3), own term (+2)
+        for is_day in (True, False):
+            res = self.logic.calculate_essential_dignities(const.MARS, 298.5, is_day)
+            self.assertEqual(res['list'], ["旺 (Exaltation)", "三分 (Triplicity - Part.)", "界 (Term)"])
+            self.assertEqual(res['score'], 9)
+
+    def test_debilities(self):
+        # Venus at Virgo 15°, night: Fall (-4), with the Virgo term 7-17 (+2) and face 10-20 (+1)
+        res = self.logic.calculate_essential_dignities(const.VENUS, 165.0, False)
+        self.assertEqual(res['list'], ["弱 (Fall)", "界 (Term)", "面 (Face)"])
+        self.assertEqual(res['score'], -1)
+        # Saturn at Leo 5°: Detriment (-5), Fire participating triplicity (+3), first face (+1)
+        res = self.logic.calculate_essential_dignities(const.SATURN, 125.0, True)
+        self.assertEqual(res['list'], ["陷 (Detriment)", "三分 (Triplicity - Part.)", "面 (Face)"])
+        self.assertEqual(res['score'], -1)
+
+    def test_unknown_planet_is_peregrine(self):
+        res = self.logic.calculate_essential_dignities('Uranus', 10.0, True)
+        self.assertEqual(res, {'list': [], 'score': 0, 'is_peregrine': True})
+
+    def test_vectorized_scores_known_degrees(self):
+        # Scores worked out by hand from the dignity tables (same as the original get_dignity)
+        cases = [
+            (const.SUN, 130.0, True, 8),       # Leo 10°: domicile, day triplicity
+            (const.SATURN, 201.0, True, 7),    # Libra 21°: exaltation, day triplicity
+            (const.SATURN, 201.0, False, 4),   # Libra 21° by night: exaltation only
+            (const.MARS, 298.5, False, 9),     # Capricorn 28.5°: exaltation, participating, term
+            (const.VENUS, 165.0, False, -1),   # Virgo 15°: fall, term, face
+            (const.MERCURY, 170.0, True, 10),  # Virgo 20°: domicile, exaltation, face
+            (const.MOON, 33.0, False, 7),      # Taurus 3°: exaltation, night triplicity
+        ]
+        planet_idx = [DignitiesLogic.PLANET_INDEX[p] for p, _, _, _ in cases]
+        _, scores = self.logic.score_essential_dignities(planet_idx, [c[1] for c in cases], [c[2] for c in cases])
+        self.assertEqual(scores.tolist(), [c[3] for c in cases])
+
+    def test_vectorized_matches_scalar(self):
+        lons = np.arange(0.0, 360.0, 0.5)
+        for p_idx, p_id in enumerate(DignitiesLogic.PLANETS):
+            for is_day in (True, False):
+                flags, scores = self.logic.score_essential_dignities(p_idx, lons, is_day)
+                for lon, f, sc in zip(lons, flags, scores):
+                    self.assertEqual((int(f), int(sc)), self.logic.essential_dignity_flags(p_id, lon, is_day))
+
+if __name__ == '__main__':
+    unittest.main()
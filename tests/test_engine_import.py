@@ -0,0 +1,13 @@
+import unittest
+
+from benchmarks.bench_import import measure_cold_import
+
+
+class TestEngineImport(unittest.TestCase):
+    def test_engine_is_headless(self):
+        # Importing the engine must not drag Streamlit into batch/API workers
+        _, loaded = measure_cold_import(samples=1)
+        self.assertEqual(loaded, [])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,103 @@
+import json
+import os
+import shutil
+import tempfile
+import unittest
+from datetime import date
+from unittest import mock
+
+import numpy as np
+import swisseph as swe
+
+from batch_logic import BatchChartLogic
+import ephemeris_table
+from ephemeris_table import BODIES, SWE_IDS, EphemerisTable, build_table
+from transits_logic import TransitsLogic
+
+
+class TestEphemerisTable(unittest.TestCase):
+    ARCSEC = 1.0 / 3600.0
+
+    @classmethod
+    def setUpClass(cls):
+        cls.tmpdir = tempfile.mkdtemp()
+        # Covers Jupiter's and Venus's 2025 solar conjunctions
+        cls.table = build_table(os.path.join(cls.tmpdir, 'table.npy'), 2020, 2027)
+
+    @classmethod
+    def tearDownClass(cls):
+        del cls.table
+        shutil.rmtree(cls.tmpdir, ignore_errors=True)
+
+    def test_matches_swiss_ephemeris(self):
+        rng = np.random.default_rng(7)
+        jd = rng.uniform(self.table.start_jd, self.table.end_jd, 3000)
+        lon, lat, speed = self.table.lookup(jd)
+        for j, body in enumerate(SWE_IDS):
+            ref = np.array([swe.calc_ut(t, body)[0] for t in jd])
+            dlon = (lon[:, j] - ref[:, 0] + 180.0) % 360.0 - 180.0
+            self.assertLess(np.abs(dlon).max(), self.ARCSEC, BODIES[j])
+            self.assertLess(np.abs(lat[:, j] - ref[:, 1]).max(), self.ARCSEC, BODIES[j])
+            self.assertLess(np.abs(speed[:, j] - ref[:, 3]).max(), 0.01, BODIES[j])
+
+    def test_reopened_table_is_memory_mapped(self):
+        reopened = EphemerisTable(self.table.path)
+        self.assertIsInstance(reopened.data, np.memmap)
+        self.assertFalse(reopened.data.flags.writeable)
+        self.assertEqual(reopened.end_jd, self.table.end_jd)
+
+    def test_longitude_wraps_through_aries(self):
+        # Sun crosses 0° Aries at the March 2024 equinox
+        jd = swe.julday(2024, 3, 20, 3.1) + np.linspace(-0.3, 0.3, 61)
+        lon, _, _ = self.table.lookup(jd, ['Sun'])
+        self.assertTrue(np.all((lon >= 0) & (lon < 360)))
+        ref = np.array([swe.calc_ut(t, swe.SUN)[0][0] for t in jd])
+        self.assertLess(np.abs((lon[:, 0] - ref + 180) % 360 - 180).max(), self.ARCSEC)
+
+    def test_out_of_range_raises(self):
+        with self.assertRaises(ValueError):
+            self.table.lookup([self.table.end_jd + 1])
+
+    def test_interrupted_build_keeps_the_previous_table(self):
+        tmpdir = self.enterContext(tempfile.TemporaryDirectory())
+        path = os.path.join(tmpdir, 'small.npy')
+        build_table(path, 2020, 2021)
+        with mock.patch.object(ephemeris_table.swe, 'calc_ut', side_effect=KeyboardInterrupt):
+            with self.assertRaises(KeyboardInterrupt):
+                build_table(path, 2020, 2025)
+        self.assertEqual(sorted(os.listdir(tmpdir)), ['small.json', 'small.npy'])
+        self.assertAlmostEqual(EphemerisTable(path).end_jd, swe.julday(2021, 1, 1, 0.0))
+
+    def test_stale_or_mismatched_tables_are_refused(self):
+        path = os.path.join(self.tmpdir, 'stale.npy')
+        build_table(path, 2020, 2021)
+        meta_path = os.path.join(self.tmpdir, 'stale.json')
+        with open(meta_path, encoding='utf-8') as f:
+            meta = json.load(f)
+        for changes in ({'swe_version': '0.0'}, {'n': meta['n'] + 1}):
+            with self.subTest(changes=changes):
+                with open(meta_path, 'w', encoding='utf-8') as f:
+                    json.dump(dict(meta, **changes), f)
+                with self.assertRaises(ValueError):
+                    EphemerisTable(path)
+                # The shared table falls back to the Swiss Ephemeris instead
+                with mock.patch.dict(os.environ, {'ASTRO_EPHEM_TABLE': path}), \
+                        mock.patch.object(ephemeris_table, '_table', None), self.assertLogs('ephemeris_table', 'WARNING'):
+                    self.assertIsNone(ephemeris_table.default_table())
+
+    def test_transits_and_batch_use_the_table(self):
+        natal = {'Sun': 280.4, 'Moon': 15.0}
+        key = lambda e: (e['transit'], e['natal'], e['angle'], round(e['jd'], 4))
+        with_table = [key(e) for e in TransitsLogic(table=self.table).scan(natal, date(2024, 1, 1), date(2024, 6, 1))]
+        direct = TransitsLogic(table=self.table)
+        direct.table = None
+        without = [key(e) for e in direct.scan(natal, date(2024, 1, 1), date(2024, 6, 1))]
+        self.assertEqual(with_table, without)
+
+        jd = np.linspace(self.table.start_jd + 10, self.table.end_jd - 10, 50)
+        res_t = BatchChartLogic(table=self.table).compute(jd, 25.03, 121.5)
+        res_s = BatchChartLogic().compute(jd, 25.03, 121.5)
+        self.assertLess(np.abs((res_t['lon'] - res_s['lon'] + 180) % 360 - 180).max(), self.ARCSEC)
+
+if __name__ == '__main__':
+    unittest.main()
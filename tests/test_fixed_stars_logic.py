@@ -0,0 +1,77 @@
+import os
+import unittest
+
+import flatlib
+import numpy as np
+import swisseph as swe
+from flatlib import const
+from flatlib.chart import Chart
+from flatlib.datetime import Datetime
+from flatlib.geopos import GeoPos
+
+from ephemeris import init_ephemeris
+from fixed_stars_logic import FixedStarsLogic
+from lots_logic import LotsLogic
+
+
+class TestFixedStarsLogic(unittest.TestCase):
+    def setUp(self):
+        self.stars = FixedStarsLogic()
+
+    def test_catalog(self):
+        cat = self.stars.catalog
+        self.assertGreaterEqual(len(cat.name), 400)
+        self.assertEqual(len(set(cat.name)), len(cat.name))
+        regulus = cat.name.index('Regulus')
+        self.assertEqual(self.stars.label(regulus), 'Regulus (軒轅十四)')
+        self.assertAlmostEqual(cat.lon[regulus], 149.83, places=2)
+
+    def test_precession_matches_swiss_ephemeris(self):
+        # flatlib ships the Swiss Ephemeris star file (sefstars.txt)
+        swe.set_ephe_path(os.path.join(os.path.dirname(flatlib.__file__), 'resources', 'swefiles'))
+        try:
+            cat = self.stars.catalog
+            for year in (1850, 2026, 2150):
+                jd = swe.julday(year, 1, 1, 0.0)
+                lons = self.stars.longitudes(jd)
+                for i in range(0, len(cat.bayer), 7):
+                    ref = swe.fixstar2_ut(',' + cat.bayer[i], jd)[0][0]
+                    self.assertLess(abs((lons[i] - ref + 180) % 360 - 180), 0.1, cat.name[i])
+        finally:
+            swe.set_ephe_path(init_ephemeris())
+
+    def test_window_search_matches_brute_force(self):
+        rng = np.random.default_rng(3)
+        jd = 2451545.0 + 9000.0
+        lons, mags = self.stars.longitudes(jd), self.stars.catalog.mag
+        points = {f"p{k}": lon for k, lon in enumerate(rng.uniform(0, 360, 200))}
+        points['edge'] = 359.9  # window wraps through 0° Aries
+        found = {(h['point'], h['star']) for h in self.stars.find_conjunctions(points, jd, max_magnitude=4.5)}
+        expected = set()
+        for p_id, p_lon in points.items():
+            for i, s_lon in enumerate(lons):
+                diff = abs((p_lon - s_lon + 180) % 360 - 180)
+                if mags[i] <= 4.5 and diff <= self.stars.orb(mags[i]):
+                    expected.add((p_id, i))
+        self.assertEqual(found, expected)
+
+    def test_chart_conjunctions(self):
+        # 2025-08-22: Sun on Regulus (~0°13' Virgo)
+        chart = Chart(Datetime('2025/08/23', '00:00', '+00:00'), GeoPos(25.03, 121.50))
+        findings = LotsLogic().get_fixed_stars(chart, {const.SUN: '太陽'})
+        self.assertIn({'planet': '太陽', 'star': 'Regulus (軒轅十四)'}, [{k: f[k] for k in ('planet', 'star')} for f in findings])
+        for f in findings:
+            self.assertLessEqual(float(f['orb'].rstrip('°')), 1.5)
+    def test_exact_position_is_looked_up_by_bayer_designation(self):
+        # 'Ras Algethi' by name resolves to a star near 76°; alpha Herculis is near 256°
+        swe.set_ephe_path(os.path.join(os.path.dirname(flatlib.__file__), 'resources', 'swefiles'))
+        try:
+            lots, cat = LotsLogic(), self.stars.catalog
+            jd = swe.julday(2026, 1, 1, 0.0)
+            self.assertAlmostEqual(lots._star_lon(cat.name.index('Ras Algethi'), jd, None), 256.51, places=1)
+            self.assertAlmostEqual(lots._star_lon(cat.name.index('Algedi'), jd, None), 304.13, places=1)
+        finally:
+            swe.set_ephe_path(init_ephemeris())
+
+if __name__ == '__main__':
+    unittest.main()
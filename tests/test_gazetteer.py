@@ -0,0 +1,36 @@
+import unittest
+
+from gazetteer import Gazetteer, Place, normalize_place_name
+
+
+class TestGazetteer(unittest.TestCase):
+    def setUp(self):
+        self.gaz = Gazetteer.default()
+
+    def test_normalize(self):
+        self.assertEqual(normalize_place_name("臺北市"), normalize_place_name("台北"))
+        self.assertEqual(normalize_place_name(" New York City "), "newyork")
+
+    def test_lookup_traditional_chinese_and_aliases(self):
+        for name in ("台北市", "臺北", "Taipei", "taipei city"):
+            self.assertEqual(self.gaz.lookup(name).name, "台北市")
+        self.assertEqual(self.gaz.lookup("倫敦").timezone, "Europe/London")
+        self.assertIsNone(self.gaz.lookup("Atlantis"))
+
+    def test_suffix_does_not_merge_distinct_places(self):
+        self.assertEqual(self.gaz.lookup("新竹縣").name, "新竹縣")
+        self.assertEqual(self.gaz.lookup("新竹市").name, "新竹市")
+
+    def test_prefix_and_fuzzy_suggestions(self):
+        names = [p.name for p in self.gaz.suggest("台")]
+        self.assertIn("台北市", names)
+        self.assertIn("台中市", names)
+        self.assertEqual([p.name for p in self.gaz.suggest("Tokio")][:1], ["東京"])
+        self.assertEqual(self.gaz.suggest(""), [])
+
+    def test_custom_index(self):
+        gaz = Gazetteer([(Place("A", "XX", 1.0, 2.0, "UTC"), ["Alpha", "Alps"])])
+        self.assertEqual([p.name for p in gaz.suggest("al")], ["A"])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,112 @@
+import asyncio
+import threading
+import time
+import unittest
+
+from hedged_ai import HedgedAssistant, LatencyTracker
+
+MESSAGES = [{"role": "user", "content": "盤面資料"}]
+
+
+class FakeAssistant:
+    """Stands in for AIAssistant.astream: waits `first` seconds, then streams tokens."""
+
+    def __init__(self, provider, tokens, first=0.0, error=None, is_configured=True):
+        self.provider = provider
+        self.model_name = f"{provider}-model"
+        self.tokens = tokens
+        self.first = first
+        self.error = error
+        self.is_configured = is_configured
+        self.calls = 0
+        self.closed = threading.Event()
+        self.cancelled = threading.Event()
+
+    async def astream(self, system_prompt, messages):
+        self.calls += 1
+        try:
+            await asyncio.sleep(self.first)
+            if self.error:
+                raise self.error
+            for tok in self.tokens:
+                yield tok
+                await asyncio.sleep(0.01)
+        except asyncio.CancelledError:
+            self.cancelled.set()
+            raise
+        finally:
+            self.closed.set()
+
+    def generate_chat_stream(self, system_prompt, messages):
+        yield f"❌ 錯誤：未偵測到 {self.provider} API Key。請在側邊欄設定。"
+
+    def cache_stats(self):
+        return None
+
+
+class TestHedgedAssistant(unittest.TestCase):
+    def test_fast_primary_never_calls_the_backup(self):
+        primary, backup = FakeAssistant("Groq", ["甲", "乙"]), FakeAssistant("OpenAI", ["X"])
+        hedged = HedgedAssistant(primary, backup, delay=0.5, latencies=LatencyTracker())
+        self.assertEqual(list(hedged.generate_chat_stream("sys", MESSAGES)), ["甲", "乙"])
+        self.assertIs(hedged.winner, primary)
+        self.assertEqual(backup.calls, 0)
+
+    def test_slow_primary_loses_to_the_backup_and_is_cancelled(self):
+        tracker = LatencyTracker()
+        primary = FakeAssistant("Groq", ["慢"] * 50, first=0.3)
+        backup = FakeAssistant("OpenAI", ["快", "答"])
+        hedged = HedgedAssistant(primary, backup, delay=0.05, latencies=tracker)
+        t0 = time.monotonic()
+        self.assertEqual(list(hedged.generate_chat_stream("sys", MESSAGES)), ["快", "答"])
+        self.assertLess(time.monotonic() - t0, 0.3)
+        self.assertIs(hedged.winner, backup)
+        # Cancelled while still waiting for its first token, not left running
+        self.assertTrue(primary.closed.wait(0.2))
+        self.assertTrue(primary.cancelled.is_set())
+        self.assertEqual(len(tracker.samples("OpenAI", "OpenAI-model")), 1)
+        # The losing primary is recorded with a lower bound of its latency
+        self.assertGreaterEqual(tracker.samples("Groq", "Groq-model")[0], 0.05)
+
+    def test_closing_the_stream_cancels_the_request(self):
+        primary = FakeAssistant("Groq", ["甲"] * 50, first=0.1)
+        backup = FakeAssistant("OpenAI", ["乙"] * 50, first=5.0)
+        hedged = HedgedAssistant(primary, backup, delay=0.05, latencies=LatencyTracker())
+        stream = hedged.generate_chat_stream("sys", MESSAGES)
+        self.assertEqual(next(stream), "甲")
+        stream.close()
+        self.assertTrue(primary.cancelled.wait(1.0))
+        self.assertTrue(backup.cancelled.wait(1.0))
+
+    def test_failed_primary_falls_over_at_once(self):
+        primary = FakeAssistant("Groq", [], error=RuntimeError("rate limited"))
+        backup = FakeAssistant("OpenAI", ["好"])
+        hedged = HedgedAssistant(primary, backup, delay=5.0, latencies=LatencyTracker())
+        t0 = time.monotonic()
+        self.assertEqual(list(hedged.generate_chat_stream("sys", MESSAGES)), ["好"])
+        self.assertLess(time.monotonic() - t0, 1.0)
+
+        backup.error = RuntimeError("down")
+        chunks = list(HedgedAssistant(primary, backup, delay=5.0, latencies=LatencyTracker()).generate_chat_stream("sys", MESSAGES))
+        self.assertEqual(len(chunks), 1)
+        self.assertIn("rate limited", chunks[0])
+        self.assertIn("down", chunks[0])
+
+    def test_adaptive_delay(self):
+        tracker = LatencyTracker()
+        self.assertEqual(tracker.hedge_delay("Groq", "m"), LatencyTracker.DEFAULT_DELAY)
+        for s in (0.4, 0.5, 0.5, 0.6, 0.7, 0.8, 0.9, 1.0, 1.1, 1.2):
+            tracker.record("Groq", "m", s)
+        self.assertEqual(tracker.hedge_delay("Groq", "m"), 1.2)
+        for _ in range(5):
+            tracker.record("Groq", "m", 60.0)
+        self.assertEqual(tracker.hedge_delay("Groq", "m"), LatencyTracker.MAX_DELAY)
+        self.assertEqual(tracker.stats()[("Groq", "m")]["count"], 15)
+
+        hedged = HedgedAssistant(FakeAssistant("Groq", ["a"]), FakeAssistant("OpenAI", ["b"], is_configured=False), latencies=tracker)
+        hedged.primary.model_name = "m"
+        self.assertEqual(hedged.hedge_delay(), LatencyTracker.MAX_DELAY)
+        self.assertIsNone(hedged.backup)
+
+if __name__ == '__main__':
+    unittest.main()
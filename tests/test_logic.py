@@ -1,9 +1,9 @@
-import sys
 from unittest.mock import MagicMock, patch
 
+from tests.engine_mocks import import_with_mocks
+
 # Mock external dependencies before importing logic
 mock_swisseph = MagicMock()
-sys.modules['swisseph'] = mock_swisseph
 
 mock_const = MagicMock()
 mock_const.SUN = 'Sun'
@@ -31,27 +31,30 @@ mock_const.LIST_SIGNS = [
     'Libra', 'Scorpio', 'Sagittarius', 'Capricorn', 'Aquarius', 'Pisces'
 ]
 
-sys.modules['flatlib'] = MagicMock()
-sys.modules['flatlib.const'] = mock_const
-sys.modules['flatlib.chart'] = MagicMock()
-sys.modules['flatlib.datetime'] = MagicMock()
-sys.modules['flatlib.geopos'] = MagicMock()
-
 mock_streamlit = MagicMock()
 mock_streamlit.cache_data = lambda x: x
 mock_streamlit.cache_resource = lambda x: x
-sys.modules['streamlit'] = mock_streamlit
 
-sys.modules['pandas'] = MagicMock()
-sys.modules['geopy'] = MagicMock()
-sys.modules['geopy.geocoders'] = MagicMock()
-
-# Now we can import AstrologyLogic
-from logic import AstrologyLogic
+MOCK_MODULES = {
+    'swisseph': mock_swisseph,
+    'flatlib': MagicMock(),
+    'flatlib.const': mock_const,
+    'flatlib.chart': MagicMock(),
+    'flatlib.datetime': MagicMock(),
+    'flatlib.geopos': MagicMock(),
+    'streamlit': mock_streamlit,
+    'pandas': MagicMock(),
+    'geopy': MagicMock(),
+    'geopy.geocoders': MagicMock(),
+}
+
+# Import the engine against the mocks, without leaking them into other test modules
+logic_module = import_with_mocks('logic', MOCK_MODULES)
+AstrologyLogic = logic_module.AstrologyLogic
 
 def test_get_location_coordinates_success():
     """Test successful geocoding."""
-    with patch('logic.ArcGIS') as mock_arcgis:
+    with patch.object(logic_module, 'ArcGIS') as mock_arcgis:
         mock_geolocator = MagicMock()
         mock_arcgis.return_value = mock_geolocator
 
@@ -68,7 +71,7 @@ def test_get_location_coordinates_success():
 
 def test_get_location_coordinates_none():
     """Test geocoding returning None."""
-    with patch('logic.ArcGIS') as mock_arcgis:
+    with patch.object(logic_module, 'ArcGIS') as mock_arcgis:
         mock_geolocator = MagicMock()
         mock_arcgis.return_value = mock_geolocator
 
@@ -82,7 +85,7 @@ def test_get_location_coordinates_none():
 
 def test_get_location_coordinates_exception():
     """Test geocoding raising an exception."""
-    with patch('logic.ArcGIS') as mock_arcgis:
+    with patch.object(logic_module, 'ArcGIS') as mock_arcgis:
         mock_geolocator = MagicMock()
         mock_arcgis.return_value = mock_geolocator
 
@@ -94,3 +97,56 @@ def test_get_location_coordinates_exception():
         # Should return None when an exception occurs
         assert coords is None
         mock_geolocator.geocode.assert_called_once_with("Taipei", timeout=10)
+
+def test_get_location_coordinates_cached():
+    """Repeated lookups (found and not found) do not hit the network again."""
+    with patch.object(logic_module, 'ArcGIS') as mock_arcgis:
+        mock_geolocator = MagicMock()
+        mock_arcgis.return_value = mock_geolocator
+        mock_geolocator.geocode.side_effect = lambda name, timeout: (
+            MagicMock(latitude=1.0, longitude=2.0) if name == "Somewhere" else None
+        )
+
+        logic = AstrologyLogic()
+        assert logic.get_location_coordinates("Somewhere") == (1.0, 2.0)
+        assert logic.get_location_coordinates("somewhere ") == (1.0, 2.0)
+        assert logic.get_location_coordinates("Nowhere") is None
+        assert logic.get_location_coordinates("Nowhere") is None
+        assert mock_geolocator.geocode.call_count == 2
+
+def test_geocode_cache_is_bounded():
+    """Least recently used queries are dropped beyond GEOCODE_CACHE_SIZE."""
+    with patch.object(logic_module, 'ArcGIS') as mock_arcgis, \
+            patch.object(AstrologyLogic, 'GEOCODE_CACHE_SIZE', 2):
+        mock_geolocator = MagicMock()
+        mock_arcgis.return_value = mock_geolocator
+        mock_geolocator.geocode.side_effect = lambda name, timeout: MagicMock(latitude=1.0, longitude=2.0)
+
+        logic = AstrologyLogic()
+        for name in ("A", "B", "A", "C"):
+            logic.get_location_coordinates(name)
+        assert len(logic._geocode_cache) == 2
+        assert mock_geolocator.geocode.call_count == 3
+        logic.get_location_coordinates("A")
+        assert mock_geolocator.geocode.call_count == 3
+        logic.get_location_coordinates("B")
+        assert mock_geolocator.geocode.call_count == 4
+
+def test_resolve_location_uses_gazetteer():
+    """Known cities are answered offline without the remote geocoder."""
+    with patch.object(logic_module, 'ArcGIS') as mock_arcgis:
+        logic = AstrologyLogic()
+        place = logic.resolve_location("臺北市")
+        assert place['source'] == 'gazetteer'
+        assert place['timezone'] == 'Asia/Taipei'
+        assert abs(place['lat'] - 25.03) < 0.1
+        mock_arcgis.assert_not_called()
+
+def test_get_timezone_info_at_birth_moment():
+    """The offset comes from the birth moment, not from today."""
+    from datetime import datetime
+    logic = AstrologyLogic()
+    tz_name, offset = logic.get_timezone_info(40.71, -74.00, datetime(1980, 7, 4, 12, 0))
+    assert tz_name == 'America/New_York'
+    assert offset == -4.0
+    assert logic.get_timezone_info(40.71, -74.00, datetime(1980, 1, 4, 12, 0))[1] == -5.0
@@ -0,0 +1,66 @@
+import unittest
+
+import numpy as np
+from flatlib import const
+from flatlib.chart import Chart
+from flatlib.datetime import Datetime
+from flatlib.geopos import GeoPos
+
+from batch_logic import BatchChartLogic
+from lots_logic import LotsLogic
+from logic import AstrologyLogic
+
+
+class TestLotFormulas(unittest.TestCase):
+    # Asc, Sun, Moon, Mercury, Venus, Mars, Jupiter, Saturn
+    VALUES = np.array([[100.0, 10.0, 50.0, 20.0, 200.0, 300.0, 130.0, 250.0]])
+
+    def setUp(self):
+        self.lots = LotsLogic()
+        self.keys = [key for key, _, _, _ in LotsLogic.LOTS]
+
+    def _lot(self, key, is_day):
+        return self.lots.evaluate_lots(self.VALUES, [is_day])[0][self.keys.index(key)]
+
+    def test_fortune_and_spirit_reverse_by_sect(self):
+        self.assertAlmostEqual(self._lot('Fortune', True), 140.0)  # Asc + Moon - Sun
+        self.assertAlmostEqual(self._lot('Fortune', False), 60.0)  # Asc + Sun - Moon
+        self.assertAlmostEqual(self._lot('Spirit', True), 60.0)
+        self.assertAlmostEqual(self._lot('Spirit', False), 140.0)
+
+    def test_lots_built_on_lots(self):
+        # Night Necessity: Asc + Mercury - Fortune, with the night Fortune (60)
+        self.assertAlmostEqual(self._lot('Necessity', False), (100 + 20 - 60) % 360)
+        # Day Eros: Asc + Venus - Spirit, with the day Spirit (60)
+        self.assertAlmostEqual(self._lot('Eros', True), (100 + 200 - 60) % 360)
+
+    def test_constants_and_house_cusps(self):
+        self.assertAlmostEqual(self._lot('Exaltation', True), (100 + 19 - 10) % 360)
+        self.assertAlmostEqual(self._lot('Exaltation', False), (100 + 33 - 50) % 360)
+        # Saturn + 8th cusp (Asc + 210) - Moon, the same in both sects
+        self.assertAlmostEqual(self._lot('Death', True), (250 + 310 - 50) % 360)
+        self.assertAlmostEqual(self._lot('Death', False), self._lot('Death', True))
+
+    def test_unknown_term_is_rejected(self):
+        class BadLots(LotsLogic):
+            LOTS = [('Bad', 'Bad', 'Asc + Pluto - Sun', True)]
+            _compiled = None
+        with self.assertRaises(ValueError):
+            BadLots.compiled_lots()
+
+    def test_batch_matches_single_chart(self):
+        logic = AstrologyLogic()
+        births = [('1990/01/01', '12:00', '+08:00'), ('1975/07/20', '03:45', '+00:00')]
+        charts = [Chart(Datetime(d, t, off), GeoPos(25.03, 121.50)) for d, t, off in births]
+        res = BatchChartLogic().compute([c.date.jd for c in charts], 25.03, 121.50)
+        self.assertEqual(res['lots'].shape, (2, len(LotsLogic.LOTS)))
+        for i, chart in enumerate(charts):
+            houses = logic.calculate_equal_houses(chart.get(const.ASC).lon)
+            single = logic.calculate_lots(chart, houses, logic.is_day_birth(chart, houses))
+            self.assertEqual(len(single), len(LotsLogic.LOTS))
+            for k, lot in enumerate(single):
+                self.assertEqual(lot['sign'], logic.TRANS_SIGNS[const.LIST_SIGNS[res['lot_sign'][i, k]]])
+                self.assertEqual(lot['house'], logic.TRANS_HOUSES[res['lot_house'][i, k]])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,6 +1,7 @@
 import unittest
 from unittest.mock import MagicMock, patch
-import sys
+
+from tests.engine_mocks import import_with_mocks
 
 # Mock swisseph and flatlib before importing LotsLogic
 mock_swe = MagicMock()
@@ -17,12 +18,13 @@ mock_const.JUPITER = 'Jupiter'
 mock_const.SATURN = 'Saturn'
 mock_flatlib.const = mock_const
 
-sys.modules['swisseph'] = mock_swe
-sys.modules['flatlib'] = mock_flatlib
-sys.modules['flatlib.const'] = mock_const
-
-# Now import LotsLogic
-from lots_logic import LotsLogic
+# Import LotsLogic against the mocks, without leaking them into other test modules
+lots_logic = import_with_mocks('lots_logic', {
+    'swisseph': mock_swe,
+    'flatlib': mock_flatlib,
+    'flatlib.const': mock_const,
+})
+LotsLogic = lots_logic.LotsLogic
 
 class TestLotsLogic(unittest.TestCase):
     def setUp(self):
@@ -46,12 +48,12 @@ class TestLotsLogic(unittest.TestCase):
             'Saturn': MagicMock(lon=0)
         }.get(p_id, MagicMock(lon=0))
 
-    @patch('lots_logic.swe')
+    @patch.object(lots_logic, 'swe')
     def test_get_fixed_stars_success(self, mock_swe_local):
         # Mock swisseph.fixstar2_ut return value
         # returns (data, name) where data is [lon, lat, ...]
         mock_swe_local.fixstar2_ut.side_effect = lambda name, jd: (
-            ([150.1, 0, 0, 0, 0, 0], 'Regulus') if name == 'Regulus' else
+            ([150.1, 0, 0, 0, 0, 0], 'Regulus') if name == ',alLeo' else
             ([204.0, 0, 0, 0, 0, 0], 'Spica')
         )
 
@@ -60,12 +62,15 @@ class TestLotsLogic(unittest.TestCase):
 
         # Sun at 150.5 is within 1.5 degrees of Regulus (150.1)
         self.assertTrue(any(f['star'] == 'Regulus (軒轅十四)' and f['planet'] == '太陽' for f in findings))
-        mock_swe_local.fixstar2_ut.assert_any_call('Regulus', 2461041.5)
+        mock_swe_local.fixstar2_ut.assert_any_call(',alLeo', 2461041.5)
 
-    @patch('lots_logic.swe')
+    @patch.object(lots_logic, 'swe')
     def test_get_fixed_stars_fallback(self, mock_swe_local):
-        # Mock swisseph.fixstar2_ut to raise an exception
-        mock_swe_local.fixstar2_ut.side_effect = Exception("File not found")
+        # Mock swisseph.fixstar2_ut to raise the error swisseph raises without sefstars.txt
+        class SweError(Exception):
+            pass
+        mock_swe_local.Error = SweError
+        mock_swe_local.fixstar2_ut.side_effect = SweError("File not found")
 
         trans_planets = {'Sun': '太陽', 'Moon': '月亮'}
         # Even with exception, it should use fallback values
@@ -74,5 +79,10 @@ class TestLotsLogic(unittest.TestCase):
 
         self.assertTrue(any(f['star'] == 'Regulus (軒轅十四)' and f['planet'] == '太陽' for f in findings))
 
+        # Anything else is a bug and is not masked by the fallback
+        mock_swe_local.fixstar2_ut.side_effect = TypeError("bad argument")
+        with self.assertRaises(TypeError):
+            self.logic.get_fixed_stars(self.mock_chart, trans_planets)
+
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,113 @@
+import asyncio
+import tempfile
+import time
+import unittest
+from unittest import mock
+
+from ai_clients import ClientRegistry
+from ai_logic import AIAssistant
+from benchmarks import bench_ai
+from benchmarks.mock_llm_server import MockLLMServer, reply_tokens
+from response_cache import ResponseCache
+
+MESSAGES = [{"role": "user", "content": "盤面資料"}]
+
+
+class TestGenerateChatStream(unittest.TestCase):
+    """AIAssistant.generate_chat_stream end to end against the local mock API."""
+
+    @classmethod
+    def setUpClass(cls):
+        cls.server = MockLLMServer(reply_tokens=8).start()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.stop()
+
+    def setUp(self):
+        self.server.ttft, self.server.tokens_per_second = 0.0, 0
+        self.server.error_rate, self.server.disconnect_after = 0.0, None
+        self.server.requests.clear()
+
+    def assistant(self, provider, **kwargs):
+        model = "mock-gemini" if provider == "Gemini" else "mock-fast"
+        kwargs.setdefault("response_cache", False)
+        return AIAssistant(provider, api_key="mock-key", model_name=model,
+                           clients=ClientRegistry(base_urls=self.server.base_urls()), **kwargs)
+
+    def test_every_provider_streams(self):
+        for provider in ("OpenAI", "Groq", "OpenRouter", "Gemini"):
+            with self.subTest(provider=provider):
+                self.assertEqual(list(self.assistant(provider).generate_chat_stream("sys", MESSAGES)), reply_tokens(8))
+        paths = [path for path, _ in self.server.requests]
+        self.assertEqual(paths[:3], ["/v1/chat/completions", "/openai/v1/chat/completions", "/v1/chat/completions"])
+        self.assertTrue(paths[3].endswith("mock-gemini:streamGenerateContent"))
+        body = self.server.requests[0][1]
+        self.assertTrue(body["stream"])
+        self.assertEqual(body["messages"][0], {"role": "system", "content": "sys"})
+
+    def test_async_stream_and_pacing(self):
+        self.server.ttft, self.server.tokens_per_second = 0.1, 100
+        ai = self.assistant("Groq")
+
+        async def collect():
+            chunks = [c async for c in ai.agenerate_chat_stream("sys", MESSAGES)]
+            await ai.async_client.close()
+            return chunks
+        t0 = time.perf_counter()
+        self.assertEqual(asyncio.run(collect()), reply_tokens(8))
+        self.assertGreaterEqual(time.perf_counter() - t0, 0.1 + 7 / 100)
+
+        m = bench_ai.measure_stream(ai, MESSAGES)
+        self.assertGreaterEqual(m["ttft"], 0.1)
+        self.assertEqual(m["chunks"], 8)
+        self.assertLess(bench_ai.tokens_per_second(m), 110)
+
+    def test_async_stream_shares_the_cache_and_error_handling(self):
+        cache = ResponseCache(cache_dir=self.enterContext(tempfile.TemporaryDirectory()))
+        ai = self.assistant("OpenAI", response_cache=cache)
+
+        async def collect():
+            chunks = [c async for c in ai.agenerate_chat_stream("sys", MESSAGES)]
+            await ai.async_client.close()
+            return chunks
+        with mock.patch("asyncio.to_thread", wraps=asyncio.to_thread) as to_thread:
+            self.assertEqual(asyncio.run(collect()), reply_tokens(8))
+        # Cache lookup and cache write (disk) both left the event loop
+        offloaded = [c.args[0].__name__ for c in to_thread.call_args_list]
+        self.assertIn("_prepare", offloaded)
+        self.assertIn("_store", offloaded)
+        self.assertEqual(list(ai.generate_chat_stream("sys", MESSAGES)), reply_tokens(8))
+        self.assertEqual(len(self.server.requests), 1)
+
+        # Uncached, a failing request reports the same error chunk both ways
+        self.server.error_rate, self.server.error_status = 1.0, 400
+        ai = self.assistant("OpenAI")
+        chunks = asyncio.run(collect())
+        self.assertEqual(chunks, list(ai.generate_chat_stream("sys", MESSAGES)))
+        self.assertEqual(len(chunks), 1)
+        self.assertTrue(chunks[0].startswith("❌ OpenAI 對話發生錯誤"))
+
+    def test_injected_errors_are_reported_and_not_cached(self):
+        cache = ResponseCache(cache_dir=self.enterContext(tempfile.TemporaryDirectory()))
+        cache.put = mock.Mock(wraps=cache.put)
+        ai = self.assistant("OpenAI", response_cache=cache)
+
+        self.server.error_rate, self.server.error_status = 1.0, 400
+        chunks = list(ai.generate_chat_stream("sys", MESSAGES))
+        self.assertEqual(len(chunks), 1)
+        self.assertTrue(chunks[0].startswith("❌ OpenAI 對話發生錯誤"))
+
+        # A stream cut halfway keeps what arrived, then reports the error
+        self.server.error_rate, self.server.disconnect_after = 0.0, 3
+        chunks = list(ai.generate_chat_stream("sys", MESSAGES))
+        self.assertEqual(chunks[:3], reply_tokens(3))
+        self.assertTrue(chunks[-1].startswith("❌"))
+        cache.put.assert_not_called()
+
+        self.server.disconnect_after = None
+        self.assertEqual(list(ai.generate_chat_stream("sys", MESSAGES)), reply_tokens(8))
+        cache.put.assert_called_once()
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,116 @@
+import threading
+import unittest
+from types import SimpleNamespace
+from unittest import mock
+
+import ai_clients
+from ai_clients import ClientRegistry, key_fingerprint
+from ai_logic import AIAssistant
+from model_catalog import ModelCatalog
+
+FALLBACK = ["default-model"]
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+class TestModelCatalog(unittest.TestCase):
+    def setUp(self):
+        self.clock = FakeClock()
+        self.catalog = ModelCatalog(ttl=3600, clock=self.clock)
+        self.calls = 0
+
+    def discover(self):
+        self.calls += 1
+        return [f"model-v{self.calls}"]
+
+    def test_first_call_returns_fallback_without_waiting(self):
+        gate = threading.Event()
+
+        def slow():
+            gate.wait(5)
+            return ["remote"]
+        self.assertEqual(self.catalog.get("Groq", "k", slow, FALLBACK), FALLBACK)
+        self.assertTrue(self.catalog.is_refreshing("Groq", "k"))
+        gate.set()
+        self.catalog.wait(5)
+        self.assertEqual(self.catalog.get("Groq", "k", slow, FALLBACK), ["remote"])
+
+    def test_stale_list_served_while_refreshing(self):
+        self.catalog.get("Groq", "k", self.discover, FALLBACK)
+        self.catalog.wait(5)
+        self.assertEqual(self.catalog.get("Groq", "k", self.discover, FALLBACK), ["model-v1"])
+        self.assertEqual(self.calls, 1)  # fresh: no refresh
+        self.clock.now += 3601
+        self.assertEqual(self.catalog.get("Groq", "k", self.discover, FALLBACK), ["model-v1"])
+        self.catalog.wait(5)
+        self.assertEqual(self.catalog.get("Groq", "k", self.discover, FALLBACK), ["model-v2"])
+
+    def test_keyed_by_provider_and_key(self):
+        self.catalog.get("Groq", "k1", self.discover, FALLBACK)
+        self.catalog.wait(5)
+        self.assertEqual(self.catalog.get("Groq", "k2", self.discover, FALLBACK), FALLBACK)
+        self.assertEqual(self.catalog.get("OpenAI", "k1", self.discover, FALLBACK), FALLBACK)
+        self.catalog.wait(5)
+        self.assertEqual(self.calls, 3)
+
+    def test_failed_refresh_keeps_list_and_retries_soon(self):
+        self.catalog.get("Groq", "k", self.discover, FALLBACK)
+        self.catalog.wait(5)
+        self.clock.now += 3601
+
+        def failing():
+            raise ConnectionError("offline")
+        with mock.patch('builtins.print'):
+            self.catalog.get("Groq", "k", failing, FALLBACK)
+            self.catalog.wait(5)
+        self.assertEqual(self.catalog.errors, 1)
+        self.assertEqual(self.catalog.get("Groq", "k", self.discover, FALLBACK), ["model-v1"])
+        self.assertEqual(self.calls, 1)
+        self.clock.now += ModelCatalog.ERROR_RETRY_SECONDS
+        self.catalog.get("Groq", "k", self.discover, FALLBACK)
+        self.catalog.wait(5)
+        self.assertEqual(self.calls, 2)
+
+    def test_entries_are_bounded(self):
+        catalog = ModelCatalog(ttl=3600, clock=self.clock, max_entries=2)
+        for key in ("k1", "k2", "k1", "k3"):
+            catalog.get("Groq", key, self.discover, FALLBACK)
+            catalog.wait(5)
+        self.assertEqual(len(catalog._entries), 2)
+        # k1 was used more recently than k2, so k2 went first
+        self.assertNotEqual(catalog.get("Groq", "k1", self.discover, FALLBACK), FALLBACK)
+        self.assertEqual(catalog.get("Groq", "k2", self.discover, FALLBACK), FALLBACK)
+
+    def test_gemini_discovery_lists_with_its_own_key(self):
+        listed_with = []
+
+        def list_models():
+            listed_with.append(ai_clients._gemini_config[0])
+            return [SimpleNamespace(name='models/gemini-2.0-flash', supported_generation_methods=['generateContent'])]
+        with mock.patch("ai_clients._gemini_config", None), mock.patch("google.generativeai.configure"), \
+                mock.patch("google.generativeai.list_models", list_models):
+            reg = ClientRegistry()
+            a = AIAssistant("Gemini", api_key="key-a", clients=reg, response_cache=False)
+            AIAssistant("Gemini", api_key="key-b", clients=reg, response_cache=False)
+            a.available_models(self.catalog)
+            self.catalog.wait(5)
+            self.assertEqual(a.available_models(self.catalog), ["gemini-2.0-flash"])
+        self.assertEqual(listed_with, [key_fingerprint("key-a")])
+
+    def test_assistant_uses_catalog(self):
+        ai = AIAssistant("OpenAI", api_key="sk-test", response_cache=False)
+        with mock.patch.object(AIAssistant, '_discover_models', return_value=["gpt-x"]):
+            self.assertEqual(ai.available_models(self.catalog), ai.get_model_list("OpenAI"))
+            self.catalog.wait(5)
+            self.assertEqual(ai.available_models(self.catalog), ["gpt-x"])
+        with mock.patch.dict('os.environ', {}, clear=True):
+            self.assertEqual(AIAssistant("OpenAI", api_key="").available_models(self.catalog), ai.get_model_list("OpenAI"))
+
+if __name__ == '__main__':
+    unittest.main()
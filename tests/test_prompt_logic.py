@@ -0,0 +1,74 @@
+import unittest
+from datetime import date
+from unittest import mock
+
+import prompt_logic
+from logic import AstrologyLogic
+from prompt_logic import PromptLogic, count_tokens, format_coords
+
+
+def _section(text, title):
+    """Lines of a '## title' section of a prompt ([] if absent)."""
+    if f'## {title}\n' not in text:
+        return []
+    return text.split(f'## {title}\n')[1].split('\n\n')[0].splitlines()
+
+
+class TestPromptLogic(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.logic = AstrologyLogic()
+        cls.natal = cls.logic.build_report('natal', '1990/01/01', '12:00', '+08:00', 25.03, 121.50, '台北市', date(2026, 1, 1))
+        cls.horary = cls.logic.build_report('horary', '1990/01/01', '12:00', '+08:00', 25.03, 121.50, '台北市', date(2026, 1, 1))
+        cls.prompts = PromptLogic(cls.logic)
+
+    def test_token_estimates(self):
+        self.assertEqual(count_tokens(""), 0)
+        self.assertGreater(count_tokens("太陽摩羯座", "Groq"), count_tokens("太陽摩羯座", "Gemini"))
+        with mock.patch.object(prompt_logic, 'tiktoken', None):
+            self.assertEqual(count_tokens("abcd" * 10, "OpenAI"), 10)
+            self.assertEqual(count_tokens("太陽", "OpenAI"), 2)
+
+    def test_coordinates_carry_their_hemisphere(self):
+        self.assertEqual(format_coords(25.03, 121.5), "25.03N, 121.50E")
+        self.assertEqual(format_coords(-33.87, -58.38), "33.87S, 58.38W")
+        report = self.natal._replace(lat=-33.87, lon=-70.65)
+        self.assertIn("(33.87S, 70.65W)", self.prompts.serialize(report, 'Groq'))
+
+    def test_compact_and_complete_without_budget_pressure(self):
+        text = self.prompts.serialize(self.natal, 'Groq', budget=100000)
+        self.assertLess(count_tokens(text, 'Groq'), count_tokens(self.logic.reports.markdown(self.natal), 'Groq'))
+        for title in ('## 本命盤', '## 行星', '## 相位', '## 當前時間主星', '## 希臘點', '## 未來法達', '## 未來 12 個月行運'):
+            self.assertIn(title, text)
+        self.assertNotIn('(Peregrine)', text)
+        self.assertNotIn('產出時間', text)
+        # Only the firdaria periods ahead, not the 75-year table
+        self.assertEqual(len(_section(text, '未來法達')), PromptLogic.FIRDARIA_AHEAD)
+
+    def test_budget_trims_low_value_sections_first(self):
+        full = self.prompts.serialize(self.natal, 'OpenAI', budget=100000)
+        for budget in (1200, 900, 600):
+            text = self.prompts.serialize(self.natal, 'OpenAI', budget=budget)
+            self.assertLessEqual(count_tokens(text, 'OpenAI'), budget + 5)
+            self.assertLess(len(text), len(full))
+        text = self.prompts.serialize(self.natal, 'OpenAI', budget=1000)
+        # Transits go first, line by line; everything more valuable is intact
+        self.assertLess(len(_section(text, '未來 12 個月行運')), len(_section(full, '未來 12 個月行運')))
+        self.assertEqual(_section(text, '未來法達'), _section(full, '未來法達'))
+        for title in ('## 行星', '## 相位', '## 當前時間主星'):
+            self.assertIn(title, text)
+        # The chart itself survives any budget
+        tiny = self.prompts.serialize(self.natal, 'OpenAI', budget=10)
+        self.assertEqual(len(_section(tiny, '行星')), 7)
+        self.assertNotIn('## 希臘點', tiny)
+
+    def test_horary_and_report_integration(self):
+        text = self.prompts.serialize(self.horary)
+        self.assertIn('## 卜卦盤', text)
+        self.assertNotIn('小限', text)
+        reports = self.logic.reports
+        self.assertIs(reports.prompt(self.natal, 'Groq', 600), reports.prompt(self.natal, 'Groq', 600))
+        self.assertNotEqual(reports.prompt(self.natal, 'Groq', 600), reports.prompt(self.natal, 'Groq', 2000))
+
+if __name__ == '__main__':
+    unittest.main()
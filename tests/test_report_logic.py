@@ -0,0 +1,89 @@
+import json
+import pickle
+import unittest
+from datetime import date
+from unittest import mock
+
+from logic import AstrologyLogic
+from report_logic import ChartReport, ReportLogic, add_years
+
+
+class TestReportLogic(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.logic = AstrologyLogic()
+        cls.args = ('1990/01/01', '12:00', '+08:00', 25.03, 121.50, '台北市', date(2026, 1, 1))
+        cls.natal = cls.logic.build_report('natal', *cls.args)
+        cls.horary = cls.logic.build_report('horary', *cls.args)
+
+    def setUp(self):
+        self.reports = ReportLogic(self.logic)
+
+    def test_model(self):
+        r = self.natal
+        self.assertIsInstance(r, ChartReport)
+        self.assertEqual(r.key, ReportLogic.report_key('natal', '1990/01/01', '12:00', 8.0, 25.03, 121.50, '台北市', date(2026, 1, 1)))
+        self.assertNotEqual(r.key, self.horary.key)
+        # The same instant written in another offset is the same chart
+        self.assertEqual(ReportLogic.report_key('natal', '1990/01/01', '04:00', 0.0, 25.03, 121.50, '台北市', date(2026, 1, 1)), r.key)
+        self.assertEqual([p['year'] for p in r.future_prof], [2027, 2028, 2029, 2030, 2031])
+        self.assertEqual(len(r.lifetime_prof), 90)
+        # A mid-year birthday: each row is labelled with the year its period starts
+        summer = self.logic.build_report('natal', '1985/07/13', '03:25', '+08:00', 22.32, 114.17, '香港', date(2026, 1, 1))
+        self.assertEqual([p['year'] for p in summer.future_prof], [2026, 2027, 2028, 2029, 2030])
+        self.assertEqual(summer.future_prof[0]['start'], date(2026, 7, 13))
+        self.assertEqual([p['age'] for p in summer.future_prof], [41, 42, 43, 44, 45])
+        # A leap-day birth: the report windows follow the profection years (1 March in common years)
+        self.assertEqual(add_years(date(2028, 2, 29), 1), date(2029, 3, 1))
+        leap = self.logic.build_report('natal', '1992/02/29', '12:00', '+08:00', 25.03, 121.50, '台北市', date(2028, 2, 29))
+        self.assertEqual(len(leap.lifetime_prof), 90)
+        self.assertEqual(leap.lifetime_prof[1]['start'], date(1993, 3, 1))
+        self.assertEqual(leap.future_prof[0]['start'], date(2029, 3, 1))
+        self.assertEqual([p['age'] for p in leap.future_prof], [37, 38, 39, 40, 41])
+        self.assertTrue(r.transits)
+        self.assertEqual((self.horary.future_prof, self.horary.transits, self.horary.natal_points), ([], [], None))
+        # Stored as is in the chart cache
+        self.assertEqual(pickle.loads(pickle.dumps(r)), r)
+
+    def test_markdown(self):
+        md = self.reports.markdown(self.natal)
+        self.assertTrue(md.startswith('# 古典占星本命盤完整資料 (升級版)'))
+        for heading in ('## 出生資訊', '## 行星狀態與本質力量', '## 相位與接納', '### 未來 5 年小限主星預告', '### 完整法達星限時間表',
+                        '### 未來 12 個月行運 (Transits)'):
+            self.assertIn(heading, md)
+        self.assertIn('| 2027 年 |', md)
+        self.assertNotIn('## 推運資訊', self.reports.markdown(self.horary))
+
+    def test_prompt_json_and_html(self):
+        prompt = self.reports.prompt(self.natal)
+        self.assertIn('## 行星', prompt)
+        self.assertNotIn('產出時間', prompt)
+        self.assertNotIn('AI 自動解析已就緒', prompt)
+
+        data = json.loads(self.reports.to_json(self.natal))
+        self.assertEqual(set(data), set(ChartReport._fields))
+        self.assertEqual(data['lifetime_prof'][0]['age'], 0)
+
+        page = self.reports.html(self.natal)
+        self.assertTrue(page.startswith('<!DOCTYPE html>'))
+        self.assertEqual(page.count('<table>'), sum(1 for _, rows in self.reports.tables(self.natal).values() if rows) - 1)
+
+    def test_tables(self):
+        tables = self.reports.tables(self.natal)
+        for name, (columns, rows) in tables.items():
+            self.assertTrue(all(len(row) == len(columns) for row in rows), name)
+        self.assertEqual(len(tables['houses'][1]), 12)
+        self.assertEqual(len(tables['lifetime_prof'][1]), 90)
+
+    def test_rendering_is_memoized_per_chart(self):
+        with mock.patch.object(ReportLogic, '_render_markdown', autospec=True, side_effect=ReportLogic._render_markdown) as render:
+            first = self.reports.markdown(self.natal)
+            self.assertIs(self.reports.markdown(self.natal), first)
+            self.assertEqual(render.call_count, 1)
+            self.reports.markdown(self.horary)
+            self.assertEqual(render.call_count, 2)
+        with self.assertRaises(ValueError):
+            self.reports.render(self.natal, 'pdf')
+
+if __name__ == '__main__':
+    unittest.main()
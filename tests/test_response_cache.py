@@ -0,0 +1,63 @@
+import shutil
+import tempfile
+import unittest
+from unittest import mock
+
+from ai_logic import AIAssistant
+from response_cache import ResponseCache
+
+MESSAGES = [{"role": "user", "content": "盤面資料"}]
+
+
+class TestResponseCache(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.cache = ResponseCache(max_entries=2, cache_dir=self.tmp_dir, max_disk_entries=3)
+        self.ai = AIAssistant(provider="OpenAI", api_key="sk-test", model_name="gpt-4o", response_cache=self.cache)
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir, ignore_errors=True)
+
+    def test_key_covers_provider_model_prompt_and_messages(self):
+        k = ResponseCache.response_key("OpenAI", "gpt-4o", "sys", MESSAGES)
+        self.assertEqual(k, ResponseCache.response_key("OpenAI", "gpt-4o", "sys", [dict(MESSAGES[0])]))
+        for other in (("Groq", "gpt-4o", "sys", MESSAGES), ("OpenAI", "gpt-4o-mini", "sys", MESSAGES),
+                      ("OpenAI", "gpt-4o", "sys2", MESSAGES),
+                      ("OpenAI", "gpt-4o", "sys", MESSAGES + [{"role": "assistant", "content": "x"}])):
+            self.assertNotEqual(k, ResponseCache.response_key(*other))
+
+    def test_hit_is_replayed_as_a_stream(self):
+        with mock.patch.object(AIAssistant, '_provider_stream', return_value=iter(["甲", "乙", "丙"])) as provider:
+            first = list(self.ai.generate_chat_stream("sys", MESSAGES))
+            second = list(self.ai.generate_chat_stream("sys", MESSAGES))
+        self.assertEqual(first, ["甲", "乙", "丙"])
+        self.assertEqual(second, first)
+        self.assertEqual(provider.call_count, 1)
+        self.assertEqual(self.ai.cache_stats()['hits'], 1)
+        self.assertEqual(self.ai.cache_stats()['misses'], 1)
+        # Persisted: a fresh process-level cache on the same directory hits too
+        fresh = ResponseCache(cache_dir=self.tmp_dir)
+        self.assertEqual(fresh.get(ResponseCache.response_key("OpenAI", "gpt-4o", "sys", MESSAGES)), first)
+
+    def test_errors_and_abandoned_streams_are_not_cached(self):
+        def failing(*args):
+            yield "部分"
+            raise RuntimeError("rate limited")
+        with mock.patch.object(AIAssistant, '_provider_stream', side_effect=failing):
+            out = list(self.ai.generate_chat_stream("sys", MESSAGES))
+        self.assertIn("rate limited", out[-1])
+        with mock.patch.object(AIAssistant, '_provider_stream', return_value=iter(["a", "b"])):
+            stream = self.ai.generate_chat_stream("sys", MESSAGES)
+            next(stream)
+            stream.close()
+        self.assertEqual(self.cache.stats()['entries'], 0)
+
+    def test_disk_store_is_bounded(self):
+        for i in range(6):
+            self.cache.put(f"{i:064x}", [str(i)])
+        self.cache.clear()
+        on_disk = [i for i in range(6) if self.cache.get(f"{i:064x}") is not None]
+        self.assertEqual(len(on_disk), 3)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -2,7 +2,6 @@ import unittest
 from datetime import date, datetime
 from time_lords_logic import TimeLordsLogic
 from flatlib import const
-import pandas as pd
 
 class TestTimeLordsLogic(unittest.TestCase):
     def setUp(self):
@@ -84,7 +83,7 @@ class TestTimeLordsLogic(unittest.TestCase):
         data = self.logic.get_firdaria_data(birth_date, True)
         self.assertIn('active', data)
         self.assertIn('timeline', data)
-        self.assertIsInstance(data['active']['start'], (date, datetime, pd.Timestamp))
+        self.assertIsInstance(data['active']['start'], (date, datetime))
 
     def test_date_edge_cases(self):
         birth_date = "2000/01/01"
@@ -112,5 +111,44 @@ class TestTimeLordsLogic(unittest.TestCase):
         # So at sub_end it should be the NEXT major/minor period.
         self.assertEqual(data_at_end['active']['major'], const.VENUS)
 
+    def test_compiled_timeline_queries(self):
+        tl = TimeLordsLogic.compile_firdaria(date(1990, 1, 1), True)
+        self.assertIs(tl, TimeLordsLogic.compile_firdaria(date(1990, 1, 1), True))
+        self.assertEqual(len(tl.majors), 7 * 7 + 2)
+        dates = [date(1989, 12, 31), date(1990, 1, 1), date(2001, 7, 1), date(2061, 1, 1), date(2070, 1, 1)]
+        idx = self.logic.active_firdaria_many(tl, dates)
+        self.assertEqual(list(idx), [-1 if self.logic.active_firdaria(tl, d) is None else self.logic.active_firdaria(tl, d) for d in dates])
+        self.assertEqual(idx[0], -1)
+        self.assertEqual(tl.majors[idx[3]], const.NORTH_NODE)
+        self.assertEqual(idx[4], -1)  # past the 75-year cycle
+
+    def test_profection_periods(self):
+        birth = date(1990, 6, 15)
+        # Ascendant in Leo (sign index 4)
+        years = self.logic.profection_periods(birth, 4, birth, date(2080, 6, 14))
+        self.assertEqual(len(years['age']), 90)
+        self.assertEqual(list(years['age'][:3]), [0, 1, 2])
+        self.assertEqual(list(years['sign_idx'][:3]), [4, 5, 6])
+        self.assertEqual(list(years['house_num'][:3]), [1, 2, 3])
+        self.assertEqual(date.fromordinal(int(years['start'][12])), date(2002, 6, 15))
+        self.assertEqual(self.logic.SIGN_RULERS[years['sign_idx'][12]], const.SUN)
+
+        months = self.logic.profection_periods(birth, 4, date(2020, 6, 15), date(2021, 6, 14), unit='month')
+        self.assertEqual(len(months['age']), 12)
+        # Age 30: the year is Aquarius (4 + 30 = 34 -> 10); months step on from it
+        self.assertEqual(list(months['sign_idx'][:3]), [10, 11, 0])
+        self.assertTrue(all(0 < e - s <= 31 for s, e in zip(months['start'], months['end'])))
+
+        days = self.logic.profection_periods(birth, 4, date(2020, 6, 15), date(2020, 7, 14), unit='day')
+        self.assertEqual(len(days['age']), 12)
+        self.assertEqual(days['sign_idx'][0], 10)
+        self.assertTrue(all(2 <= e - s <= 3 for s, e in zip(days['start'], days['end'])))
+
+    def test_profections_leap_day_birth(self):
+        birth = date(1992, 2, 29)
+        years = self.logic.profection_periods(birth, 0, date(2021, 1, 1), date(2021, 12, 31))
+        self.assertEqual([date.fromordinal(int(s)) for s in years['start']], [date(2020, 2, 29), date(2021, 3, 1)])
+        self.assertEqual(list(years['age']), [28, 29])
+
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,57 @@
+import unittest
+from datetime import datetime, timezone
+from unittest import mock
+from zoneinfo import ZoneInfo
+
+import timezones
+
+
+class TestTimezones(unittest.TestCase):
+    def test_dst_at_birth_moment(self):
+        # New York: EST in winter, EDT in summer
+        self.assertEqual(timezones.utc_offset_at('America/New_York', datetime(1975, 1, 15, 12, 0)), -5.0)
+        self.assertEqual(timezones.utc_offset_at('America/New_York', datetime(1975, 7, 15, 12, 0)), -4.0)
+
+    def test_historical_dst(self):
+        # Taiwan observed daylight saving time in the 1970s, but not today
+        self.assertEqual(timezones.utc_offset_at('Asia/Taipei', datetime(1974, 7, 1, 12, 0)), 9.0)
+        self.assertEqual(timezones.utc_offset_at('Asia/Taipei', datetime(2020, 7, 1, 12, 0)), 8.0)
+
+    def test_transition_boundary(self):
+        # US spring forward 2021-03-14 02:00 local
+        self.assertEqual(timezones.utc_offset_at('America/New_York', datetime(2021, 3, 14, 1, 59)), -5.0)
+        self.assertEqual(timezones.utc_offset_at('America/New_York', datetime(2021, 3, 14, 3, 0)), -4.0)
+        # 2021-03-14 07:00 UTC is the instant of the change
+        self.assertEqual(timezones.utc_offset_at_utc('America/New_York', datetime(2021, 3, 14, 6, 59, tzinfo=timezone.utc)), -5.0)
+        self.assertEqual(timezones.utc_offset_at_utc('America/New_York', datetime(2021, 3, 14, 7, 0, tzinfo=timezone.utc)), -4.0)
+
+    def test_gap_and_ambiguous_local_times(self):
+        # 02:30 did not exist on 2021-03-14 (spring forward): the old offset applies
+        self.assertEqual(timezones.utc_offset_at('America/New_York', datetime(2021, 3, 14, 2, 30)), -5.0)
+        # 01:30 happened twice on 2021-11-07 (fall back): the later, standard offset applies
+        self.assertEqual(timezones.utc_offset_at('America/New_York', datetime(2021, 11, 7, 0, 59)), -4.0)
+        self.assertEqual(timezones.utc_offset_at('America/New_York', datetime(2021, 11, 7, 1, 30)), -5.0)
+
+    def test_fixed_zones(self):
+        self.assertEqual(timezones.utc_offset_at('UTC', datetime(1950, 1, 1)), 0.0)
+        self.assertEqual(timezones.utc_offset_at('Asia/Kolkata', datetime(2000, 1, 1)), 5.5)
+
+    def test_probed_transitions_without_pytz_internals(self):
+        # A tzinfo without pytz's private transition table is probed through utcoffset()
+        timezones.zone_transitions.cache_clear()
+        try:
+            with mock.patch.object(timezones.pytz, 'timezone', ZoneInfo):
+                self.test_dst_at_birth_moment()
+                self.test_historical_dst()
+                self.test_transition_boundary()
+                self.test_gap_and_ambiguous_local_times()
+                self.test_fixed_zones()
+        finally:
+            timezones.zone_transitions.cache_clear()
+
+    def test_timezone_at(self):
+        self.assertEqual(timezones.timezone_at(25.03, 121.50), 'Asia/Taipei')
+        self.assertIs(timezones.get_timezone_finder(), timezones.get_timezone_finder())
+
+if __name__ == '__main__':
+    unittest.main()
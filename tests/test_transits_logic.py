@@ -0,0 +1,67 @@
+import unittest
+from datetime import date, datetime
+
+import numpy as np
+import swisseph as swe
+from flatlib import const
+
+from aspect_timing_logic import SWE_BODIES
+from transits_logic import TransitsLogic, datetime_to_jd
+
+
+class TestTransitsLogic(unittest.TestCase):
+    NATAL = {const.SUN: 280.4, const.MOON: 15.0, const.SATURN: 300.0, const.ASC: 95.25}
+
+    def setUp(self):
+        self.transits = TransitsLogic()
+
+    def _hourly_crossings(self, natal, start, end, bodies):
+        """Brute force: hourly samples, count sign changes per combination."""
+        jds = np.arange(datetime_to_jd(start), datetime_to_jd(end), 1.0 / 24)
+        count = 0
+        for body in bodies:
+            lons = np.array([swe.calc_ut(t, SWE_BODIES[body])[0][0] for t in jds])
+            for lon in natal.values():
+                for signed, _, _ in self.transits._targets:
+                    f = (lons - lon - signed + 180.0) % 360.0 - 180.0
+                    a, b = f[:-1], f[1:]
+                    count += int(np.sum(((a <= 0) & (b > 0) | (a > 0) & (b <= 0)) & (np.abs(a - b) < 180)))
+        return count
+
+    def test_events_are_exact_and_ordered(self):
+        events = list(self.transits.scan(self.NATAL, date(2024, 1, 1), date(2025, 1, 1)))
+        self.assertTrue(events)
+        jds = [e['jd'] for e in events]
+        self.assertEqual(jds, sorted(jds))
+        for e in events:
+            lon = swe.calc_ut(e['jd'], SWE_BODIES[e['transit']])[0][0]
+            diff = abs(lon - self.NATAL[e['natal']]) % 360
+            self.assertAlmostEqual(min(diff, 360 - diff), e['angle'], delta=0.01)
+            self.assertTrue(datetime(2024, 1, 1) <= e['utc'] <= datetime(2025, 1, 1))
+
+    def test_matches_brute_force_count(self):
+        bodies = [const.SUN, const.MARS, const.SATURN]
+        events = list(self.transits.scan(self.NATAL, date(2023, 3, 1), date(2023, 9, 1), bodies))
+        self.assertEqual(len(events), self._hourly_crossings(self.NATAL, date(2023, 3, 1), date(2023, 9, 1), bodies))
+
+    def test_retrograde_passes_are_found(self):
+        # Mercury retrograde 2024-04-01..04-25 around 27° Aries: three passes over 20° Aries
+        events = list(self.transits.scan({const.SUN: 20.0}, date(2024, 3, 15), date(2024, 5, 15), [const.MERCURY]))
+        conj = [e for e in events if e['angle'] == 0]
+        self.assertEqual(len(conj), 3)
+        self.assertEqual([e['retro'] for e in conj], [False, True, False])
+
+    def test_chunking_does_not_change_results(self):
+        args = (self.NATAL, date(2024, 1, 1), date(2024, 7, 1))
+        whole = [(e['transit'], e['natal'], e['angle'], round(e['jd'], 3)) for e in self.transits.scan(*args)]
+        self.transits.CHUNK_DAYS = 7
+        chunked = [(e['transit'], e['natal'], e['angle'], round(e['jd'], 3)) for e in self.transits.scan(*args)]
+        self.assertEqual(sorted(whole), sorted(chunked))
+
+    def test_scan_is_lazy(self):
+        it = self.transits.scan(self.NATAL, date(1900, 1, 1), date(2100, 1, 1))
+        first = next(it)
+        self.assertLess(first['utc'], datetime(1900, 3, 1))
+
+if __name__ == '__main__':
+    unittest.main()
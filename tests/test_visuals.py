@@ -0,0 +1,64 @@
+import os
+import re
+import unittest
+import xml.etree.ElementTree as ET
+from datetime import date
+from unittest import mock
+
+from logic import AstrologyLogic
+from visuals import _spread, draw_wheel_svg
+
+SVG_NS = '{http://www.w3.org/2000/svg}'
+
+
+class TestChartWheel(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.logic = AstrologyLogic()
+        cls.report = cls.logic.build_report('natal', '1990/01/01', '12:00', '+08:00', 25.03, 121.50, '台北市', date(2026, 1, 1))
+
+    def test_well_formed_svg_from_report(self):
+        root = ET.fromstring(draw_wheel_svg(self.report))
+        self.assertEqual(root.tag, SVG_NS + 'svg')
+        labels = [t.text for t in root.iter(SVG_NS + 'text')]
+        for p in self.report.planets:
+            self.assertIn(p['symbol'], labels)
+        self.assertIn('♈', labels)
+        self.assertEqual(len(list(root.iter(SVG_NS + 'path'))), 12)
+
+    def test_ascendant_on_the_left(self):
+        svg = draw_wheel_svg(self.report, size=600)
+        # First cusp line starts on the horizontal axis, left of the center
+        m = re.search(r'<line x1="([\d.]+)" y1="([\d.]+)" x2="[\d.]+" y2="[\d.]+" stroke="#495057"', svg)
+        self.assertLess(float(m.group(1)), 300)
+        self.assertAlmostEqual(float(m.group(2)), 300, places=0)
+
+    def test_aspect_lines_do_not_depend_on_labels(self):
+        def aspect_lines(report):
+            return [l for l in ET.fromstring(draw_wheel_svg(report)).iter(SVG_NS + 'line')
+                    if l.get('stroke') in ('#1A73E8', '#D93025', '#188038', '#6C757D') and l.get('stroke-width') == '1.0']
+        lines = aspect_lines(self.report)
+        self.assertEqual(len(lines), len(self.report.aspects))
+        # Renamed planets and aspects (another language) draw the same wheel
+        relabeled = self.report._replace(
+            planets=[dict(p, name=p['id'], symbol='*') for p in self.report.planets],
+            aspects=[dict(a, p1='?', p2='?', aspect='Aspect') for a in self.report.aspects],
+        )
+        self.assertEqual([l.attrib for l in aspect_lines(relabeled)], [l.attrib for l in lines])
+
+    def test_spread_keeps_glyphs_apart(self):
+        shown = _spread([10.0, 11.0, 12.0, 200.0, 359.0, 1.0])
+        ordered = sorted(shown)
+        gaps = [b - a for a, b in zip(ordered, ordered[1:])] + [ordered[0] + 360 - ordered[-1]]
+        self.assertGreaterEqual(min(gaps), 6.9)
+        self.assertEqual(shown[3], 200.0)
+
+    def test_no_files_and_cached_per_chart(self):
+        with mock.patch('builtins.open', side_effect=AssertionError('no file access')), \
+                mock.patch.object(os, 'makedirs', side_effect=AssertionError('no file access')):
+            first = self.logic.reports.svg(self.report)
+        self.assertIs(self.logic.reports.svg(self.report), first)
+        self.assertIn(first, self.logic.reports.html(self.report))
+
+if __name__ == '__main__':
+    unittest.main()
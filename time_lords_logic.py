@@ -1,33 +1,57 @@
 from flatlib import const
-from datetime import datetime, date
-import pandas as pd
+from datetime import datetime, date, timedelta
+from collections import namedtuple
+from functools import lru_cache
+import bisect
+
+import numpy as np
+
+def add_years(d, years):
+    """`d` moved by whole years; 29 February falls on 1 March in common years."""
+    try:
+        return d.replace(year=d.year + years)
+    except ValueError:
+        return d.replace(year=d.year + years, month=3, day=1)
+
+
+FirdariaTimeline = namedtuple('FirdariaTimeline', ['majors', 'minors', 'starts', 'ends', 'start_days'])
 
 class TimeLordsLogic:
+    # Traditional rulers by sign index (Aries = 0)
+    SIGN_RULERS = (
+        const.MARS, const.VENUS, const.MERCURY, const.MOON, const.SUN, const.MERCURY,
+        const.VENUS, const.MARS, const.JUPITER, const.SATURN, const.SATURN, const.JUPITER
+    )
+    # Sub-periods per profection year: monthly profections split the year into
+    # 12 equal parts, daily profections split each month into 12 (~2.5 days)
+    PROFECTION_UNITS = {'year': 1, 'month': 12, 'day': 144}
+
+    @staticmethod
+    @lru_cache(maxsize=256)
+    def _parse_birth(birth_dt_str):
+        return datetime.strptime(birth_dt_str, '%Y/%m/%d').date()
+
+    @staticmethod
+    def _anniversary(birth_date, year):
+        """Birthday in `year` (see add_years for 29 February)."""
+        return add_years(birth_date, year - birth_date.year)
+
+    @staticmethod
+    def _age(birth_date, when):
+        age = when.year - birth_date.year
+        if (when.month, when.day) < (birth_date.month, birth_date.day): age -= 1
+        return max(age, 0)  # Handle future births (horary)
+
     def calculate_profections(self, chart, trans_signs, planet_glyphs, trans_planets, birth_dt_str, current_date=None):
         if current_date is None: current_date = date.today()
         if isinstance(current_date, datetime): current_date = current_date.date()
-        
-        birth_dt = datetime.strptime(birth_dt_str, '%Y/%m/%d')
-        birth_d = birth_dt.date()
-        age = current_date.year - birth_d.year
-        if (current_date.month, current_date.day) < (birth_d.month, birth_d.day): age -= 1
-        if age < 0: age = 0  # Handle future births (horary)
-        
-        asc = chart.get(const.ASC)
-        birth_asc_sign_idx = const.LIST_SIGNS.index(asc.sign)
+
+        age = self._age(self._parse_birth(birth_dt_str), current_date)
+        birth_asc_sign_idx = const.LIST_SIGNS.index(chart.get(const.ASC).sign)
         prof_sign_idx = (birth_asc_sign_idx + age) % 12
         prof_sign = const.LIST_SIGNS[prof_sign_idx]
-        
-        # This needs a ruler table - ideally passed or accessed via shared logic
-        # For simplicity in this standalone module, we'll re-define traditional rulers
-        RULERS = {
-            const.ARIES: const.MARS, const.TAURUS: const.VENUS, const.GEMINI: const.MERCURY,
-            const.CANCER: const.MOON, const.LEO: const.SUN, const.VIRGO: const.MERCURY,
-            const.LIBRA: const.VENUS, const.SCORPIO: const.MARS, const.SAGITTARIUS: const.JUPITER,
-            const.CAPRICORN: const.SATURN, const.AQUARIUS: const.SATURN, const.PISCES: const.JUPITER
-        }
-        
-        lord_id = RULERS[prof_sign]
+
+        lord_id = self.SIGN_RULERS[prof_sign_idx]
         lord_planet = chart.get(lord_id)
         p_sign_deg = lord_planet.lon % 30
         d = int(p_sign_deg)
@@ -36,68 +60,150 @@ class TimeLordsLogic:
         return {
             'age': age,
             'prof_sign': trans_signs.get(prof_sign, prof_sign),
-            'prof_house_num': (prof_sign_idx - birth_asc_sign_idx) % 12 + 1,
+            'prof_house_num': age % 12 + 1,
             'lord_of_year': f"{planet_glyphs.get(lord_id, '')} {trans_planets.get(lord_id, lord_id)}",
             'lord_pos': f"{trans_signs.get(lord_planet.sign, lord_planet.sign)} {d}度{m}分"
         }
 
+    def profection_periods(self, birth_date, asc_sign_idx, start, end, unit='year'):
+        """
+        Profection periods overlapping [start, end] as parallel NumPy arrays:
+        'start'/'end' (date ordinals, end exclusive), 'age', 'sign_idx',
+        'house_num' (counted from the natal Ascendant); the lord of each
+        period is SIGN_RULERS[sign_idx]. unit: 'year', 'month' or 'day'.
+        """
+        per_year = self.PROFECTION_UNITS[unit]
+        start = max(start, birth_date)
+        first_age, last_age = self._age(birth_date, start), self._age(birth_date, max(end, start))
+        ages = np.arange(first_age, last_age + 1)
+        year_starts = np.array([
+            self._anniversary(birth_date, birth_date.year + int(a)).toordinal() for a in range(first_age, last_age + 2)
+        ], dtype=np.float64)
+
+        k = np.arange(per_year)
+        lengths = np.diff(year_starts)
+        starts = np.floor(year_starts[:-1, None] + lengths[:, None] * k / per_year).astype(np.int64).ravel()
+        ends = np.append(starts[1:], int(year_starts[-1]))
+        age = np.repeat(ages, per_year)
+        k = np.tile(k, len(ages))
+        # Monthly profections start from the year's sign, daily from the month's
+        offset = age + (k // 12 + k % 12 if per_year == 144 else k)
+
+        mask = (ends > start.toordinal()) & (starts <= end.toordinal())
+        sign_idx = (asc_sign_idx + offset[mask]) % 12
+        return {
+            'start': starts[mask],
+            'end': ends[mask],
+            'age': age[mask],
+            'sign_idx': sign_idx,
+            'house_num': offset[mask] % 12 + 1,
+        }
+
+    def profection_range(self, chart, trans_signs, planet_glyphs, trans_planets, birth_dt_str, start, end, unit='year'):
+        """Display rows for every profection period overlapping [start, end]."""
+        if isinstance(start, datetime): start = start.date()
+        if isinstance(end, datetime): end = end.date()
+        asc_sign_idx = const.LIST_SIGNS.index(chart.get(const.ASC).sign)
+        p = self.profection_periods(self._parse_birth(birth_dt_str), asc_sign_idx, start, end, unit)
+
+        sign_names = [trans_signs.get(s, s) for s in const.LIST_SIGNS]
+        lord_names = [f"{planet_glyphs.get(l, '')} {trans_planets.get(l, l)}" for l in self.SIGN_RULERS]
+        return [{
+            'start': date.fromordinal(int(s)),
+            'end': date.fromordinal(int(e)),
+            'age': int(a),
+            'prof_sign': sign_names[si],
+            'prof_house_num': int(h),
+            'lord': lord_names[si],
+        } for s, e, a, si, h in zip(p['start'], p['end'], p['age'], p['sign_idx'], p['house_num'])]
+
+    # Firdaria: (lord, years) in order, by day and by night
+    FIRDARIA_DAY = [
+        (const.SUN, 10), (const.VENUS, 8), (const.MERCURY, 13),
+        (const.MOON, 9), (const.SATURN, 11), (const.JUPITER, 12), (const.MARS, 7),
+        (const.NORTH_NODE, 3), (const.SOUTH_NODE, 2)
+    ]
+    FIRDARIA_NIGHT = [
+        (const.MOON, 9), (const.SATURN, 11), (const.JUPITER, 12), (const.MARS, 7),
+        (const.SUN, 10), (const.VENUS, 8), (const.MERCURY, 13),
+        (const.NORTH_NODE, 3), (const.SOUTH_NODE, 2)
+    ]
+    NODES = (const.NORTH_NODE, const.SOUTH_NODE)
+
+    @staticmethod
+    @lru_cache(maxsize=1024)
+    def compile_firdaria(birth_date, is_day):
+        """
+        Flat firdaria timeline of a (birth date, sect), built once and cached.
+        Sub-periods are stored as parallel tuples: majors, minors, starts and
+        ends (exact datetimes) and start_days, the proleptic ordinal of the
+        calendar day each sub-period takes over on, which is what queries
+        bisect. The last entry of `ends` closes the 75-year cycle.
+        """
+        seq = TimeLordsLogic.FIRDARIA_DAY if is_day else TimeLordsLogic.FIRDARIA_NIGHT
+        planets_order = [lord for lord, _ in seq if lord not in TimeLordsLogic.NODES]
+        birth_dt = datetime(birth_date.year, birth_date.month, birth_date.day)
+
+        majors, minors, offsets = [], [], []
+        days = 0.0
+        for major_lord, years in seq:
+            if major_lord in TimeLordsLogic.NODES:
+                subs = [major_lord]
+            else:
+                idx = planets_order.index(major_lord)
+                subs = planets_order[idx:] + planets_order[:idx]
+            sub_days = years * 365.25 / len(subs)
+            for k, minor_lord in enumerate(subs):
+                majors.append(major_lord)
+                minors.append(minor_lord)
+                offsets.append(days + k * sub_days)
+            days += years * 365.25
+        offsets.append(days)
+
+        bounds = [birth_dt + timedelta(days=o) for o in offsets]
+        return FirdariaTimeline(
+            majors=tuple(majors),
+            minors=tuple(minors),
+            starts=tuple(bounds[:-1]),
+            ends=tuple(bounds[1:]),
+            start_days=tuple(b.toordinal() for b in bounds),
+        )
+
+    def active_firdaria(self, timeline, when):
+        """Index of the sub-period in effect on date `when`, or None outside the cycle."""
+        day = when.toordinal()
+        i = bisect.bisect_right(timeline.start_days, day) - 1
+        return i if 0 <= i < len(timeline.majors) else None
+
+    def active_firdaria_many(self, timeline, dates):
+        """Vectorized active_firdaria: sub-period index per date, -1 outside the cycle."""
+        days = np.array([d.toordinal() for d in dates])
+        idx = np.searchsorted(np.array(timeline.start_days), days, side='right') - 1
+        idx[(idx < 0) | (idx >= len(timeline.majors))] = -1
+        return idx
+
     def get_firdaria_data(self, birth_dt_str, is_day, current_date=None):
-        """Calculates Firdaria periods and the currently active one."""
+        """Firdaria periods and the one active on current_date (all None before birth)."""
         if current_date is None: current_date = date.today()
-        # Ensure current_date is a pandas Timestamp for consistent comparison
-        target_ts = pd.Timestamp(current_date)
-        
-        birth_dt = pd.Timestamp(datetime.strptime(birth_dt_str, '%Y/%m/%d')).normalize()
-        
-        day_seq = [
-            (const.SUN, 10), (const.VENUS, 8), (const.MERCURY, 13), 
-            (const.MOON, 9), (const.SATURN, 11), (const.JUPITER, 12), (const.MARS, 7),
-            ('North Node', 3), ('South Node', 2)
-        ]
-        night_seq = [
-            (const.MOON, 9), (const.SATURN, 11), (const.JUPITER, 12), (const.MARS, 7),
-            (const.SUN, 10), (const.VENUS, 8), (const.MERCURY, 13), 
-            ('North Node', 3), ('South Node', 2)
-        ]
-        
-        seq = day_seq if is_day else night_seq
-        planets_order = [s[0] for s in seq if s[0] not in ['North Node', 'South Node']]
-        
+        if isinstance(current_date, datetime): current_date = current_date.date()
+        birth_date = datetime.strptime(birth_dt_str, '%Y/%m/%d').date()
+        tl = self.compile_firdaria(birth_date, bool(is_day))
+
         timeline = []
-        current_start = birth_dt
-        
-        active_major, active_minor, active_start, active_end = None, None, None, None
-        
-        for major_lord, years in seq:
-            major_end = current_start + pd.Timedelta(days=years * 365.25)
-            sub_periods = []
-            if major_lord not in ['North Node', 'South Node']:
-                idx = planets_order.index(major_lord)
-                ordered_minors = planets_order[idx:] + planets_order[:idx]
-                sub_duration_days = (years * 365.25) / 7.0
-                sub_start = current_start
-                for minor_lord in ordered_minors:
-                    sub_end = sub_start + pd.Timedelta(days=sub_duration_days)
-                    sub_data = {'major': major_lord, 'minor': minor_lord, 'start': sub_start, 'end': sub_end}
-                    sub_periods.append(sub_data)
-                    if sub_start <= target_ts < sub_end:
-                        active_major, active_minor, active_start, active_end = major_lord, minor_lord, sub_start, sub_end
-                    sub_start = sub_end
-            else:
-                if current_start <= target_ts < major_end:
-                    active_major, active_minor, active_start, active_end = major_lord, major_lord, current_start, major_end
-                sub_periods.append({'major': major_lord, 'minor': major_lord, 'start': current_start, 'end': major_end})
-            
-            timeline.append({'lord': major_lord, 'start': current_start, 'end': major_end, 'subs': sub_periods})
-            current_start = major_end
-
-        # Fallback for future-dated horary charts
-        if active_major is None and timeline:
-            first_p = timeline[0]['subs'][0]
-            active_major, active_minor, active_start, active_end = first_p['major'], first_p['minor'], first_p['start'], first_p['end']
-            
+        for i, major in enumerate(tl.majors):
+            if i == 0 or major != tl.majors[i - 1]:
+                timeline.append({'lord': major, 'start': tl.starts[i], 'end': None, 'subs': []})
+            entry = timeline[-1]
+            entry['end'] = tl.ends[i]
+            entry['subs'].append({'major': major, 'minor': tl.minors[i], 'start': tl.starts[i], 'end': tl.ends[i]})
+
+        i = self.active_firdaria(tl, current_date)
+        if i is None:
+            active = {'major': None, 'minor': None, 'start': None, 'end': None}
+        else:
+            active = {'major': tl.majors[i], 'minor': tl.minors[i], 'start': tl.starts[i], 'end': tl.ends[i]}
         return {
             'is_day': is_day,
-            'active': {'major': active_major, 'minor': active_minor, 'start': active_start, 'end': active_end},
+            'active': active,
             'timeline': timeline
         }
@@ -0,0 +1,122 @@
+import bisect
+import threading
+from datetime import datetime, timedelta, timezone
+from functools import lru_cache
+
+import pytz
+
+_EPOCH = datetime(1970, 1, 1)
+
+# Range and step of the utcoffset() probe used when a zone does not expose
+# pytz's transition table (see _probe_transitions)
+PROBE_START = datetime(1900, 1, 1)
+PROBE_END = datetime(2100, 1, 1)
+PROBE_STEP = timedelta(days=7)
+
+_tf_lock = threading.Lock()
+_tf = None
+
+
+def get_timezone_finder():
+    """
+    The process-wide TimezoneFinder. Its polygon data is loaded into memory
+    once on first use and shared by every caller afterwards.
+    """
+    global _tf
+    if _tf is None:
+        with _tf_lock:
+            if _tf is None:
+                from timezonefinder import TimezoneFinder
+                _tf = TimezoneFinder(in_memory=True)
+    return _tf
+
+
+def timezone_at(lat, lon):
+    """IANA timezone name for the coordinates, or None (e.g. open sea)."""
+    return get_timezone_finder().timezone_at(lat=lat, lng=lon)
+
+
+def _seconds(naive_dt):
+    return (naive_dt - _EPOCH).total_seconds()
+
+
+@lru_cache(maxsize=512)
+def zone_transitions(tz_name):
+    """
+    Transition table of a zone as parallel tuples:
+    (utc_starts, local_starts, offsets), all in seconds. Entry i is in effect
+    from utc_starts[i] (equivalently local wall time local_starts[i]) until
+    the next entry. Built once per zone from the tz database via pytz, read
+    from its transition table when available, probed otherwise.
+    """
+    tz = pytz.timezone(tz_name)
+    utc_times = getattr(tz, '_utc_transition_times', None)
+    infos = getattr(tz, '_transition_info', None)
+    if utc_times and infos:
+        transitions = [(_seconds(utc_dt), info[0].total_seconds()) for utc_dt, info in zip(utc_times, infos)]
+    else:
+        transitions = _probe_transitions(tz)
+
+    utc_starts, local_starts, offsets = [], [], []
+    for i, (start, offset) in enumerate(transitions):
+        start = float('-inf') if i == 0 else start
+        utc_starts.append(start)
+        local_starts.append(start + offset)
+        offsets.append(offset)
+    return tuple(utc_starts), tuple(local_starts), tuple(offsets)
+
+
+def _utc_offset(tz, utc_seconds):
+    utc_dt = _EPOCH + timedelta(seconds=utc_seconds)
+    return tz.fromutc(utc_dt.replace(tzinfo=tz)).utcoffset().total_seconds()
+
+
+def _probe_transitions(tz):
+    """
+    [(utc start seconds, offset seconds)] of any tzinfo, found by sampling
+    utcoffset() every PROBE_STEP over [PROBE_START, PROBE_END) and bisecting
+    each change down to the second. Changes undone within one step are missed.
+    """
+    t = _seconds(PROBE_START)
+    end, step = _seconds(PROBE_END), PROBE_STEP.total_seconds()
+    offset = _utc_offset(tz, t)
+    transitions = [(t, offset)]
+    while t < end:
+        nxt = min(t + step, end)
+        new_offset = _utc_offset(tz, nxt)
+        if new_offset != offset:
+            lo, hi = t, nxt
+            while hi - lo > 1:
+                mid = (lo + hi) // 2
+                if _utc_offset(tz, mid) == offset:
+                    lo = mid
+                else:
+                    hi = mid
+            transitions.append((hi, new_offset))
+            offset = new_offset
+        t = nxt
+    return transitions
+
+
+def utc_offset_at(tz_name, local_dt):
+    """
+    UTC offset in hours in effect in tz_name at the given local wall time
+    (naive datetime), including DST and historical changes. Times repeated
+    by a DST fall-back resolve to the later (standard) offset; times skipped
+    by a spring-forward resolve to the old offset, as if the clock had not
+    been set forward yet.
+    """
+    _, local_starts, offsets = zone_transitions(tz_name)
+    if local_dt.tzinfo is not None:
+        local_dt = local_dt.replace(tzinfo=None)
+    i = bisect.bisect_right(local_starts, _seconds(local_dt)) - 1
+    return offsets[max(i, 0)] / 3600.0
+
+
+def utc_offset_at_utc(tz_name, utc_dt):
+    """UTC offset in hours in effect in tz_name at a UTC instant."""
+    utc_starts, _, offsets = zone_transitions(tz_name)
+    if utc_dt.tzinfo is not None:
+        utc_dt = utc_dt.astimezone(timezone.utc).replace(tzinfo=None)
+    i = bisect.bisect_right(utc_starts, _seconds(utc_dt)) - 1
+    return offsets[max(i, 0)] / 3600.0
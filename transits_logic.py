@@ -0,0 +1,149 @@
+from datetime import datetime
+
+import numpy as np
+import swisseph as swe
+from flatlib import const
+
+from aspect_timing_logic import JD_UNIX_EPOCH, SWE_BODIES, jd_to_datetime
+from ephemeris import init_ephemeris
+from ephemeris_table import default_table
+
+
+def datetime_to_jd(dt):
+    """Naive UTC datetime (or date) -> UT Julian day."""
+    if not isinstance(dt, datetime):
+        dt = datetime(dt.year, dt.month, dt.day)
+    return (dt - datetime(1970, 1, 1)).total_seconds() / 86400.0 + JD_UNIX_EPOCH
+
+
+def _wrap180(x):
+    return (x + 180.0) % 360.0 - 180.0
+
+
+class TransitsLogic:
+    # The Moon would add ~800 hits a year; pass it explicitly if wanted
+    TRANSITING = [const.SUN, const.MERCURY, const.VENUS, const.MARS, const.JUPITER, const.SATURN]
+    NATAL_POINTS = [const.SUN, const.MOON, const.MERCURY, const.VENUS, const.MARS, const.JUPITER, const.SATURN, const.ASC]
+    ASPECTS = [(0, 'Conjunction'), (60, 'Sextile'), (90, 'Square'), (120, 'Trine'), (180, 'Opposition')]
+
+    STEP_DAYS = 1.0       # grid step; the Moon moves ~13°/day, far from the 180° ambiguity
+    CHUNK_DAYS = 30       # grid rows generated per vectorized pass
+    TOLERANCE_DAYS = 1.0 / 1440.0  # refine to the minute
+    MAX_ITER = 30
+
+    def __init__(self, table=None):
+        init_ephemeris()
+        # Precomputed table for the coarse grid when one is built; crossings
+        # are still refined against the Swiss Ephemeris itself
+        self.table = table if table is not None else default_table()
+        # Signed targets: a transit hits a natal point at +angle or -angle
+        self._targets = []
+        for angle, name in self.ASPECTS:
+            for sign in ((1,) if angle in (0, 180) else (1, -1)):
+                self._targets.append((sign * angle, angle, name))
+        self._target_arr = np.array([t[0] for t in self._targets], dtype=np.float64)
+
+    def natal_points(self, chart, ids=None):
+        """{id: longitude} of the natal points to test, taken from a flatlib chart."""
+        return {p_id: chart.get(p_id).lon for p_id in (ids or self.NATAL_POINTS)}
+
+    def positions(self, jds, bodies):
+        """(lons, speeds) arrays of shape (len(jds), len(bodies)) from the ephemeris."""
+        if self.table is not None and self.table.covers(jds[0], jds[-1]):
+            lons, _, speeds = self.table.lookup(jds, bodies)
+            return lons, speeds
+        lons = np.empty((len(jds), len(bodies)), dtype=np.float64)
+        speeds = np.empty_like(lons)
+        for i, t in enumerate(jds):
+            for j, body in enumerate(bodies):
+                xx = swe.calc_ut(float(t), SWE_BODIES[body])[0]
+                lons[i, j] = xx[0]
+                speeds[i, j] = xx[3]
+        return lons, speeds
+
+    def scan(self, natal, start, end, transiting=None):
+        """
+        Yields transit events between start and end (naive UTC datetimes or
+        dates) in time order. natal: {id: longitude}. The range is processed
+        in CHUNK_DAYS slices, so memory stays constant however long it is.
+        Each event: {'jd', 'utc', 'transit', 'natal', 'aspect', 'angle', 'retro'}.
+        """
+        bodies = list(transiting or self.TRANSITING)
+        natal_ids = list(natal)
+        natal_lons = np.array([natal[p] for p in natal_ids], dtype=np.float64)
+        jd_start, jd_end = datetime_to_jd(start), datetime_to_jd(end)
+
+        prev_jd, prev_f = None, None
+        chunk_start = jd_start
+        while chunk_start < jd_end:
+            chunk_end = min(chunk_start + self.CHUNK_DAYS, jd_end)
+            n = int(np.ceil((chunk_end - chunk_start) / self.STEP_DAYS))
+            jds = chunk_start + np.arange(n + 1) * self.STEP_DAYS
+            jds[-1] = min(jds[-1], chunk_end)
+            lons, _ = self.positions(jds, bodies)
+            # f[t, body, natal, target]: distance from exact for every combination
+            f = _wrap180(lons[:, :, None, None] - natal_lons[None, None, :, None] - self._target_arr[None, None, None, :])
+            if prev_f is not None:
+                jds = np.concatenate([[prev_jd], jds])
+                f = np.concatenate([prev_f[None], f])
+
+            a, b = f[:-1], f[1:]
+            # Sign change that is not a jump through ±180
+            hits = np.argwhere(((a <= 0) & (b > 0) | (a > 0) & (b <= 0)) & (np.abs(a - b) < 180.0))
+            events = []
+            for step, b_idx, n_idx, t_idx in hits:
+                events.append(self._refine_event(
+                    bodies[b_idx], natal_ids[n_idx], natal_lons[n_idx], self._targets[t_idx],
+                    jds[step], jds[step + 1], a[step, b_idx, n_idx, t_idx], b[step, b_idx, n_idx, t_idx]
+                ))
+            events.sort(key=lambda e: e['jd'])
+            yield from (e for e in events if jd_start <= e['jd'] <= jd_end)
+
+            prev_jd, prev_f = jds[-1], f[-1]
+            chunk_start = chunk_end
+
+    def _refine_event(self, body, natal_id, natal_lon, target, t0, t1, f0, f1):
+        signed, angle, name = target
+        swe_id = SWE_BODIES[body]
+
+        def f(t):
+            return _wrap180(swe.calc_ut(t, swe_id)[0][0] - natal_lon - signed)
+
+        # Illinois false position down to the minute
+        a, b, fa, fb = float(t0), float(t1), float(f0), float(f1)
+        c = b
+        for _ in range(self.MAX_ITER):
+            if fb == fa:
+                break
+            c_prev = c
+            c = b - fb * (b - a) / (fb - fa)
+            fc = f(c)
+            if fc == 0 or abs(c - c_prev) < self.TOLERANCE_DAYS:
+                break
+            if fc * fb < 0:
+                a, fa = b, fb
+            else:
+                fa /= 2.0
+            b, fb = c, fc
+
+        speed = swe.calc_ut(c, swe_id)[0][3]
+        return {
+            'jd': c,
+            'utc': jd_to_datetime(c),
+            'transit': body,
+            'natal': natal_id,
+            'aspect': name,
+            'angle': angle,
+            'retro': speed < 0,
+        }
+
+    def format_event(self, event, trans_planets, planet_glyphs, trans_aspects):
+        """Display row for one scan() event; the raw event is kept under 'event'."""
+        t, n = event['transit'], event['natal']
+        return {
+            'time': event['utc'].strftime('%Y/%m/%d %H:%M UTC'),
+            'transit': f"{planet_glyphs.get(t, '')} {trans_planets.get(t, t)}{' Ⓡ' if event['retro'] else ''}",
+            'aspect': trans_aspects.get(event['aspect'], event['aspect']),
+            'natal': f"本命{trans_planets.get(n, n)}",
+            'event': event,
+        }
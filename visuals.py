@@ -1,20 +1,118 @@
+import math
 import os
-import time
-from kerykeion import AstrologicalSubject, KerykeionChartSVG
+import tempfile
+from html import escape
+
+SIGN_GLYPHS = ['♈', '♉', '♊', '♋', '♌', '♍', '♎', '♏', '♐', '♑', '♒', '♓']
+# Fire, earth, air, water
+ELEMENT_FILLS = ['#FCE8E6', '#EEF5E9', '#FFF8E1', '#E8F0FE']
+ASPECT_COLORS = {0: '#6C757D', 60: '#1A73E8', 90: '#D93025', 120: '#188038', 180: '#D93025'}
+
+WHEEL_SIZE = 600
+# Radii as fractions of half the wheel size
+R_OUTER, R_SIGNS, R_HOUSES, R_PLANETS, R_ASPECTS = 0.97, 0.83, 0.72, 0.60, 0.45
+MIN_GLYPH_SEPARATION = 7.0  # degrees between planet glyphs on the wheel
+
+
+def _spread(lons, min_sep=MIN_GLYPH_SEPARATION):
+    """Display longitudes nudged apart so that glyphs of close planets do not overlap."""
+    if not lons:
+        return []
+    order = sorted(range(len(lons)), key=lambda i: lons[i] % 360)
+    shown = [lons[i] % 360 for i in order]
+    for _ in range(10 * len(shown)):
+        moved = False
+        for k in range(len(shown)):
+            nxt = shown[(k + 1) % len(shown)] + (360 if k == len(shown) - 1 else 0)
+            gap = nxt - shown[k]
+            if len(shown) > 1 and gap < min_sep:
+                push = (min_sep - gap) / 2
+                shown[k] -= push
+                shown[(k + 1) % len(shown)] += push
+                moved = True
+        if not moved:
+            break
+    out = [0.0] * len(lons)
+    for i, lon in zip(order, shown):
+        out[i] = lon % 360
+    return out
+
+
+def draw_wheel_svg(report, size=WHEEL_SIZE):
+    """
+    Chart wheel of a ChartReport as an SVG string, drawn from the positions
+    already in the report (no ephemeris calls, no files). The Ascendant sits
+    at 9 o'clock and longitude runs counter-clockwise.
+    """
+    c = size / 2
+    asc = report.houses[0]['lon']
+
+    def xy(lon, r):
+        theta = math.radians(180.0 + lon - asc)
+        return c + r * c * math.cos(theta), c - r * c * math.sin(theta)
+
+    def line(lon1, r1, lon2, r2, stroke, width=1.0):
+        (x1, y1), (x2, y2) = xy(lon1, r1), xy(lon2, r2)
+        return f'<line x1="{x1:.1f}" y1="{y1:.1f}" x2="{x2:.1f}" y2="{y2:.1f}" stroke="{stroke}" stroke-width="{width}"/>'
+
+    def text(lon, r, label, font_size, fill='#212529'):
+        x, y = xy(lon, r)
+        return (f'<text x="{x:.1f}" y="{y:.1f}" font-size="{font_size}" fill="{fill}" '
+                f'text-anchor="middle" dominant-baseline="central">{escape(label)}</text>')
+
+    out = [f'<svg xmlns="http://www.w3.org/2000/svg" viewBox="0 0 {size} {size}" width="{size}" height="{size}" '
+           f'font-family="sans-serif">']
+
+    # Zodiac ring: one annular sector per sign
+    for i, glyph in enumerate(SIGN_GLYPHS):
+        a, b = i * 30.0, (i + 1) * 30.0
+        (x1, y1), (x2, y2) = xy(a, R_OUTER), xy(b, R_OUTER)
+        (x3, y3), (x4, y4) = xy(b, R_SIGNS), xy(a, R_SIGNS)
+        ro, ri = R_OUTER * c, R_SIGNS * c
+        out.append(f'<path d="M{x1:.1f},{y1:.1f} A{ro:.1f},{ro:.1f} 0 0 0 {x2:.1f},{y2:.1f} '
+                   f'L{x3:.1f},{y3:.1f} A{ri:.1f},{ri:.1f} 0 0 1 {x4:.1f},{y4:.1f} Z" '
+                   f'fill="{ELEMENT_FILLS[i % 4]}" stroke="#ADB5BD" stroke-width="0.8"/>')
+        out.append(text(a + 15.0, (R_OUTER + R_SIGNS) / 2, glyph, size * 0.04))
+    for r in (R_HOUSES, R_ASPECTS):
+        out.append(f'<circle cx="{c}" cy="{c}" r="{r * c:.1f}" fill="none" stroke="#ADB5BD" stroke-width="0.8"/>')
+
+    # House cusps; the Ascendant-Descendant axis is drawn heavier
+    for k, h in enumerate(report.houses):
+        heavy = k in (0, 6)
+        out.append(line(h['lon'], R_SIGNS, h['lon'], R_ASPECTS, '#495057' if heavy else '#ADB5BD', 2.0 if heavy else 0.8))
+        out.append(text(h['lon'] + 15.0, (R_HOUSES + R_ASPECTS) / 2 + 0.02, str(h['id']), size * 0.025, '#6C757D'))
+
+    # Aspects between planets, colored by angle
+    lons = {p['id']: p['lon'] for p in report.planets}
+    for a in report.aspects:
+        if a['p1_id'] in lons and a['p2_id'] in lons:
+            color = ASPECT_COLORS.get(a['angle'], '#6C757D')
+            out.append(line(lons[a['p1_id']], R_ASPECTS, lons[a['p2_id']], R_ASPECTS, color))
+
+    # Planets: tick at the true longitude, glyph at the spread-out position
+    shown = _spread([p['lon'] for p in report.planets])
+    for p, lon in zip(report.planets, shown):
+        out.append(line(p['lon'], R_SIGNS, p['lon'], R_SIGNS - 0.03, '#212529', 1.5))
+        out.append(text(lon, R_PLANETS, p['symbol'], size * 0.045))
+        if p['retro']:
+            out.append(text(lon, R_PLANETS - 0.07, 'R', size * 0.02, '#D93025'))
+
+    out.append('</svg>')
+    return '\n'.join(out)
+
 
 def draw_circular_chart(user_data):
     """
     Generates a circular astrology chart SVG using Kerykeion.
+    Recomputes every position; draw_wheel_svg renders our own chart data instead.
     """
     try:
-        # Create a unique name to avoid browser caching
-        timestamp = int(time.time())
-        unique_name = f"UserBirthChart_{timestamp}"
-        
-        # Initialize AstrologicalSubject
+        from kerykeion import AstrologicalSubject, KerykeionChartSVG
+
+        name = "UserBirthChart"
         # Using utc_offset instead of tz (API v4.2.0+)
         subject = AstrologicalSubject(
-            unique_name,
+            name,
             year=int(user_data['year']),
             month=int(user_data['month']),
             day=int(user_data['day']),
@@ -25,36 +123,18 @@ def draw_circular_chart(user_data):
             lng=float(user_data['lng']),
             utc_offset=float(user_data['tz'])
         )
-        
-        # Set output directory to a local 'charts' folder
-        output_dir = os.path.abspath("charts")
-        if not os.path.exists(output_dir):
-            os.makedirs(output_dir)
-            
-        # Initialize KerykeionChartSVG
-        chart = KerykeionChartSVG(subject, new_output_directory=output_dir)
-        
-        # Generate the SVG file
-        chart.makeSVG()
-        
-        # Identify the generated filename
-        filename = f"{unique_name}_Natal.svg"
-        file_path = os.path.join(output_dir, filename)
-        
-        # Read the SVG content and return it directly
-        if os.path.exists(file_path):
-            with open(file_path, "r", encoding="utf-8") as f:
-                svg_content = f.read()
-            
-            # Clean up the file after reading
-            try:
-                os.remove(file_path)
-            except:
-                pass
-                
-            return svg_content
+
+        # Kerykeion only writes files: give each call its own directory so
+        # concurrent sessions cannot collide
+        with tempfile.TemporaryDirectory(prefix="charts_") as output_dir:
+            chart = KerykeionChartSVG(subject, new_output_directory=output_dir)
+            chart.makeSVG()
+            file_path = os.path.join(output_dir, f"{name}_Natal.svg")
+            if os.path.exists(file_path):
+                with open(file_path, "r", encoding="utf-8") as f:
+                    return f.read()
         return None
-        
+
     except Exception as e:
         print(f"Error in draw_circular_chart: {e}")
         return None